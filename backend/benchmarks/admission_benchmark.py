@@ -0,0 +1,114 @@
+"""
+What oversized requests cost, with and without admission control.
+
+The Bedrock stub takes longer the more prompt tokens it is sent. A chat turn with a very
+long history, a very long PII text and a very long classify input go through
+chatbot_orchestrator.lambda_handler. Each runs once with every limit lifted and once with
+the configured limits. The report shows status, handler time, model calls and prompt
+tokens sent.
+
+Request rates are not measured here: they are capped by API Gateway throttling in front of
+the Lambda (see lib/backend-stack.ts).
+
+Usage:
+    python benchmarks/admission_benchmark.py [--base-latency 0.15] [--input-token-ms 0.05]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+import chatbot_orchestrator  # noqa: E402
+import circuit_breaker  # noqa: E402
+import classification_cache  # noqa: E402
+from load_test import api_gateway_event  # noqa: E402
+from local_aws import FakeBedrock, install_fake_bedrock  # noqa: E402
+from msm_runtime import admission  # noqa: E402
+from routing_eval import CHARS_PER_TOKEN  # noqa: E402
+
+LIMITS = ('MAX_MESSAGE_CHARS', 'MAX_HISTORY_TURNS', 'MAX_HISTORY_CHARS', 'MAX_SYMPTOMS_CHARS', 'MAX_PII_TEXT_CHARS')
+SENTENCE = 'Adult with progressive exertional dyspnea, orthopnea and bilateral ankle oedema over three weeks. '
+
+
+class TokenLatencyBedrock(FakeBedrock):
+    """
+    Stub whose latency grows with the prompt; counts the prompt characters it is sent
+    """
+
+    def __init__(self, base: float, input_token_ms: float, **kwargs):
+        super().__init__(latency=0.0, jitter=0.0, **kwargs)
+        self.base = base
+        self.input_token_ms = input_token_ms
+        self.prompt_chars = 0
+
+    def invoke_model(self, modelId, body, **kwargs):
+        prompt = self.prompt_text(json.loads(body))
+        with self.lock:
+            self.prompt_chars += len(prompt)
+        time.sleep(self.base + len(prompt) / CHARS_PER_TOKEN * self.input_token_ms / 1000)
+        return super().invoke_model(modelId, body, **kwargs)
+
+
+def event(action, data, origin):
+    request = api_gateway_event('/chatbot', action, data)
+    request['headers']['origin'] = origin
+    request['headers'].pop('accept-encoding')
+    return request
+
+
+def oversized_requests():
+    history = [{'sender': 'user' if index % 2 else 'bot', 'text': SENTENCE * 4} for index in range(400)]
+    return [
+        ('chat, 400-turn history', 'chat', {'message': 'And a fever.', 'conversationHistory': history}),
+        ('check_pii, 200k chars', 'check_pii', {'text': SENTENCE * 2100}),
+        ('classify, 50k chars', 'classify', {'symptoms': SENTENCE * 520, 'ageGroup': 'Adult', 'urgency': 'high'})
+    ]
+
+
+def run_oversized(stub, limited):
+    saved = {name: getattr(chatbot_orchestrator, name) for name in LIMITS}
+    saved_body = admission.MAX_BODY_BYTES
+    if not limited:
+        for name in LIMITS:
+            setattr(chatbot_orchestrator, name, 10 ** 9)
+        admission.MAX_BODY_BYTES = 0
+    try:
+        for label, action, data in oversized_requests():
+            calls, chars = stub.calls, stub.prompt_chars
+            started = time.perf_counter()
+            response = chatbot_orchestrator.lambda_handler(event(action, data, 'https://oversized.example'), None)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"{label:<24} {'on' if limited else 'off':<7} {response['statusCode']:>6} {elapsed:9.1f} "
+                  f"{stub.calls - calls:6d} {(stub.prompt_chars - chars) // CHARS_PER_TOKEN:14d}")
+    finally:
+        for name, value in saved.items():
+            setattr(chatbot_orchestrator, name, value)
+        admission.MAX_BODY_BYTES = saved_body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-latency', type=float, default=0.15)
+    parser.add_argument('--input-token-ms', type=float, default=0.05)
+    args = parser.parse_args()
+
+    circuit_breaker.BREAKER_ENABLED = False
+    classification_cache.CACHE_ENABLED = False
+    stub = install_fake_bedrock(TokenLatencyBedrock(args.base_latency, args.input_token_ms))
+
+    print(f"{'request':<24} {'limits':<7} {'status':>6} {'ms':>9} {'calls':>6} {'prompt tokens':>14}")
+    for limited in (False, True):
+        run_oversized(stub, limited)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Hot table size, scan cost and get latency before and after archiving old requests.
+
+Loads --requests requests spread evenly over the last --days days into the in-memory
+requests table and search index (local_aws.py). Old requests are mostly assigned, and a
+--open-rate share is still unassigned. Then data_handler.archive_handler runs with
+--retention-days against a local archive directory (request_archive.LocalStore). Every
+archive read sleeps --store-latency seconds to stand in for an S3 round trip. The report
+shows, before and after the run:
+  * items in the hot table, and the read units and time of one full scan;
+  * unassigned requests found by `list` (status=unassigned, limit 50), since list reads one
+    page of the table and the closed history crowds out open cases;
+  * archive bytes vs. the same records as plain JSON;
+  * `get` latency for a hot request, an archived request with its partition index not yet
+    cached, and an archived request in a cached partition.
+
+Usage:
+    python benchmarks/archive_benchmark.py [--requests 20000] [--days 1095] [--retention-days 365]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+import data_handler  # noqa: E402
+import request_archive  # noqa: E402
+import symptom_index  # noqa: E402
+from local_aws import install_fake_dynamodb  # noqa: E402
+from routing_eval import EVAL_FILE, load_cases  # noqa: E402
+
+URGENCIES = ['low', 'medium', 'high']
+
+
+class SlowStore(request_archive.LocalStore):
+    """
+    Local archive whose reads take one simulated network round trip
+    """
+
+    def __init__(self, root: str, latency: float):
+        super().__init__(root)
+        self.latency = latency
+        self.reads = 0
+
+    def get(self, key):
+        self.reads += 1
+        time.sleep(self.latency)
+        return super().get(key)
+
+    def get_range(self, key, start, length):
+        self.reads += 1
+        time.sleep(self.latency)
+        return super().get_range(key, start, length)
+
+
+def build_requests(count, days, retention_days, open_rate, now, seed):
+    rng = random.Random(seed)
+    cases = load_cases(EVAL_FILE, count)
+    items = []
+    for index in range(count):
+        created = now - timedelta(seconds=rng.uniform(0, days * 86400))
+        age_group, symptoms, urgency = cases[index % len(cases)]
+        recent = (now - created).days < 14
+        status = data_handler.STATUS_UNASSIGNED if recent or rng.random() < open_rate else data_handler.STATUS_ASSIGNED
+        item = {
+            'id': f"REQ-{created.strftime('%Y%m%d%H%M%S')}-{created.microsecond}",
+            'doctorName': f"Dr. Bench {index % 97}",
+            'email': f"bench{index % 97}@example.org",
+            'ageGroup': age_group,
+            'symptoms': symptoms,
+            'urgency': urgency if urgency in URGENCIES else 'medium',
+            'specialty': 'Internal Medicine',
+            'status': status,
+            'createdAt': created.isoformat()
+        }
+        item['triageKey'] = data_handler.triage_key(item['urgency'], item['createdAt'])
+        if status == data_handler.STATUS_ASSIGNED:
+            item['assignedTo'] = f"responder-{index % 8}"
+        items.append(item)
+    return items
+
+
+def call(action, data):
+    response = data_handler.route_request(action, data)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def table_report(label, table):
+    units = table.read_units
+    started = time.perf_counter()
+    scan_kwargs, pages = {}, 0
+    while True:
+        response = table.scan(Limit=1000, **scan_kwargs)
+        pages += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    scan_ms = (time.perf_counter() - started) * 1000
+    scan_units = table.read_units - units
+    _, listed = call('list', {'status': data_handler.STATUS_UNASSIGNED, 'limit': 50})
+    print(f"{label:<8} {len(table.items):>7} {scan_units:>11} {scan_ms:>8.0f} {listed['count']:>14}")
+
+
+def timed_gets(request_ids, samples):
+    latencies = []
+    for request_id in request_ids[:samples]:
+        started = time.perf_counter()
+        status, body = call('get', {'id': request_id})
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert status == 200, (request_id, body)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=3 * 365, help='history covered by the requests')
+    parser.add_argument('--retention-days', type=int, default=365)
+    parser.add_argument('--open-rate', type=float, default=0.01, help='share of old requests still unassigned')
+    parser.add_argument('--store-latency', type=float, default=0.02, help='seconds per archive read')
+    parser.add_argument('--samples', type=int, default=50, help='gets per case')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    resource = install_fake_dynamodb()
+    table = resource.tables['medical-requests']
+    now = datetime.utcnow()
+    items = build_requests(args.requests, args.days, args.retention_days, args.open_rate, now, args.seed)
+    table.load(items)
+    for item in items:
+        symptom_index.index_request(item)
+
+    root = tempfile.mkdtemp(prefix='msm-archive-')
+    try:
+        store = SlowStore(root, args.store_latency)
+        data_handler.archive_store = store
+        data_handler.archive_reader = request_archive.ArchiveReader(store)
+
+        print(f"{args.requests} requests over {args.days} days, retention {args.retention_days} days, "
+              f"{args.store_latency * 1000:g} ms per archive read")
+        print(f"{'table':<8} {'items':>7} {'scan units':>11} {'scan ms':>8} {'list unassigned':>14}")
+        table_report('before', table)
+        summary = data_handler.archive_handler({'retentionDays': args.retention_days}, None)
+        table_report('after', table)
+
+        archived = [item for item in items if item['id'] not in {key[0] for key in table.items}]
+        raw_bytes = sum(len(json.dumps(item)) + 1 for item in archived)
+        print(f"\narchived {summary['archived']} requests into {len(summary['partitions'])} month partitions "
+              f"in {summary['durationMs'] / 1000:.1f}s; {raw_bytes / 1024:.0f} KiB as JSON -> "
+              f"{summary['bytesWritten'] / 1024:.0f} KiB archived ({raw_bytes / max(summary['bytesWritten'], 1):.1f}x)")
+
+        rng = random.Random(args.seed)
+        hot_ids = [key[0] for key in table.items]
+        rng.shuffle(hot_ids)
+        by_partition = {}
+        for item in archived:
+            by_partition.setdefault(request_archive.partition_of(item['createdAt']), []).append(item['id'])
+        # One ID per partition while its index is uncached, then other IDs from cached partitions
+        first_ids = [ids[0] for ids in by_partition.values()]
+        cached_ids = [request_id for ids in by_partition.values() for request_id in ids[1:]]
+        rng.shuffle(cached_ids)
+
+        print(f"\n{'get':<26} {'mean ms':>8} {'max ms':>8}")
+        for label, request_ids in (('hot table', hot_ids), ('archived, index uncached', first_ids),
+                                   ('archived, index cached', cached_ids)):
+            latencies = timed_gets(request_ids, args.samples)
+            print(f"{label:<26} {statistics.mean(latencies):8.1f} {max(latencies):8.1f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
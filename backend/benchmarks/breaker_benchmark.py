@@ -0,0 +1,108 @@
+"""
+Classify latency and outcomes through a Bedrock outage, with and without circuit breakers.
+
+Each run sends classify requests through route_request in three phases against a Bedrock
+stub: healthy, outage and recovery. During the outage every model call hangs for the
+stub's timeout and then fails, the way a call hits the client read timeout while the
+service is degraded. Before the recovery phase the run waits out the breaker's open
+period, so the half-open probe can close the breaker again. The report shows, per phase,
+mean and p95 request latency, the count of 200/503/500 responses and the model calls
+made. With the breaker off every outage request waits for the timeout on both tiers;
+with it on, requests fail fast with 503 once the breaker opens.
+
+Usage:
+    python benchmarks/breaker_benchmark.py [--requests 20 40 20] [--timeout 1.0] [--open-seconds 2]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+import chatbot_orchestrator  # noqa: E402
+import circuit_breaker  # noqa: E402
+import classification_cache  # noqa: E402
+from local_aws import FakeBedrock, install_fake_bedrock  # noqa: E402
+from routing_eval import EVAL_FILE, load_cases, percentile  # noqa: E402
+
+PHASES = ['healthy', 'outage', 'recovery']
+
+
+class OutageBedrock(FakeBedrock):
+    """
+    Stub that, while `down` is set, waits `timeout` seconds and then fails every call
+    """
+
+    def __init__(self, timeout: float, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+        self.down = False
+
+    def invoke_model(self, modelId, body, **kwargs):
+        if not self.down:
+            return super().invoke_model(modelId, body, **kwargs)
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.timeout)
+        raise ClientError({'Error': {'Code': 'ServiceUnavailableException', 'Message': 'Read timed out'}}, 'InvokeModel')
+
+
+def run(cases, stub, counts, open_seconds):
+    chatbot_orchestrator.breakers = circuit_breaker.BreakerRegistry(chatbot_orchestrator.on_breaker_transition)
+    rows = []
+    index = 0
+    for phase, count in zip(PHASES, counts):
+        stub.down = phase == 'outage'
+        if phase == 'recovery':
+            time.sleep(open_seconds)
+        calls_before = stub.calls
+        latencies, statuses = [], []
+        for _ in range(count):
+            age_group, symptoms, urgency = cases[index % len(cases)]
+            index += 1
+            started = time.perf_counter()
+            response = chatbot_orchestrator.route_request(
+                'classify', {'symptoms': symptoms, 'ageGroup': age_group, 'urgency': urgency})
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses.append(response['statusCode'])
+        rows.append((phase, latencies, statuses, stub.calls - calls_before))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, nargs=3, default=[20, 40, 20], metavar=('HEALTHY', 'OUTAGE', 'RECOVERY'))
+    parser.add_argument('--latency', type=float, default=0.05, help='healthy stub seconds per call')
+    parser.add_argument('--timeout', type=float, default=1.0, help='seconds an outage call hangs before failing')
+    parser.add_argument('--open-seconds', type=float, default=2.0, help='breaker open period for the run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    classification_cache.CACHE_ENABLED = False
+    circuit_breaker.OPEN_SECONDS = args.open_seconds
+    cases = load_cases(EVAL_FILE, sum(args.requests))
+    stub = install_fake_bedrock(OutageBedrock(args.timeout, latency=args.latency, jitter=0.1, seed=args.seed))
+
+    print(f"breaker: {circuit_breaker.MIN_CALLS} calls min, {circuit_breaker.FAILURE_RATE:.0%} failures "
+          f"in {circuit_breaker.WINDOW_SECONDS:.0f}s, open {args.open_seconds:.1f}s; outage calls hang {args.timeout:.1f}s")
+    print(f"{'breaker':<8} {'phase':<9} {'mean ms':>8} {'p95 ms':>8} {'200':>4} {'503':>4} {'500':>4} {'calls':>6}")
+    for enabled in (False, True):
+        circuit_breaker.BREAKER_ENABLED = enabled
+        for phase, latencies, statuses, calls in run(cases, stub, args.requests, args.open_seconds):
+            print(f"{'on' if enabled else 'off':<8} {phase:<9} {statistics.mean(latencies):8.0f} "
+                  f"{percentile(latencies, 0.95):8.0f} {statuses.count(200):4d} {statuses.count(503):4d} "
+                  f"{statuses.count(500):4d} {calls:6d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Size and CPU tradeoffs of compressing API responses.
+
+For realistic payloads (a list page, a single stored request, a classification with
+long reasoning, a chat turn) reports the wire size and compression CPU time for gzip
+levels and, if the brotli module is installed, brotli qualities. Use it to pick
+COMPRESSION_MIN_BYTES, GZIP_LEVEL and BROTLI_QUALITY.
+
+Usage:
+    python benchmarks/compression_benchmark.py [--iterations 200]
+"""
+import argparse
+import gzip
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'layers', 'runtime', 'python'))
+
+from msm_runtime import dumps  # noqa: E402
+from runtime_microbenchmark import stored_request  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REASONING = (
+    "The patient is an adult presenting with recurrent anaphylaxis, urticaria and angioedema after "
+    "food exposure, with documented hypotension requiring epinephrine. The pattern of IgE-mediated "
+    "reactions, the need for allergen identification, and long-term management with an action plan "
+    "and possible immunotherapy point to Allergy and Immunology, specifically an internist-trained "
+    "Allergist-Immunologist rather than Emergency Medicine, since the acute episode has resolved. "
+)
+
+PAYLOADS = {
+    'chat turn': {
+        'response': 'Thank you. How long has the rash been present, and has the child had a fever? ',
+        'source': 'bedrock',
+        'canClassify': False,
+        'extractedData': {'ageGroup': 'Child', 'symptoms': 'Child with rash', 'urgency': 'medium', 'confidence': 0.55}
+    },
+    'classification': {
+        'specialty': 'Allergy and Immunology',
+        'subspecialty': 'Allergist-Immunologist (Internist)',
+        'reasoning': REASONING * 4,
+        'confidence': 0.93,
+        'urgency_assessment': 'high',
+        'source': 'bedrock'
+    },
+    'get (1 item)': {'success': True, 'request': stored_request(0)},
+    'list (50 items)': {'success': True, 'requests': [stored_request(i) for i in range(50)], 'count': 50},
+    'list (100 items)': {'success': True, 'requests': [stored_request(i) for i in range(100)], 'count': 100}
+}
+
+
+def codecs():
+    for level in (1, 5, 9):
+        yield f"gzip-{level}", lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0)
+    if brotli is not None:
+        for quality in (1, 4, 9):
+            yield f"br-{quality}", lambda data, quality=quality: brotli.compress(data, quality=quality)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    if brotli is None:
+        print('brotli not installed - reporting gzip only')
+
+    print(f"{'payload':<18} {'codec':<8} {'bytes':>8} {'ratio':>6} {'lambda b64':>10} {'cpu us':>9}")
+    for name, body in PAYLOADS.items():
+        raw = dumps(body).encode('utf-8')
+        print(f"{name:<18} {'identity':<8} {len(raw):>8} {1.0:>6.2f} {len(raw):>10} {0.0:>9.1f}")
+        for codec, compress in codecs():
+            compressed = compress(raw)
+            seconds = min(timeit.repeat(lambda: compress(raw), number=args.iterations, repeat=3)) / args.iterations
+            base64_size = 4 * ((len(compressed) + 2) // 3)
+            print(f"{name:<18} {codec:<8} {len(compressed):>8} {len(raw) / len(compressed):>6.2f} "
+                  f"{base64_size:>10} {seconds * 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
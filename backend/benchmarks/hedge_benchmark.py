@@ -0,0 +1,120 @@
+"""
+Tail latency of classify and PII calls with and without hedged requests.
+
+The Bedrock stub answers most calls in about --latency seconds. A --slow-rate share of
+calls takes --slow-latency instead, like the occasional very slow Nova response. Each
+stage (classify_with_model, and detect_pii_with_bedrock on short texts) runs --calls
+calls, first with hedging off and then with it on. The hedger starts fresh for each run,
+so the first MIN_SAMPLES calls use the default delay until a latency percentile is
+known. The report shows latency percentiles, model calls per request, the share of
+requests that were hedged and how often the hedge answered first.
+
+Usage:
+    python benchmarks/hedge_benchmark.py [--calls 400] [--slow-rate 0.03] [--budget 0.1]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+import chatbot_orchestrator  # noqa: E402
+import circuit_breaker  # noqa: E402
+import hedging  # noqa: E402
+import model_router  # noqa: E402
+from local_aws import FakeBedrock, install_fake_bedrock  # noqa: E402
+from routing_eval import EVAL_FILE, load_cases, percentile  # noqa: E402
+
+
+class TailLatencyBedrock(FakeBedrock):
+    """
+    Stub whose calls are fast except for a random slow share
+    """
+
+    def __init__(self, slow_latency: float, slow_rate: float, **kwargs):
+        super().__init__(**kwargs)
+        self.slow_latency = slow_latency
+        self.slow_rate = slow_rate
+
+    def delay_for(self, model_id: str) -> float:
+        with self.lock:
+            slow = self.random.random() < self.slow_rate
+        return self.slow_latency if slow else super().delay_for(model_id)
+
+
+class Counts:
+    def __init__(self):
+        self.requests = self.hedged = self.hedge_won = 0
+
+    def __call__(self, key, hedged, hedge_won):
+        self.requests += 1
+        self.hedged += hedged
+        self.hedge_won += hedge_won
+
+
+def run_stage(stage, cases, stub, calls, concurrency):
+    def one(index):
+        age_group, symptoms, urgency = cases[index % len(cases)]
+        started = time.perf_counter()
+        if stage == 'classify':
+            prompt = chatbot_orchestrator.build_classification_prompt(symptoms, age_group, urgency)
+            chatbot_orchestrator.classify_with_model(prompt, age_group, model_router.CLASSIFY_MODELS['standard'])
+        else:
+            chatbot_orchestrator.detect_pii_with_bedrock(symptoms)
+        return (time.perf_counter() - started) * 1000
+
+    calls_before = stub.calls
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(one, range(calls)))
+    return latencies, stub.calls - calls_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=400, help='requests per stage and mode')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.1, help='typical stub seconds per call')
+    parser.add_argument('--slow-latency', type=float, default=2.0)
+    parser.add_argument('--slow-rate', type=float, default=0.03)
+    parser.add_argument('--budget', type=float, default=hedging.BUDGET, help='hedges per call allowed')
+    parser.add_argument('--percentile', type=float, default=hedging.PERCENTILE, help='hedge delay percentile')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    circuit_breaker.BREAKER_ENABLED = False
+    hedging.BUDGET = args.budget
+    hedging.PERCENTILE = args.percentile
+    cases = load_cases(EVAL_FILE, args.calls)
+    stub = install_fake_bedrock(TailLatencyBedrock(args.slow_latency, args.slow_rate, latency=args.latency,
+                                                   jitter=0.3, seed=args.seed))
+
+    print(f"{args.slow_rate:.0%} of calls take {args.slow_latency:g}s, others ~{args.latency:g}s; "
+          f"hedge at p{args.percentile * 100:g}, budget {args.budget:.0%}")
+    print(f"{'stage':<9} {'hedging':<8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'mean ms':>8} "
+          f"{'calls/req':>9} {'hedged':>7} {'hedge won':>9}")
+    for stage in ('classify', 'pii'):
+        for enabled in (False, True):
+            hedging.HEDGE_ENABLED = enabled
+            counts = Counts()
+            chatbot_orchestrator.hedger = hedging.Hedger(ThreadPoolExecutor(max_workers=4 * args.concurrency), counts)
+            latencies, calls = run_stage(stage, cases, stub, args.calls, args.concurrency)
+            hedged = counts.hedged / counts.requests if enabled and counts.requests else 0.0
+            won = counts.hedge_won / counts.hedged if counts.hedged else 0.0
+            print(f"{stage:<9} {'on' if enabled else 'off':<8} {percentile(latencies, 0.5):7.0f} "
+                  f"{percentile(latencies, 0.95):7.0f} {percentile(latencies, 0.99):7.0f} "
+                  f"{statistics.mean(latencies):8.0f} {calls / args.calls:9.3f} {hedged:7.1%} {won:9.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Concurrent load generator for both Lambda entry points in a single warm process.
+
+Drives chatbot_orchestrator.lambda_handler and data_handler.lambda_handler with
+API Gateway-shaped events from a thread pool, against an in-memory DynamoDB fake and
+a latency-configurable Bedrock stub (local_aws.py). For each concurrency level it
+reports requests/s, a latency histogram and percentiles, error rate and memory growth.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 1 4 16 64 --requests 500 \\
+        --bedrock-latency 0.4 --bedrock-error-rate 0.01 --dynamo-latency 0.005
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+# EMF metric lines would interleave with the report on stdout
+os.environ.setdefault('METRICS_ENABLED', 'false')
+
+import chatbot_orchestrator  # noqa: E402
+import data_handler  # noqa: E402
+from local_aws import FakeBedrock, install_fake_bedrock, install_fake_dynamodb  # noqa: E402
+
+DEFAULT_MIX = 'chat=3,classify=1,check_pii=1,submit=2,get=2,list=1,stats=1,search=1,next=1'
+CHATBOT_ACTIONS = {'chat', 'classify', 'check_pii', 'review'}
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+SYMPTOMS = [
+    'Adult with severe allergic reaction, anaphylaxis, hypotension, urticaria, angioedema',
+    'Child with recurrent fever, joint swelling and rash for three weeks',
+    'Adult with sudden painless vision loss in one eye and retinal whitening',
+    'Child with shattered hip from fall down stairs, unable to bear weight',
+    'Adult with chest pain radiating to the left arm, diaphoresis and dyspnea'
+]
+CONVERSATION = [
+    {'sender': 'bot', 'text': 'Is the patient a child or an adult?'},
+    {'sender': 'user', 'text': 'Adult (18+ years)'},
+    {'sender': 'bot', 'text': "Please describe your patient's condition."}
+]
+
+
+def api_gateway_event(path: str, action: str, data: dict) -> dict:
+    return {
+        'resource': path,
+        'path': path,
+        'httpMethod': 'POST',
+        'headers': {
+            'origin': 'http://localhost:3000',
+            'content-type': 'application/json',
+            'accept-encoding': 'gzip, deflate, br'
+        },
+        'requestContext': {'stage': 'prod', 'requestId': f"load-{random.getrandbits(48):x}"},
+        'isBase64Encoded': False,
+        'body': json.dumps({'action': action, 'data': data})
+    }
+
+
+class Workload:
+    """
+    Builds events for a weighted action mix; remembers submitted IDs for get requests
+    """
+
+    def __init__(self, mix: str, seed: int):
+        self.actions, self.weights = [], []
+        for entry in mix.split(','):
+            action, _, weight = entry.partition('=')
+            self.actions.append(action.strip())
+            self.weights.append(float(weight or 1))
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_ids = []
+        self.counter = itertools.count()
+
+    def next_event(self):
+        with self.lock:
+            action = self.random.choices(self.actions, self.weights)[0]
+            symptoms = self.random.choice(SYMPTOMS)
+            request_id = self.random.choice(self.request_ids) if self.request_ids else None
+
+        if action == 'chat':
+            data = {'message': symptoms, 'conversationHistory': CONVERSATION}
+        elif action == 'classify':
+            data = {'symptoms': symptoms, 'ageGroup': 'Adult', 'urgency': 'high'}
+        elif action == 'check_pii':
+            data = {'text': symptoms}
+        elif action == 'review':
+            data = {'symptoms': symptoms, 'ageGroup': 'Adult', 'urgency': 'high'}
+        elif action == 'submit':
+            data = {'doctorName': 'Dr. Load', 'email': 'load@example.org', 'ageGroup': 'Adult',
+                    'symptoms': symptoms, 'urgency': self.random.choice(['low', 'medium', 'high']),
+                    'specialty': 'Allergy and Immunology', 'subspecialty': 'Allergist-Immunologist (Internist)'}
+        elif action == 'get':
+            data = {'id': request_id or 'REQ-missing'}
+        elif action == 'list':
+            data = {'limit': 50}
+        elif action == 'search':
+            data = {'query': symptoms.split()[-1]}
+        elif action == 'next':
+            data = {'responderId': f"responder-{next(self.counter) % 8}"}
+        else:
+            data = {}
+
+        path = '/chatbot' if action in CHATBOT_ACTIONS else '/data'
+        return action, api_gateway_event(path, action, data)
+
+    def record(self, action, response):
+        if action == 'submit' and response.get('statusCode') == 200 and not response.get('isBase64Encoded'):
+            with self.lock:
+                self.request_ids.append(json.loads(response['body'])['id'])
+
+
+def invoke(workload: Workload):
+    action, event = workload.next_event()
+    handler = chatbot_orchestrator.lambda_handler if action in CHATBOT_ACTIONS else data_handler.lambda_handler
+    started = time.perf_counter()
+    try:
+        response = handler(event, None)
+        status = response.get('statusCode', 500)
+        workload.record(action, response)
+    except Exception:
+        status = 'exception'
+    return action, (time.perf_counter() - started) * 1000, status
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def histogram(latencies):
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for latency in latencies:
+        for position, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if latency <= bound:
+                counts[position] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+    widest = max(counts) or 1
+    return [(label, count, '#' * round(40 * count / widest)) for label, count in zip(labels, counts) if count]
+
+
+def run_level(concurrency: int, total: int, workload: Workload) -> dict:
+    memory_before, _ = tracemalloc.get_traced_memory()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: invoke(workload), range(total)))
+    elapsed = time.perf_counter() - started
+
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    latencies = sorted(latency for _, latency, _ in results)
+    errors = sum(1 for _, _, status in results if status == 'exception' or status >= 500)
+    by_action = {}
+    for action, latency, _ in results:
+        by_action.setdefault(action, []).append(latency)
+
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'rps': total / elapsed,
+        'p50_ms': statistics.median(latencies),
+        'p90_ms': percentile(latencies, 0.90),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1],
+        'error_rate': errors / total,
+        'heap_growth_kb': (memory_after - memory_before) / 1024,
+        'heap_peak_kb': memory_peak / 1024,
+        'max_rss_growth_kb': rss_after - rss_before,
+        'histogram': histogram(latencies),
+        'p50_by_action_ms': {action: statistics.median(values) for action, values in sorted(by_action.items())}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=400, help='Requests per concurrency level')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Weighted action mix, e.g. chat=3,submit=1')
+    parser.add_argument('--bedrock-latency', type=float, default=0.4, help='Mean Bedrock latency in seconds')
+    parser.add_argument('--bedrock-jitter', type=float, default=0.25, help='Relative +/- jitter on Bedrock latency')
+    parser.add_argument('--bedrock-error-rate', type=float, default=0.0)
+    parser.add_argument('--dynamo-latency', type=float, default=0.004, help='Per-call DynamoDB latency in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    install_fake_dynamodb(latency=args.dynamo_latency)
+    install_fake_bedrock(FakeBedrock(latency=args.bedrock_latency, jitter=args.bedrock_jitter,
+                                     error_rate=args.bedrock_error_rate, seed=args.seed))
+    workload = Workload(args.mix, args.seed)
+
+    tracemalloc.start()
+    # Warm both handlers (imports, caches, a few stored requests for get/search)
+    for _ in range(10):
+        invoke(workload)
+
+    results = [run_level(concurrency, args.requests, workload) for concurrency in args.concurrency]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'errors':>7} {'heap +KB':>9} {'rss +KB':>8}")
+    for result in results:
+        print(f"{result['concurrency']:>5} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p90_ms']:>8.1f} "
+              f"{result['p99_ms']:>8.1f} {result['max_ms']:>8.1f} {result['error_rate']:>7.1%} "
+              f"{result['heap_growth_kb']:>9.0f} {result['max_rss_growth_kb']:>8}")
+    for result in results:
+        print(f"\nconcurrency {result['concurrency']} latency histogram:")
+        for label, count, bar in result['histogram']:
+            print(f"  {label:>9} {count:>6} {bar}")
+        print('  p50 by action: ' + ', '.join(f"{a}={v:.1f}ms" for a, v in result['p50_by_action_ms'].items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Per-invocation logging cost: the original eager f-string logging vs. msm_runtime.logs.
+
+Replays the log calls one chat, classify and check_pii invocation made before structured
+logging (full parsed results, raw Bedrock bodies, model replies) against the
+log_event/log_error calls the orchestrator makes now, with the default sampling, size
+caps and redaction. Lines are formatted the way the Lambda runtime does and written to a
+counting stream, so the report shows CPU time and CloudWatch ingestion bytes per invocation.
+The "unsampled" rows log every event, isolating the effect of size caps and redaction.
+
+Usage:
+    python benchmarks/logging_benchmark.py [--invocations 20000]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'layers', 'runtime', 'python'))
+
+from msm_runtime import log_event, logs  # noqa: E402
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class CountingStream(io.TextIOBase):
+    def __init__(self):
+        self.bytes = 0
+        self.lines = 0
+
+    def write(self, text):
+        self.bytes += len(text.encode('utf-8'))
+        self.lines += text.count('\n')
+        return len(text)
+
+
+SYMPTOMS = (
+    "45-year-old with recurrent episodes of hives, lip and tongue swelling and wheezing within minutes of "
+    "eating shellfish, one episode with hypotension treated with epinephrine in the ED last month."
+)
+CLASSIFICATION = {
+    'specialty': 'Allergy and Immunology',
+    'subspecialty': 'Allergist-Immunologist (Internist)',
+    'reasoning': (
+        "Recurrent IgE-mediated reactions to shellfish with angioedema, urticaria and bronchospasm, including "
+        "one anaphylactic episode requiring epinephrine. Needs allergen confirmation, an anaphylaxis action plan "
+        "and long-term management by an adult allergist-immunologist. " * 3
+    ),
+    'confidence': 0.92,
+    'urgency_assessment': 'medium'
+}
+EXTRACTION = {
+    'ageGroup': 'Adult',
+    'symptoms': SYMPTOMS,
+    'urgency': 'medium',
+    'canClassify': True,
+    'confidence': 0.92,
+    'classification': CLASSIFICATION
+}
+PII_RESULT = {
+    'containsPII': False,
+    'piiFound': [],
+    'piiDetails': [],
+    'recommendation': 'No identifying information found.',
+    'severity': 'low'
+}
+CHAT_REPLY = (
+    "Thank you for the detailed history. To narrow this down: has the patient had any reactions to other foods, "
+    "medications or insect stings, and are there any symptoms between episodes such as chronic hives?"
+)
+
+
+def nova_body(payload):
+    text = json.dumps(payload, indent=2)
+    return json.dumps({'output': {'message': {'role': 'assistant', 'content': [{'text': text}]}}}).encode('utf-8'), text
+
+
+EXTRACT_RAW, EXTRACT_TEXT = nova_body(EXTRACTION)
+CLASSIFY_RAW, CLASSIFY_TEXT = nova_body(CLASSIFICATION)
+PII_RAW, PII_TEXT = nova_body(PII_RESULT)
+CONTEXT_CHARS = 6200
+PROMPT_CHARS = 5400
+
+
+def legacy_chat():
+    logger.info(f"Received request from API Gateway")
+    logger.info(f"Calling Bedrock for chat with context length: {CONTEXT_CHARS}")
+    logger.info(f"Bedrock chat response: {CHAT_REPLY[:100]}...")
+    logger.info(f"Raw combined extraction+classification response: {EXTRACT_RAW[:500]}")
+    logger.info(f"Combined extraction+classification response: {EXTRACT_TEXT}")
+    logger.info(f"Parsed combined result: {EXTRACTION}")
+
+
+def legacy_classify():
+    logger.info(f"Received request from API Gateway")
+    logger.info(f"Classifying case: ageGroup=Adult, urgency=medium, symptoms={SYMPTOMS[:100]}...")
+    logger.info(f"Calling Bedrock classification with age_group: Adult, symptoms: {SYMPTOMS[:100]}...")
+    logger.info(f"Raw Bedrock response body: {CLASSIFY_RAW[:500]}")
+    logger.info(f"Bedrock classification response: {CLASSIFY_TEXT}")
+    logger.info(f"Final classification: {CLASSIFICATION}")
+
+
+def legacy_pii():
+    logger.info(f"Received request from API Gateway")
+    logger.info(f"Checking text for PII (length: {len(SYMPTOMS)})")
+    logger.info(f"Calling Bedrock for PII detection...")
+    logger.info(f"PII detection response: {PII_TEXT}")
+    logger.info(f"PII detection result: {PII_RESULT}")
+
+
+def structured_chat():
+    log_event('request.received', action='chat')
+    log_event('bedrock.call', stage='chat', promptChars=CONTEXT_CHARS)
+    log_event('bedrock.reply', stage='chat', reply=CHAT_REPLY)
+    log_event('bedrock.raw_response', stage='extract', raw=EXTRACT_RAW)
+    log_event('bedrock.reply', stage='extract', reply=EXTRACT_TEXT)
+    log_event(
+        'extraction.result',
+        canClassify=EXTRACTION.get('canClassify'),
+        confidence=EXTRACTION.get('confidence'),
+        classification=lambda: EXTRACTION.get('classification')
+    )
+
+
+def structured_classify():
+    log_event('request.received', action='classify')
+    log_event('classification.request', ageGroup='Adult', urgency='medium', symptomsChars=len(SYMPTOMS))
+    log_event('bedrock.call', stage='classify', ageGroup='Adult', promptChars=PROMPT_CHARS)
+    log_event('bedrock.raw_response', stage='classify', raw=CLASSIFY_RAW)
+    log_event('bedrock.reply', stage='classify', reply=CLASSIFY_TEXT)
+    log_event(
+        'classification.result',
+        specialty=CLASSIFICATION.get('specialty'),
+        subspecialty=CLASSIFICATION.get('subspecialty'),
+        confidence=CLASSIFICATION.get('confidence')
+    )
+
+
+def structured_pii():
+    log_event('request.received', action='check_pii')
+    log_event('pii.request', textChars=len(SYMPTOMS))
+    log_event('bedrock.call', stage='pii', promptChars=PROMPT_CHARS)
+    log_event('bedrock.reply', stage='pii', reply=PII_TEXT)
+    log_event('pii.result', containsPII=False, piiFound=[], severity='low')
+
+
+SCENARIOS = [
+    ('chat', legacy_chat, structured_chat),
+    ('classify', legacy_classify, structured_classify),
+    ('check_pii', legacy_pii, structured_pii)
+]
+
+
+def measure(fn, invocations):
+    stream = CountingStream()
+    handler = logging.StreamHandler(stream)
+    # Same layout as the Lambda Python runtime's default log format
+    handler.setFormatter(logging.Formatter('[%(levelname)s]\t%(asctime)s.%(msecs)03dZ\t%(process)d\t%(message)s'))
+    logger.handlers = [handler]
+    started = time.perf_counter()
+    for _ in range(invocations):
+        fn()
+    elapsed = time.perf_counter() - started
+    logger.handlers = []
+    return elapsed / invocations * 1e6, stream.bytes / invocations, stream.lines / invocations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--invocations', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'action':<10} {'logging':<11} {'us/inv':>8} {'bytes/inv':>10} {'lines/inv':>10}")
+    for name, legacy, structured in SCENARIOS:
+        legacy_us, legacy_bytes, legacy_lines = measure(legacy, args.invocations)
+        new_us, new_bytes, new_lines = measure(structured, args.invocations)
+        sample_rates, logs.SAMPLE_RATES = logs.SAMPLE_RATES, {}
+        full_us, full_bytes, full_lines = measure(structured, args.invocations)
+        logs.SAMPLE_RATES = sample_rates
+        print(f"{name:<10} {'f-string':<11} {legacy_us:8.1f} {legacy_bytes:10.0f} {legacy_lines:10.2f}")
+        print(f"{name:<10} {'unsampled':<11} {full_us:8.1f} {full_bytes:10.0f} {full_lines:10.2f}")
+        print(f"{name:<10} {'structured':<11} {new_us:8.1f} {new_bytes:10.0f} {new_lines:10.2f}")
+        print(f"{'':<10} {'saved':<11} {legacy_us - new_us:8.1f} {legacy_bytes - new_bytes:10.0f}"
+              f" ({(1 - new_bytes / legacy_bytes) * 100:.0f}% fewer bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+Warm-request latency and cost per request of both Lambdas at each memory size.
+
+Lambda gives a function CPU in proportion to its memory: one full vCPU at 1769 MB, and a
+matching fraction below or above that. For each handler and each --memory tier, this
+script starts a fresh Python process as a stand-in for one container.
+
+The process gets the in-memory DynamoDB and latency-configurable Bedrock stand-ins from
+local_aws.py. Each model or table call costs a fixed wait plus --sdk-cpu-ms of CPU. That
+CPU stands in for the request building, signing and response parsing boto3 does. The
+default of 0.7 ms is what one GetItem or InvokeModel call took, with only the HTTP send
+stubbed out, on the machine it was measured on.
+
+Once the process is warm, the parent gives it a CPU quota of memory / 1769 cores per
+--period seconds. The parent polls the process's CPU clock and stops the process for the
+rest of the period once the quota is used, the way a cgroup CPU quota throttles a
+container. Waiting on a stand-in uses none of the quota. Above 1769 MB the extra share
+only helps when threads run on more than one core of this machine.
+
+The process then sends --requests API Gateway events from load_test.py's mix, one at a
+time, as one container serves them. Chatbot events carry a --turns message history and
+--text-chars of symptoms or PII text. Parsing, validation, prompt building, Decimal
+conversion and response encoding all run under the quota.
+
+For each tier the report shows:
+  * module import time under the quota, the CPU-bound part of a cold start;
+  * CPU ms per request and the ms per request the process spent stopped for quota;
+  * mean/p50/p95 latency;
+  * memory high-water mark; a "!" marks a tier smaller than it;
+  * cost per million requests: billed GB-seconds at --gb-second-price, with each duration
+    rounded up to 1 ms, plus --request-price. A --cold-start-rate share of requests also
+    pays for the import time, since Lambda bills the init phase;
+  * concurrent executions needed to serve each --rps rate (rate x mean duration), since
+    slower tiers hold more executions against the account and reserved-concurrency limits.
+The recommended tier is the cheapest one whose p95 is within --slack of the fastest tier's
+p95, whose import time is at most --max-init-ms and whose memory exceeds the high-water
+mark. After each table comes the largest tier's mean time per traced stage (the spans
+behind the Server-Timing header). Absolute CPU and import times depend on this machine, so
+compare the tiers with each other.
+
+Usage:
+    python benchmarks/memory_sweep_benchmark.py [--memory 128 256 512 1024 1769] [--requests 100]
+"""
+import argparse
+import ctypes
+import importlib
+import json
+import os
+import resource
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+FULL_VCPU_MB = 1769
+POLL_SECONDS = 0.0005
+MIXES = {
+    'chatbot': 'chat=3,classify=1,check_pii=1,review=1',
+    'data': 'submit=2,get=2,list=1,stats=1,search=1'
+}
+HANDLER_MODULES = {'chatbot': 'chatbot_orchestrator', 'data': 'data_handler'}
+CONFIGURED_MB = {'chatbot': 768, 'data': 768}
+# Spans that wait on a stand-in rather than use CPU
+IO_SPANS = ('claude', 'nova', 'ddb', 'archive')
+
+
+def enlarge(action, event, turns, text_chars):
+    """
+    Give a chatbot event a --turns message history and --text-chars of symptoms or PII text
+    """
+    from load_test import CONVERSATION, SYMPTOMS
+    body = json.loads(event['body'])
+    data = body['data']
+    if action == 'chat':
+        messages = CONVERSATION + [{'sender': 'user', 'text': symptoms} for symptoms in SYMPTOMS]
+        data['conversationHistory'] = [messages[index % len(messages)] for index in range(turns)]
+    for field in ('symptoms', 'text'):
+        if field in data:
+            data[field] = ' '.join([data[field]] * (text_chars // len(data[field]) + 1))[:text_chars]
+    event['body'] = json.dumps(body)
+    return event
+
+
+def container(handler, args):
+    """
+    Child process: import the handler, set up one warm container, wait for the parent, then
+    serve the requests in order
+    """
+    started = time.perf_counter()
+    importlib.import_module(HANDLER_MODULES[handler])
+    print(f"init {(time.perf_counter() - started) * 1000:.1f}", flush=True)
+
+    import chatbot_orchestrator
+    import classification_cache
+    import data_handler
+    from load_test import CHATBOT_ACTIONS, Workload
+    from local_aws import FakeBedrock, install_fake_bedrock, install_fake_dynamodb
+    from msm_runtime import tracing
+
+    # The Server-Timing header rounds to 0.1 ms, which hides most CPU stages
+    traced = []
+
+    def keep_spans(response):
+        trace = tracing._current_trace.get()
+        if trace is not None:
+            spans = {'total': (time.perf_counter() - trace.started) * 1000}
+            for name, duration, _ in trace.spans:
+                spans[name] = spans.get(name, 0.0) + duration
+            traced.append(spans)
+        return tracing.finish_trace(response)
+
+    def serve(workload):
+        action, event = workload.next_event()
+        if action in CHATBOT_ACTIONS:
+            response = chatbot_orchestrator.lambda_handler(enlarge(action, event, args.turns, args.text_chars), None)
+        else:
+            response = data_handler.lambda_handler(event, None)
+        workload.record(action, response)
+        return action, response
+
+    chatbot_orchestrator.finish_trace = data_handler.finish_trace = keep_spans
+    # Every classify would otherwise be a cache hit after the first few requests
+    classification_cache.CACHE_ENABLED = False
+    install_fake_dynamodb(args.dynamo_latency, args.sdk_cpu_ms / 1000)
+    install_fake_bedrock(FakeBedrock(latency=args.bedrock_latency, jitter=0.0, seed=args.seed,
+                                     sdk_cpu=args.sdk_cpu_ms / 1000))
+    workload = Workload(MIXES[handler], args.seed)
+    if handler == 'data':
+        # Enough stored requests for list to return full pages and for get to find
+        prefill = Workload('submit=1', args.seed)
+        for _ in range(200):
+            serve(prefill)
+        workload.request_ids = prefill.request_ids
+    for _ in range(10):
+        serve(workload)
+    traced.clear()
+
+    print('ready', flush=True)
+    sys.stdin.readline()
+    runs = []
+    for _ in range(args.requests):
+        cpu_started, started = time.process_time(), time.perf_counter()
+        action, response = serve(workload)
+        runs.append({
+            'action': action,
+            'ms': (time.perf_counter() - started) * 1000,
+            'cpuMs': (time.process_time() - cpu_started) * 1000,
+            'status': response.get('statusCode'),
+            'spans': traced.pop() if traced else {}
+        })
+    print(json.dumps({'runs': runs, 'maxRssMb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def process_cpu_clock(pid):
+    """
+    Clock id of another process's CPU time (all threads), for time.clock_gettime; Linux only
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    clock = ctypes.c_int()
+    if libc.clock_getcpuclockid(pid, ctypes.byref(clock)):
+        raise OSError(ctypes.get_errno(), 'clock_getcpuclockid failed')
+    return clock.value
+
+
+def throttle(pid, share, period, stop, stopped):
+    """
+    CPU quota of share x period per period: once the process has used it, stop the process
+    until the period ends. Time spent waiting on I/O uses none of the quota.
+    """
+    try:
+        clock = process_cpu_clock(pid)
+        while not stop.is_set():
+            period_end = time.perf_counter() + period
+            budget_end = time.clock_gettime(clock) + share * period
+            while time.perf_counter() < period_end:
+                if time.clock_gettime(clock) >= budget_end:
+                    paused = time.perf_counter()
+                    os.kill(pid, signal.SIGSTOP)
+                    time.sleep(max(0.0, period_end - paused))
+                    os.kill(pid, signal.SIGCONT)
+                    stopped.append(time.perf_counter() - paused)
+                    break
+                time.sleep(POLL_SECONDS)
+    except OSError:
+        # The process exited between two checks
+        pass
+
+
+@contextmanager
+def cpu_quota(pid, share, period):
+    """
+    Throttle the process while the block runs; yields the list of stop durations
+    """
+    stop, stopped = threading.Event(), []
+    throttler = threading.Thread(target=throttle, args=(pid, share, period, stop, stopped))
+    throttler.start()
+    try:
+        yield stopped
+    finally:
+        stop.set()
+        throttler.join()
+
+
+def read_until(child, prefix):
+    while True:
+        line = child.stdout.readline()
+        if not line:
+            raise RuntimeError(f"container exited with {child.wait()} before '{prefix}'")
+        if line.startswith(prefix):
+            return line[len(prefix):].strip()
+
+
+def run_tier(handler, memory, args):
+    share = memory / FULL_VCPU_MB
+    command = [sys.executable, os.path.abspath(__file__), '--container', handler]
+    for option in ('requests', 'bedrock_latency', 'dynamo_latency', 'sdk_cpu_ms', 'turns', 'text_chars', 'seed'):
+        command += ['--' + option.replace('_', '-'), str(getattr(args, option))]
+    child = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        # Module init runs under the quota too; the fixture setup after it does not
+        with cpu_quota(child.pid, share, args.period):
+            init_ms = float(read_until(child, 'init'))
+        read_until(child, 'ready')
+        # Every tier runs the throttler, so each pays the same polling overhead
+        with cpu_quota(child.pid, share, args.period) as stopped:
+            child.stdin.write('go\n')
+            child.stdin.flush()
+            output = read_until(child, '{')
+        child.wait()
+    finally:
+        if child.poll() is None:
+            child.kill()
+    result = json.loads('{' + output)
+    result['initMs'] = init_ms
+    result['throttledMs'] = sum(stopped) * 1000 / args.requests
+    return result
+
+
+def summarize(memory, result, args):
+    # Imported here: routing_eval imports the chatbot handler, whose init time a container measures
+    from routing_eval import percentile
+    runs = result['runs']
+    latencies = [run['ms'] for run in runs]
+    # Durations are billed in whole milliseconds, rounded up
+    billed_ms = statistics.mean(-(-run['ms'] // 1) for run in runs)
+    billed_ms += args.cold_start_rate * -(-result['initMs'] // 1)
+    gb_seconds = billed_ms / 1000 * memory / 1024
+    return {
+        'memory': memory,
+        'share': memory / FULL_VCPU_MB,
+        'throttledMs': result['throttledMs'],
+        'initMs': result['initMs'],
+        'cpuMs': statistics.mean(run['cpuMs'] for run in runs),
+        'meanMs': statistics.mean(latencies),
+        'p50Ms': percentile(latencies, 0.5),
+        'p95Ms': percentile(latencies, 0.95),
+        'maxRssMb': result['maxRssMb'],
+        'costPerMillion': (gb_seconds * args.gb_second_price + args.request_price / 1e6) * 1e6,
+        'errors': sum(1 for run in runs if run['status'] != 200)
+    }
+
+
+def stage_breakdown(runs):
+    """
+    Mean ms per request in each traced stage, then the time outside any span
+    """
+    totals, untraced = {}, 0.0
+    for run in runs:
+        stages = {name: duration for name, duration in run['spans'].items() if name != 'total'}
+        for name, duration in stages.items():
+            totals[name] = totals.get(name, 0.0) + duration
+        # Parallel model calls overlap, so their spans can add up to more than the total
+        untraced += max(0.0, run['spans'].get('total', run['ms']) - sum(stages.values()))
+    stages = sorted(totals.items(), key=lambda entry: (entry[0] in IO_SPANS, -entry[1]))
+    return [(name, duration / len(runs)) for name, duration in stages] + [('(no span)', untraced / len(runs))]
+
+
+def report(handler, tiers, args):
+    fastest = min(tier['p95Ms'] for tier in tiers)
+    fitting = [tier for tier in tiers if tier['p95Ms'] <= fastest * (1 + args.slack)
+               and tier['initMs'] <= args.max_init_ms and tier['maxRssMb'] < tier['memory']]
+    recommended = min(fitting, key=lambda tier: tier['costPerMillion']) if fitting else None
+
+    print(f"\n{handler}: {args.requests} requests of {MIXES[handler]}; configured {CONFIGURED_MB[handler]} MB")
+    rps_header = ''.join(f" {f'conc@{rate:g}/s':>11}" for rate in args.rps)
+    print(f"{'MB':>6} {'vCPU':>5} {'init ms':>8} {'cpu ms':>7} {'stalled':>8} {'mean ms':>8} {'p50 ms':>7} "
+          f"{'p95 ms':>7} {'rss MB':>7} {'$/1M req':>9} {'errors':>6}{rps_header}")
+    for tier in tiers:
+        too_small = '!' if tier['maxRssMb'] >= tier['memory'] else ' '
+        concurrency = ''.join(f" {rate * tier['meanMs'] / 1000:11.1f}" for rate in args.rps)
+        print(f"{tier['memory']:>6} {tier['share']:5.2f} {tier['initMs']:8.0f} {tier['cpuMs']:7.1f} "
+              f"{tier['throttledMs']:8.1f} {tier['meanMs']:8.1f} {tier['p50Ms']:7.1f} {tier['p95Ms']:7.1f} "
+              f"{tier['maxRssMb']:6.0f}{too_small} {tier['costPerMillion']:9.2f} {tier['errors']:>6}{concurrency} "
+              f"{'*' if tier is recommended else ''}")
+    bounds = f"p95 within {args.slack:.0%} of {fastest:.1f} ms and init within {args.max_init_ms:g} ms"
+    if recommended:
+        print(f"* recommended: {recommended['memory']} MB (cheapest with {bounds})")
+    else:
+        print(f"no tier has {bounds}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--handlers', nargs='+', choices=sorted(MIXES), default=sorted(MIXES))
+    parser.add_argument('--memory', type=int, nargs='+', default=[128, 256, 512, 768, 1024, 1536, 1769])
+    parser.add_argument('--requests', type=int, default=100, help='requests per tier')
+    parser.add_argument('--bedrock-latency', type=float, default=0.4, help='seconds per model call')
+    parser.add_argument('--dynamo-latency', type=float, default=0.005, help='seconds per DynamoDB call')
+    parser.add_argument('--sdk-cpu-ms', type=float, default=0.7, help='client CPU per AWS call')
+    parser.add_argument('--turns', type=int, default=12, help='messages in each chat history')
+    parser.add_argument('--text-chars', type=int, default=1500, help='symptoms and PII text length')
+    parser.add_argument('--period', type=float, default=0.1, help='seconds per CPU quota period (the CFS default)')
+    parser.add_argument('--rps', type=float, nargs='+', default=[10, 100], help='rates for the concurrency columns')
+    parser.add_argument('--slack', type=float, default=0.10, help='p95 allowed above the fastest tier')
+    parser.add_argument('--max-init-ms', type=float, default=1000, help='slowest import time to recommend')
+    parser.add_argument('--cold-start-rate', type=float, default=0.01, help='share of requests that start a container')
+    parser.add_argument('--gb-second-price', type=float, default=0.0000166667, help='x86; arm64 is 0.0000133334')
+    parser.add_argument('--request-price', type=float, default=0.20, help='dollars per million requests')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--container', choices=sorted(MIXES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.container:
+        container(args.container, args)
+        return
+    if not sys.platform.startswith('linux'):
+        parser.error('the CPU quota needs Linux (clock_getcpuclockid)')
+
+    print(f"Bedrock {args.bedrock_latency * 1000:g} ms, DynamoDB {args.dynamo_latency * 1000:g} ms per call; "
+          f"CPU quota period {args.period * 1000:g} ms; one vCPU at {FULL_VCPU_MB} MB")
+    for handler in args.handlers:
+        results = {memory: run_tier(handler, memory, args) for memory in sorted(args.memory)}
+        report(handler, [summarize(memory, result, args) for memory, result in results.items()], args)
+        print(f"{'stage':<14} {'ms/request':>10}   ({max(results)} MB)")
+        for name, duration in stage_breakdown(results[max(results)]['runs']):
+            print(f"{name:<14} {duration:10.2f}")
+
+
+if __name__ == '__main__':
+    main()
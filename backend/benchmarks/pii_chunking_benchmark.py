@@ -0,0 +1,144 @@
+"""
+PII detection latency and span recall on long free text: one prompt vs. parallel chunks.
+
+Builds synthetic discharge summaries of increasing length with planted identifiers
+(names, phone numbers, medical record numbers, dates) and runs detect_pii_with_bedrock on
+them, once with chunking effectively disabled (the original single-prompt behaviour) and
+once with the configured chunking. The Bedrock stub reports every planted identifier it
+sees in the prompt. Its latency grows with prompt and reply tokens, and replies longer
+than the request's max_new_tokens are truncated the way the model would truncate them.
+The report shows latency, chunk count, whether the answer fell back to the "assume PII"
+default, and the fraction of planted identifiers covered by the returned piiSpans.
+
+Usage:
+    python benchmarks/pii_chunking_benchmark.py [--sizes 1000 4000 16000 32000] [--concurrency 8]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+
+import chatbot_orchestrator  # noqa: E402
+import pii_chunking  # noqa: E402
+from local_aws import FakeBedrock, FakeStreamingBody, install_fake_bedrock  # noqa: E402
+from routing_eval import CHARS_PER_TOKEN  # noqa: E402
+
+NAMES = ['Maria Alvarez', 'John Okafor', 'Wei Chen', 'Fatima Rahman', 'Liam O\'Brien', 'Aiko Tanaka']
+PLANTED = [
+    ('Names', re.compile('|'.join(re.escape(name) for name in NAMES))),
+    ('Telephone numbers', re.compile(r'\(\d{3}\) \d{3}-\d{4}')),
+    ('Medical record numbers', re.compile(r'MRN \d{7}')),
+    ('Dates', re.compile(r'\d{2}/\d{2}/20\d{2}'))
+]
+SENTENCES = [
+    'Patient {name} was admitted on {date} with community-acquired pneumonia.',
+    'Chest radiograph showed a right lower lobe consolidation without effusion.',
+    'Started on ceftriaxone and azithromycin with clinical improvement over 48 hours.',
+    'Contact the daughter {name} at {phone} with any questions about follow-up.',
+    'Record {mrn} was reviewed by the attending physician before discharge.',
+    'Oxygen saturation remained above 94 percent on room air from day three.',
+    'Follow up with primary care within one week; repeat imaging in six weeks.',
+    'No known drug allergies. Home medications were continued unchanged.'
+]
+
+
+def discharge_summary(chars, rng):
+    parts = []
+    while sum(len(part) + 1 for part in parts) < chars:
+        parts.append(rng.choice(SENTENCES).format(
+            name=rng.choice(NAMES),
+            date=f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2024",
+            phone=f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}",
+            mrn=f"MRN {rng.randint(0, 9999999):07d}"
+        ))
+        if rng.random() < 0.15:
+            parts[-1] += '\n'
+    return ' '.join(parts)
+
+
+def planted_spans(text):
+    return {(match.start(), match.end()) for _, pattern in PLANTED for match in pattern.finditer(text)}
+
+
+class PlantedPiiBedrock(FakeBedrock):
+    """
+    Reports the planted identifiers in a PII prompt; latency scales with tokens and replies
+    are cut at max_new_tokens
+    """
+
+    def __init__(self, base, input_token_ms, output_token_ms, **kwargs):
+        super().__init__(latency=0.0, **kwargs)
+        self.base = base
+        self.input_token_ms = input_token_ms
+        self.output_token_ms = output_token_ms
+
+    def invoke_model(self, modelId, body, **kwargs):
+        payload = json.loads(body)
+        prompt = self.prompt_text(payload)
+        analyzed = prompt.split('Text to analyze:\n', 1)[-1].split('\n\nPII CATEGORIES', 1)[0]
+        details = [
+            {'type': kind, 'value': match.group(0), 'location': analyzed[max(0, match.start() - 20):match.start()]}
+            for kind, pattern in PLANTED for match in pattern.finditer(analyzed)
+        ]
+        reply = json.dumps({
+            'containsPII': bool(details), 'piiFound': sorted({detail['type'] for detail in details}),
+            'piiDetails': details, 'recommendation': 'Remove identifiers', 'severity': 'high' if details else 'low'
+        }, indent=2)
+        reply = reply[:payload['inferenceConfig']['max_new_tokens'] * CHARS_PER_TOKEN]
+        time.sleep(self.base + (len(prompt) * self.input_token_ms + len(reply) * self.output_token_ms) / CHARS_PER_TOKEN / 1000)
+        response = {'output': {'message': {'role': 'assistant', 'content': [{'text': reply}]}}}
+        return {'body': FakeStreamingBody(json.dumps(response).encode('utf-8'))}
+
+
+def recall(result, expected):
+    if not expected:
+        return 1.0
+    covered = sum(
+        1 for start, end in expected
+        if any(span['start'] <= start and end <= span['end'] for span in result.get('piiSpans', []))
+    )
+    return covered / len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 4000, 16000, 32000])
+    parser.add_argument('--base-latency', type=float, default=0.1)
+    parser.add_argument('--input-token-ms', type=float, default=0.05)
+    parser.add_argument('--output-token-ms', type=float, default=2.0)
+    parser.add_argument('--concurrency', type=int, default=pii_chunking.MAX_CONCURRENCY, help='chunks checked at once')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    chatbot_orchestrator.pii_executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    install_fake_bedrock(PlantedPiiBedrock(args.base_latency, args.input_token_ms, args.output_token_ms, jitter=0.0))
+    rng = random.Random(args.seed)
+    configured = pii_chunking.CHUNK_CHARS
+    print(f"chunk size {configured} chars, overlap {pii_chunking.CHUNK_OVERLAP}, concurrency {args.concurrency}")
+    print(f"{'chars':>7} {'mode':<8} {'chunks':>6} {'ms':>8} {'fallback':>9} {'span recall':>12}")
+    for size in args.sizes:
+        text = discharge_summary(size, rng)
+        expected = planted_spans(text)
+        for mode, chunk_chars in [('single', len(text) + 1), ('chunked', configured)]:
+            pii_chunking.CHUNK_CHARS = chunk_chars
+            started = time.perf_counter()
+            result = chatbot_orchestrator.detect_pii_with_bedrock(text)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"{len(text):7d} {mode:<8} {result['chunks']:6d} {elapsed:8.0f} "
+                  f"{'yes' if 'error' in result else 'no':>9} {recall(result, expected):12.0%}")
+    pii_chunking.CHUNK_CHARS = configured
+
+
+if __name__ == '__main__':
+    main()
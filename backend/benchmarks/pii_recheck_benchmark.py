@@ -0,0 +1,112 @@
+"""
+PII re-check cost after a small edit: full re-check vs. incremental re-check by session.
+
+Uses the discharge summaries and the planted-identifier Bedrock stub of
+pii_chunking_benchmark.py. Model latency grows with prompt and reply tokens. For each text
+size, one session checks the text once, then re-checks it after each of two edits:
+  * clinical - one sentence without identifiers is rewritten;
+  * remove   - one planted identifier is deleted, as when the doctor acts on a PII warning.
+Each edit is checked once in full (no sessionId, the previous behaviour) and once
+incrementally. The report shows latency, characters sent to the model, model input
+tokens, and whether the answer matches the full check: same containsPII and the same
+piiSpans.
+
+Usage:
+    python benchmarks/pii_recheck_benchmark.py [--sizes 1000 4000 16000]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+import chatbot_orchestrator  # noqa: E402
+import pii_chunking  # noqa: E402
+from local_aws import install_fake_bedrock  # noqa: E402
+from pii_chunking_benchmark import NAMES, PlantedPiiBedrock, discharge_summary  # noqa: E402
+from routing_eval import CHARS_PER_TOKEN  # noqa: E402
+
+CLINICAL_REWRITE = 'Repeat chest radiograph on day five showed partial resolution of the consolidation.'
+
+
+class CountingBedrock(PlantedPiiBedrock):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prompt_chars = 0
+
+    def invoke_model(self, modelId, body, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.prompt_chars += len(self.prompt_text(json.loads(body)))
+        return super().invoke_model(modelId, body, **kwargs)
+
+
+def edits(text, rng):
+    """
+    (name, edited text) for a clinical rewrite and an identifier removal
+    """
+    clinical = [sentence for sentence in re.split(r'(?<=\.) ', text)
+                if not any(name in sentence for name in NAMES) and not re.search(r'\d', sentence)]
+    target = rng.choice(clinical)
+    rewritten = text.replace(target, CLINICAL_REWRITE, 1)
+    name = next(name for name in NAMES if name in text)
+    removed = text.replace(name, 'the patient', 1)
+    return [('clinical', rewritten), ('remove', removed)]
+
+
+def measure(stub, text, session_id=None):
+    calls, chars = stub.calls, stub.prompt_chars
+    started = time.perf_counter()
+    result = chatbot_orchestrator.detect_pii_with_bedrock(text, session_id=session_id)
+    elapsed = (time.perf_counter() - started) * 1000
+    return result, elapsed, stub.prompt_chars - chars, stub.calls - calls
+
+
+def same_answer(result, reference):
+    spans = lambda answer: sorted((span['start'], span['end']) for span in answer['piiSpans'])  # noqa: E731
+    return result['containsPII'] == reference['containsPII'] and spans(result) == spans(reference)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 4000, 16000])
+    parser.add_argument('--base-latency', type=float, default=0.1)
+    parser.add_argument('--input-token-ms', type=float, default=0.05)
+    parser.add_argument('--output-token-ms', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    chatbot_orchestrator.pii_executor = ThreadPoolExecutor(max_workers=pii_chunking.MAX_CONCURRENCY)
+    stub = install_fake_bedrock(CountingBedrock(args.base_latency, args.input_token_ms, args.output_token_ms, jitter=0.0))
+    rng = random.Random(args.seed)
+    print(f"{'chars':>6} {'edit':<9} {'mode':<12} {'ms':>7} {'calls':>6} {'sent chars':>11} "
+          f"{'input tokens':>13} {'same answer':>12}")
+    for size in args.sizes:
+        text = discharge_summary(size, rng)
+        for edit, edited in edits(text, rng):
+            session_id = str(uuid.uuid4())
+            measure(stub, text, session_id)
+            reference, full_ms, full_chars, full_calls = measure(stub, edited)
+            result, ms, chars, calls = measure(stub, edited, session_id)
+            for mode, row in (('full', (full_ms, full_calls, full_chars, True)),
+                              ('incremental', (ms, calls, chars, same_answer(result, reference)))):
+                elapsed, model_calls, prompt_chars, same = row
+                text_chars = len(edited) if mode == 'full' else result['checkedChars']
+                print(f"{len(edited):6d} {edit:<9} {mode:<12} {elapsed:7.0f} {model_calls:6d} {text_chars:11d} "
+                      f"{prompt_chars // CHARS_PER_TOKEN:13d} {'yes' if same else 'NO':>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Offline A/B comparison of prompt versions from the prompt registry (lambda/prompts/).
+
+Every version of each prompt is rendered for the same eval cases (classify-281 for
+classify and PII, extract-92 for extract, chat-100 for chat) and sent through the
+orchestrator's own call path (call_bedrock_for_chat, extract_with_model,
+classify_with_model, detect_pii_with_bedrock) against a Bedrock stub. The stub's latency
+grows with prompt and reply size, so longer prompts cost measurable time. The report
+shows each version's fixed template tokens, mean rendered prompt tokens, latency
+percentiles and parse success rate. Tokens are estimated at 4 characters per token.
+
+v1 of chat, extract and classify reproduces the prompts the eval sets were captured with.
+
+Usage:
+    python benchmarks/prompt_ab.py [--prompts chat classify] [--limit 50]
+    python benchmarks/prompt_ab.py --input-token-ms 0.05 --output-token-ms 1
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+
+import chatbot_orchestrator  # noqa: E402
+import model_router  # noqa: E402
+from local_aws import FakeBedrock, install_fake_bedrock  # noqa: E402
+from routing_eval import CHARS_PER_TOKEN, EVAL_FILE, load_cases, percentile  # noqa: E402
+from specialty_token_report import conversations  # noqa: E402
+
+
+class TokenLatencyBedrock(FakeBedrock):
+    """
+    Stub whose latency is a base time plus a cost per prompt token and per reply token
+    """
+
+    def __init__(self, base: float, input_token_ms: float, output_token_ms: float, **kwargs):
+        super().__init__(latency=0.0, **kwargs)
+        self.base = base
+        self.input_token_ms = input_token_ms
+        self.output_token_ms = output_token_ms
+
+    def invoke_model(self, modelId, body, **kwargs):
+        prompt = self.prompt_text(json.loads(body))
+        reply = self.reply_text(prompt)
+        time.sleep(self.base + (len(prompt) * self.input_token_ms + len(reply) * self.output_token_ms) / CHARS_PER_TOKEN / 1000)
+        return super().invoke_model(modelId, body, **kwargs)
+
+
+def eval_cases(limit):
+    symptoms_cases = load_cases(EVAL_FILE, limit)
+    chats = [history for history in conversations('chat-100.jsonl') if history and history[-1]['sender'] == 'user']
+    return {
+        'chat': chats[:limit],
+        'extract': list(conversations('extract-92.jsonl'))[:limit],
+        'classify': symptoms_cases,
+        'pii': [symptoms for _, symptoms, _ in symptoms_cases]
+    }
+
+
+def run_case(name, version, case):
+    """
+    (prompt, ok) for one case through the orchestrator's call path for the prompt
+    """
+    if name == 'chat':
+        prompt = chatbot_orchestrator.build_conversation_context(case[:-1], case[-1]['text'], version)
+        return prompt, bool(chatbot_orchestrator.call_bedrock_for_chat(prompt, model_router.CHAT_MODELS['standard']))
+    if name == 'extract':
+        prompt = chatbot_orchestrator.build_extraction_prompt(case, version)
+        return prompt, 'error' not in chatbot_orchestrator.extract_with_model(prompt, model_router.CLASSIFY_MODELS['standard'])
+    if name == 'classify':
+        age_group, symptoms, urgency = case
+        prompt = chatbot_orchestrator.build_classification_prompt(symptoms, age_group, urgency, version)
+        try:
+            chatbot_orchestrator.classify_with_model(prompt, age_group, model_router.CLASSIFY_MODELS['standard'])
+            return prompt, True
+        except Exception:
+            return prompt, False
+    prompt = chatbot_orchestrator.build_pii_prompt(case, version)
+    return prompt, 'error' not in chatbot_orchestrator.detect_pii_with_bedrock(case, version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prompts', nargs='+', default=list(chatbot_orchestrator.PROMPTS.templates))
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--base-latency', type=float, default=0.05, help='seconds per call before token costs')
+    parser.add_argument('--input-token-ms', type=float, default=0.02, help='stub milliseconds per prompt token')
+    parser.add_argument('--output-token-ms', type=float, default=0.5, help='stub milliseconds per reply token')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    install_fake_bedrock(TokenLatencyBedrock(args.base_latency, args.input_token_ms, args.output_token_ms, jitter=0.0, seed=args.seed))
+    cases = eval_cases(args.limit)
+
+    print(f"{'prompt':<9} {'version':<8} {'template tok':>12} {'prompt tok':>11} {'mean ms':>8} {'p95 ms':>7} {'parsed':>7}")
+    for name in args.prompts:
+        for version, template in chatbot_orchestrator.PROMPTS.templates[name].items():
+            sizes, latencies, parsed = [], [], 0
+            for case in cases[name]:
+                started = time.perf_counter()
+                prompt, ok = run_case(name, version, case)
+                latencies.append((time.perf_counter() - started) * 1000)
+                sizes.append(len(prompt) / CHARS_PER_TOKEN)
+                parsed += ok
+            active = '*' if chatbot_orchestrator.PROMPTS.active[name] == version else ''
+            print(f"{name:<9} {version + active:<8} {template.tokens:12d} {statistics.mean(sizes):11.0f} "
+                  f"{statistics.mean(latencies):8.1f} {percentile(latencies, 0.95):7.1f} {parsed / len(latencies):7.0%}")
+    print("* active version (PROMPT_VERSIONS pins a version, otherwise the highest)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Classification latency and errors when the home Bedrock region degrades: one region vs. the
+latency-aware region pool.
+
+Each region gets its own stub from local_aws.py with its own latency and throttling rate.
+The run has three phases. First all regions are healthy and the home region is the
+fastest. Then the home region slows down by --slowdown and throttles --throttle of its
+calls. Then it recovers. Classify calls go through classify_with_model, and therefore
+invoke_bedrock, with the pool bound either to the home region only or to all regions.
+Circuit breakers and the classification cache are off, so only region selection differs.
+The report shows mean and p95 latency, failed calls and the share of calls each region
+served in every phase. A final check makes the home region throttle every call from the
+start and fails the run if it still gets more than a tenth of the first attempts.
+
+Usage:
+    python benchmarks/region_benchmark.py [--regions us-east-1=0.3 us-west-2=0.45 us-east-2=0.5] [--calls 100]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+import chatbot_orchestrator  # noqa: E402
+import circuit_breaker  # noqa: E402
+import model_router  # noqa: E402
+import region_pool  # noqa: E402
+from local_aws import FakeBedrock  # noqa: E402
+from routing_eval import EVAL_FILE, load_cases, percentile  # noqa: E402
+
+PHASES = ['healthy', 'degraded', 'recovered']
+
+
+def parse_regions(entries):
+    regions = {}
+    for entry in entries:
+        region, _, latency = entry.partition('=')
+        regions[region] = float(latency)
+    return regions
+
+
+def run(cases, stubs, home, regions, calls, slowdown, throttle, seed):
+    """
+    Rows of (phase, latencies in ms, failures, calls per region) for a pool over `regions`
+    """
+    chatbot_orchestrator.bedrock = region_pool.RegionPool(regions, stubs.get, rng=random.Random(seed))
+    base = stubs[home].latency
+    rows = []
+    for phase in PHASES:
+        stubs[home].latency = base * slowdown if phase == 'degraded' else base
+        stubs[home].error_rate = throttle if phase == 'degraded' else 0.0
+        before = {region: stub.calls for region, stub in stubs.items()}
+        latencies, failures = [], 0
+        for index in range(calls):
+            age_group, symptoms, urgency = cases[index % len(cases)]
+            prompt = chatbot_orchestrator.build_classification_prompt(symptoms, age_group, urgency)
+            started = time.perf_counter()
+            try:
+                chatbot_orchestrator.classify_with_model(prompt, age_group, model_router.CLASSIFY_MODELS['standard'])
+            except Exception:
+                failures += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+        served = {region: stub.calls - before[region] for region, stub in stubs.items()}
+        rows.append((phase, latencies, failures, served))
+    return rows
+
+
+def failing_region_calls(cases, stubs, home, calls, seed):
+    """
+    Calls the home region receives over `calls` classifications when it throttles every call
+    """
+    chatbot_orchestrator.bedrock = region_pool.RegionPool(list(stubs), stubs.get, rng=random.Random(seed))
+    stubs[home].error_rate = 1.0
+    for index in range(calls):
+        age_group, symptoms, urgency = cases[index % len(cases)]
+        prompt = chatbot_orchestrator.build_classification_prompt(symptoms, age_group, urgency)
+        try:
+            chatbot_orchestrator.classify_with_model(prompt, age_group, model_router.CLASSIFY_MODELS['standard'])
+        except Exception:
+            pass
+    return stubs[home].calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--regions', nargs='+', default=['us-east-1=0.3', 'us-west-2=0.45', 'us-east-2=0.5'],
+                        metavar='REGION=SECONDS', help='stub latency per region; the first is the home region')
+    parser.add_argument('--calls', type=int, default=100, help='classify calls per phase')
+    parser.add_argument('--slowdown', type=float, default=4.0, help='home region latency multiplier while degraded')
+    parser.add_argument('--throttle', type=float, default=0.2, help='home region throttling rate while degraded')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    circuit_breaker.BREAKER_ENABLED = False
+    latencies = parse_regions(args.regions)
+    home = next(iter(latencies))
+    cases = load_cases(EVAL_FILE, args.calls)
+
+    print(f"home {home}; degraded phase: latency x{args.slowdown:g}, {args.throttle:.0%} throttled; "
+          f"explore rate {region_pool.EXPLORE_RATE:.0%}, EWMA alpha {region_pool.EWMA_ALPHA:g}")
+    print(f"{'pool':<12} {'phase':<10} {'mean ms':>8} {'p95 ms':>8} {'failed':>7}  calls per region")
+    for name, regions in (('home only', [home]), ('all regions', list(latencies))):
+        stubs = {
+            region: FakeBedrock(latency=latency, jitter=0.2, seed=args.seed + index)
+            for index, (region, latency) in enumerate(latencies.items())
+        }
+        for phase, phase_latencies, failures, served in run(
+                cases, stubs, home, regions, args.calls, args.slowdown, args.throttle, args.seed):
+            share = ' '.join(f"{region}={count}" for region, count in served.items() if count)
+            print(f"{name:<12} {phase:<10} {statistics.mean(phase_latencies):8.0f} "
+                  f"{percentile(phase_latencies, 0.95):8.0f} {failures:7d}  {share}")
+
+    # A region that has only ever failed must rank behind the healthy ones, not stay "unmeasured"
+    stubs = {
+        region: FakeBedrock(latency=latency, jitter=0.2, seed=args.seed + index)
+        for index, (region, latency) in enumerate(latencies.items())
+    }
+    home_calls = failing_region_calls(cases, stubs, home, args.calls, args.seed)
+    allowed = 1 + args.calls // 10
+    print(f"always-throttling {home}: {home_calls} of {args.calls} calls (at most {allowed} allowed)")
+    if len(latencies) > 1 and home_calls > allowed:
+        sys.exit(f"FAIL: {home} throttles every call but still got {home_calls} calls")
+
+
+if __name__ == '__main__':
+    main()
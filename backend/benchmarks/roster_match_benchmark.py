@@ -0,0 +1,118 @@
+"""
+Benchmark the indexed `match` lookup against a scan-and-filter baseline on a large
+synthetic volunteer roster.
+
+Usage:
+    python benchmarks/roster_match_benchmark.py [--sizes 1000 10000 100000] [--queries 200]
+
+Runs entirely in memory (see local_aws.py); "items read" is what DynamoDB would bill as
+examined items, which is the number that grows with roster size for a scan.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import specialist_roster  # noqa: E402
+from local_aws import FakeDynamoTable  # noqa: E402
+
+SPECIALTIES = {f"Specialty {i:02d}": [f"Subspecialty {i:02d}-{j}" for j in range(8)] for i in range(30)}
+
+
+def synthetic_specialist(index: int, rng: random.Random) -> dict:
+    specialty = rng.choice(list(SPECIALTIES))
+    max_cases = rng.randint(1, 8)
+    return {
+        'specialistId': f"SPEC-{index:07d}",
+        'name': f"Dr. Volunteer {index}",
+        'specialty': specialty,
+        'subspecialties': rng.sample(SPECIALTIES[specialty], rng.randint(1, 3)),
+        'ageGroups': rng.choice([['Adult'], ['Child'], ['Adult', 'Child'], None]),
+        'available': rng.random() > 0.2,
+        'activeCases': rng.randint(0, max_cases),
+        'maxCases': max_cases
+    }
+
+
+def build_roster(size: int, seed: int) -> FakeDynamoTable:
+    rng = random.Random(seed)
+    table = FakeDynamoTable(
+        specialist_roster.roster_table_name, 'specialistId', 'coverage',
+        indexes={specialist_roster.MATCH_INDEX: ('matchKey', 'activeCases')}
+    )
+    entries = []
+    for index in range(size):
+        entries.extend(specialist_roster.build_roster_entries(synthetic_specialist(index, rng)))
+    table.load(entries)
+    return table
+
+
+def scan_candidates(table: FakeDynamoTable, specialty, subspecialty, age_group, limit):
+    """
+    Baseline without the index: scan the whole roster, filter and rank client-side
+    """
+    items = []
+    response = table.scan()
+    items.extend(response['Items'])
+    wanted = {key: rank for rank, (_, keys) in enumerate(specialist_roster.match_levels(specialty, subspecialty, age_group))
+              for key in keys}
+    matches = [item for item in items if item.get('matchKey') in wanted]
+    matches.sort(key=lambda item: (wanted[item['matchKey']], item['activeCases']))
+    seen, ranked = set(), []
+    for item in matches:
+        if item['specialistId'] not in seen:
+            seen.add(item['specialistId'])
+            ranked.append(item)
+    return ranked[:limit]
+
+
+def measure(table, queries, lookup):
+    table.read_units = 0
+    timings = []
+    for specialty, subspecialty, age_group in queries:
+        started = time.perf_counter()
+        lookup(specialty, subspecialty, age_group)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': statistics.median(timings),
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        'items_read': table.read_units / len(queries)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed + 1)
+    queries = []
+    for _ in range(args.queries):
+        specialty = rng.choice(list(SPECIALTIES))
+        queries.append((specialty, rng.choice(SPECIALTIES[specialty] + [None]), rng.choice(['Adult', 'Child'])))
+
+    print(f"{'roster':>8} {'entries':>9} {'strategy':>8} {'p50 ms':>9} {'p99 ms':>9} {'items read':>11}")
+    for size in args.sizes:
+        table = build_roster(size, args.seed)
+        specialist_roster.roster_table = table
+        scan_queries = queries[:max(1, min(len(queries), 2000000 // max(len(table.items), 1)))]
+        results = {
+            'index': measure(table, queries, lambda s, ss, a: specialist_roster.find_candidates(s, ss, a, args.limit)),
+            'scan': measure(table, scan_queries, lambda s, ss, a: scan_candidates(table, s, ss, a, args.limit))
+        }
+        for strategy, result in results.items():
+            print(f"{size:>8} {len(table.items):>9} {strategy:>8} {result['p50_ms']:>9.3f} "
+                  f"{result['p99_ms']:>9.3f} {result['items_read']:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Offline evaluation of complexity-based model routing on docs/model-eval-data/classify-281.jsonl.
+
+Each eval case (age group, symptoms, urgency) is classified twice: once through
+classify_with_bedrock with routing and escalation, and once on the standard model only,
+which is how every request ran before routing. The report shows the tier mix, escalation
+rate, latency percentiles and estimated model cost per 1000 requests.
+
+By default Bedrock is stubbed. Per-model latencies are configurable, and
+--light-low-confidence sets the fraction of light-tier answers that come back below the
+confidence threshold. With --bedrock the real models are called (AWS credentials
+required). The eval set has no reference labels, so agreement with the standard-only
+answer (specialty and subspecialty) stands in for accuracy.
+
+Usage:
+    python benchmarks/routing_eval.py [--limit 281] [--light-latency 0.35] [--standard-latency 0.9]
+    python benchmarks/routing_eval.py --bedrock --limit 50
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+# EMF metric lines would interleave with the report on stdout
+os.environ.setdefault('METRICS_ENABLED', 'false')
+# Every case should reach the models being compared
+os.environ.setdefault('SEMANTIC_CACHE', 'false')
+
+import chatbot_orchestrator  # noqa: E402
+import model_router  # noqa: E402
+from local_aws import FakeBedrock, FakeStreamingBody  # noqa: E402
+
+EVAL_FILE = os.path.join(BACKEND_DIR, '..', 'docs', 'model-eval-data', 'classify-281.jsonl')
+
+# USD per million (input, output) tokens - check current Bedrock pricing before relying on totals
+DEFAULT_PRICES = {
+    'us.amazon.nova-micro-v1:0': (0.035, 0.14),
+    'us.amazon.nova-2-lite-v1:0': (0.30, 2.50),
+    'us.anthropic.claude-3-5-haiku-20241022-v1:0': (0.80, 4.00)
+}
+CHARS_PER_TOKEN = 4
+
+
+def load_cases(path, limit):
+    cases = []
+    with open(path) as f:
+        for line in f:
+            prompt = json.loads(line)['prompt']
+            fields = dict(re.findall(r'^- (Age Group|Symptoms|Urgency): (.*)$', prompt, re.MULTILINE))
+            cases.append((fields.get('Age Group', 'Adult'), fields.get('Symptoms', ''), fields.get('Urgency', 'medium')))
+    return cases[:limit]
+
+
+class StubBedrock(FakeBedrock):
+    """
+    Classification stub where light-tier answers are below the confidence threshold
+    for a configurable fraction of calls
+    """
+
+    def __init__(self, light_low_confidence: float, **kwargs):
+        super().__init__(**kwargs)
+        self.light_low_confidence = light_low_confidence
+
+    def invoke_model(self, modelId, body, **kwargs):
+        time.sleep(self.delay_for(modelId))
+        with self.lock:
+            low = modelId == model_router.CLASSIFY_MODELS['light'] and self.random.random() < self.light_low_confidence
+        text = json.dumps({
+            'specialty': 'S01', 'subspecialty': 'S01.1',
+            'reasoning': 'IgE-mediated reaction with systemic involvement.', 'confidence': 0.6 if low else 0.9,
+            'urgency_assessment': 'high'
+        })
+        if model_router.model_family(modelId) == 'claude':
+            response = {'content': [{'type': 'text', 'text': text}]}
+        else:
+            response = {'output': {'message': {'role': 'assistant', 'content': [{'text': text}]}}}
+        return {'body': FakeStreamingBody(json.dumps(response).encode('utf-8'))}
+
+
+class MeteredBedrock:
+    """
+    Wraps a Bedrock client and records (model, prompt chars, reply chars) per call
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def invoke_model(self, modelId, body, **kwargs):
+        response = self.client.invoke_model(modelId=modelId, body=body, **kwargs)
+        raw = response['body'].read()
+        reply = model_router.response_text(json.loads(raw))
+        with self.lock:
+            self.calls.append((modelId, len(body), len(reply)))
+        return {'body': FakeStreamingBody(raw)}
+
+    def cost(self, prices):
+        total = 0.0
+        for model_id, prompt_chars, reply_chars in self.calls:
+            input_price, output_price = prices.get(model_id, (0.0, 0.0))
+            total += (prompt_chars * input_price + reply_chars * output_price) / CHARS_PER_TOKEN / 1e6
+        return total
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(cases, client, routed, prices):
+    metered = MeteredBedrock(client)
+    chatbot_orchestrator.bedrock = metered
+    latencies, results = [], []
+    for age_group, symptoms, urgency in cases:
+        started = time.perf_counter()
+        if routed:
+            result = chatbot_orchestrator.classify_with_bedrock(symptoms, age_group, urgency)
+        else:
+            prompt = chatbot_orchestrator.build_classification_prompt(symptoms, age_group, urgency)
+            result = chatbot_orchestrator.classify_with_model(prompt, age_group, model_router.CLASSIFY_MODELS['standard'])
+            result['modelTier'], result['escalated'] = 'standard', False
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append(result)
+    return latencies, results, metered.cost(prices) / len(cases) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--limit', type=int, default=281)
+    parser.add_argument('--bedrock', action='store_true', help='call the real models instead of the stub')
+    parser.add_argument('--light-latency', type=float, default=0.35)
+    parser.add_argument('--standard-latency', type=float, default=0.9)
+    parser.add_argument('--light-low-confidence', type=float, default=0.15)
+    parser.add_argument('--price', action='append', default=[], metavar='MODEL=IN/OUT',
+                        help='override USD per million input/output tokens for a model')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    prices = dict(DEFAULT_PRICES)
+    for entry in args.price:
+        model_id, _, rates = entry.partition('=')
+        input_price, _, output_price = rates.partition('/')
+        prices[model_id] = (float(input_price), float(output_price))
+
+    cases = load_cases(EVAL_FILE, args.limit)
+    if args.bedrock:
+        import boto3
+        client = boto3.client('bedrock-runtime', region_name=os.environ.get('BEDROCK_REGION'))
+    else:
+        random.seed(args.seed)
+        client = StubBedrock(
+            args.light_low_confidence,
+            jitter=0.2,
+            model_latency={
+                model_router.CLASSIFY_MODELS['light']: args.light_latency,
+                model_router.CLASSIFY_MODELS['standard']: args.standard_latency
+            },
+            seed=args.seed
+        )
+
+    tiers = [model_router.route_classification(symptoms, age_group, urgency)[0] for age_group, symptoms, urgency in cases]
+    print(f"{len(cases)} cases, routed to light tier: {tiers.count('light')} ({tiers.count('light') / len(cases):.0%})")
+
+    baseline_latencies, baseline, baseline_cost = run(cases, client, False, prices)
+    routed_latencies, routed, routed_cost = run(cases, client, True, prices)
+
+    escalated = sum(1 for result in routed if result.get('escalated'))
+    agree = sum(
+        1 for a, b in zip(routed, baseline)
+        if (a.get('specialty'), a.get('subspecialty')) == (b.get('specialty'), b.get('subspecialty'))
+    )
+
+    print(f"{'mode':<15} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'$/1k req':>9}")
+    for name, latencies, cost in [('standard only', baseline_latencies, baseline_cost), ('routed', routed_latencies, routed_cost)]:
+        print(f"{name:<15} {statistics.mean(latencies):8.0f} {percentile(latencies, 0.5):8.0f} "
+              f"{percentile(latencies, 0.95):8.0f} {cost:9.4f}")
+    print(f"escalated: {escalated} ({escalated / len(cases):.0%}), "
+          f"agreement with standard-only answer: {agree / len(cases):.1%}")
+
+
+if __name__ == '__main__':
+    main()
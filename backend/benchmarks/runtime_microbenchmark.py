@@ -0,0 +1,134 @@
+"""
+Microbenchmark the per-invocation cost of building API responses.
+
+Compares the original per-module create_response (re-reads and re-splits
+ALLOWED_ORIGINS, logs, copies items through convert_decimals, then json.dumps)
+with msm_runtime.create_response using the stdlib encoder and, when installed,
+the orjson backend.
+
+Usage:
+    python benchmarks/runtime_microbenchmark.py [--iterations 2000]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'layers', 'runtime', 'python'))
+os.environ.setdefault('ALLOWED_ORIGINS', 'https://main.example.amplifyapp.com,http://localhost:3000')
+
+import msm_runtime  # noqa: E402
+from msm_runtime import json_codec  # noqa: E402
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.NullHandler())
+ORIGIN = 'http://localhost:3000'
+
+
+def legacy_convert_decimals(obj):
+    if isinstance(obj, list):
+        return [legacy_convert_decimals(item) for item in obj]
+    elif isinstance(obj, dict):
+        return {key: legacy_convert_decimals(value) for key, value in obj.items()}
+    elif isinstance(obj, Decimal):
+        return float(obj)
+    return obj
+
+
+def legacy_create_response(status_code, body, request_origin=None):
+    allowed_origins_str = os.environ.get('ALLOWED_ORIGINS', 'http://localhost:3000')
+    allowed_origins = [origin.strip() for origin in allowed_origins_str.split(',')]
+    if request_origin and request_origin in allowed_origins:
+        origin = request_origin
+        logger.info(f"CORS: Allowing origin {origin}")
+    else:
+        origin = allowed_origins[0]
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': origin,
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Methods': 'OPTIONS,POST,GET',
+            'Vary': 'Origin'
+        },
+        'body': json.dumps(body)
+    }
+
+
+def stdlib_create_response(status_code, body, request_origin=None):
+    return {
+        'statusCode': status_code,
+        'headers': msm_runtime.cors_policy.headers(request_origin),
+        'body': STDLIB_ENCODER.encode(body)
+    }
+
+
+STDLIB_ENCODER = json.JSONEncoder(default=json_codec.encode_default)
+
+
+def stored_request(index):
+    return {
+        'id': f"REQ-20260115123045-{index:06d}",
+        'doctorName': 'Dr. Sarah Johnson',
+        'hospital': 'Community Health Clinic',
+        'location': 'Rural Kenya',
+        'email': 'dr.johnson@clinic.org',
+        'ageGroup': 'Child',
+        'symptoms': 'Child with shattered hip from fall down stairs, severe pain, unable to bear weight, no other injuries',
+        'urgency': 'high',
+        'specialty': 'Orthopaedic Surgeon',
+        'subspecialty': 'Pediatric Orthopaedic Surgery',
+        'reasoning': 'Child with traumatic hip fracture requires specialized pediatric orthopedic care ' * 3,
+        'confidence': Decimal('0.95'),
+        'activeCases': Decimal(2),
+        'createdAt': '2026-01-15T12:30:45.789456'
+    }
+
+
+PAYLOADS = {
+    'chat turn': {
+        'response': 'How long has the child had these symptoms, and is there any fever? ' * 4,
+        'source': 'bedrock',
+        'canClassify': False,
+        'extractedData': {'ageGroup': 'Child', 'symptoms': 'Child with rash', 'urgency': 'medium', 'confidence': 0.55}
+    },
+    'get (1 item)': {'success': True, 'request': stored_request(0)},
+    'list (100 items)': {'success': True, 'requests': [stored_request(i) for i in range(100)], 'count': 100}
+}
+
+
+def legacy_path(body):
+    # Handlers converted Decimals before building the response
+    return legacy_create_response(200, legacy_convert_decimals(body), ORIGIN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    variants = {
+        'legacy': legacy_path,
+        'runtime/json': lambda body: stdlib_create_response(200, body, ORIGIN)
+    }
+    if msm_runtime.JSON_BACKEND == 'orjson':
+        variants['runtime/orjson'] = lambda body: msm_runtime.create_response(200, body, ORIGIN)
+    else:
+        print('orjson not installed - skipping the orjson backend')
+
+    print(f"{'payload':<18} {'variant':<16} {'us/response':>12} {'saving':>8}")
+    for name, body in PAYLOADS.items():
+        baseline = None
+        for variant, build in variants.items():
+            seconds = min(timeit.repeat(lambda: build(body), number=args.iterations, repeat=5)) / args.iterations
+            baseline = baseline or seconds
+            print(f"{name:<18} {variant:<16} {seconds * 1e6:>12.1f} {100 * (1 - seconds / baseline):>7.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Offline evaluation of the semantic classification cache on docs/model-eval-data/classify-281.jsonl.
+
+Every eval case is stored in a fresh cache with a reference label. Paraphrased variants of
+each case are then looked up: findings are reordered, the case lead-in is rephrased,
+common clinical synonyms are substituted, and optionally one finding is dropped. The
+original cases themselves are also looked up leave-one-out, to catch hits on a
+*different* case. For each similarity threshold the report shows the hit rate and hit
+accuracy, plus the lookup latency of the NumPy and pure-Python paths.
+
+By default each case's label is its own index, so a hit is counted as correct only when
+it returns the case it was paraphrased from. The eval set has near-duplicate cases (the
+same presentation with one extra finding), so this is a strict lower bound on accuracy.
+With --bedrock the label is the (specialty, subspecialty) that the standard model
+returns for the case (AWS credentials required), so a hit on a different case with the
+same answer counts as correct.
+
+Usage:
+    python benchmarks/semantic_cache_eval.py [--thresholds 0.9 0.95 0.97 0.99]
+    python benchmarks/semantic_cache_eval.py --bedrock
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+
+import classification_cache  # noqa: E402
+from routing_eval import EVAL_FILE, load_cases  # noqa: E402
+
+SYNONYMS = {
+    'severe': 'significant',
+    'history of': 'hx of',
+    'shortness of breath': 'dyspnea',
+    'difficulty breathing': 'trouble breathing',
+    'chest pain': 'chest discomfort',
+    'abdominal pain': 'belly pain',
+    'fever': 'pyrexia',
+    'rash': 'skin eruption',
+    'swelling': 'edema',
+    'vomiting': 'emesis'
+}
+LEADS = {
+    'Adult with ': ['Adult patient presenting with ', 'Grown-up patient with ', 'An adult who has '],
+    'Child with ': ['Pediatric patient with ', 'Young child presenting with ', 'A child who has ']
+}
+
+
+def paraphrases(symptoms, rng, drop_finding):
+    """
+    Variants of a case description that should classify the same way
+    """
+    lead = next((prefix for prefix in LEADS if symptoms.startswith(prefix)), '')
+    findings = [part.strip() for part in symptoms[len(lead):].split(',') if part.strip()]
+
+    reordered = findings[:]
+    rng.shuffle(reordered)
+    variants = [lead + ', '.join(reordered)]
+
+    if lead:
+        variants.append(rng.choice(LEADS[lead]) + ', '.join(findings))
+
+    substituted = symptoms
+    for term, synonym in SYNONYMS.items():
+        substituted = substituted.replace(term, synonym)
+    if substituted != symptoms:
+        variants.append(substituted)
+
+    if drop_finding and len(findings) >= 4:
+        kept = findings[:]
+        kept.pop(rng.randrange(1, len(kept)))
+        variants.append(lead + ', '.join(kept))
+    return variants
+
+
+def bedrock_labels(cases):
+    import chatbot_orchestrator
+    import model_router
+    labels = []
+    for age_group, symptoms, urgency in cases:
+        prompt = chatbot_orchestrator.build_classification_prompt(symptoms, age_group, urgency)
+        result = chatbot_orchestrator.classify_with_model(prompt, age_group, model_router.CLASSIFY_MODELS['standard'])
+        labels.append((result.get('specialty'), result.get('subspecialty')))
+    return labels
+
+
+def evaluate(cases, labels, queries, threshold):
+    cache = classification_cache.SemanticCache(capacity=len(cases), threshold=threshold)
+    for index, (age_group, symptoms, urgency) in enumerate(cases):
+        cache.store(symptoms, classification_cache.cache_group(age_group, urgency), {'label': index})
+
+    hits = correct = 0
+    for source, text, group, exclude_self in queries:
+        if exclude_self:
+            # Leave-one-out: hide the case itself so only other cases can answer
+            slot, similarity = nearest_excluding(cache, cache.embed(text), group, source)
+            found = (cache.results[slot], similarity) if slot >= 0 and similarity >= threshold else None
+        else:
+            found = cache.lookup(text, group)
+        if found is None:
+            continue
+        hits += 1
+        if labels[found[0]['label']] == labels[source]:
+            correct += 1
+    return hits, correct
+
+
+def nearest_excluding(cache, vector, group, excluded):
+    best, best_similarity = -1, -1.0
+    for slot in range(cache.size):
+        if slot == excluded:
+            continue
+        stored = cache.matrix[slot] if classification_cache.np is not None else cache.vectors[slot]
+        if classification_cache.np is not None:
+            similarity = float(stored @ vector)
+        else:
+            similarity = sum(value * stored.get(index, 0.0) for index, value in vector.items())
+        code = cache.group_codes.get(group)
+        if cache.codes[slot] == code and similarity > best_similarity:
+            best, best_similarity = slot, similarity
+    return best, best_similarity
+
+
+def lookup_latency(cases, capacity, iterations):
+    cache = classification_cache.SemanticCache(capacity=capacity)
+    for index in range(capacity):
+        age_group, symptoms, urgency = cases[index % len(cases)]
+        cache.store(f"{symptoms} {index}", classification_cache.cache_group(age_group, urgency), {'label': index})
+    age_group, symptoms, urgency = cases[0]
+    group = classification_cache.cache_group(age_group, urgency)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        cache.lookup(symptoms, group)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.85, 0.9, 0.92, 0.95, 0.97, 0.99])
+    parser.add_argument('--no-drop', action='store_true', help='do not generate variants with a finding removed')
+    parser.add_argument('--bedrock', action='store_true', help='label cases with the standard model instead of case identity')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # The eval file repeats some cases, verbatim or with only punctuation changed
+    # ("workers compensation" / "workers' compensation"); keep one copy of each
+    cases = list({
+        (age_group, ' '.join(classification_cache.WORD_PATTERN.findall(symptoms.lower())), urgency):
+            (age_group, symptoms, urgency)
+        for age_group, symptoms, urgency in load_cases(EVAL_FILE, None)
+    }.values())
+    labels = bedrock_labels(cases) if args.bedrock else list(range(len(cases)))
+
+    rng = random.Random(args.seed)
+    paraphrase_queries, distinct_queries = [], []
+    for index, (age_group, symptoms, urgency) in enumerate(cases):
+        group = classification_cache.cache_group(age_group, urgency)
+        for variant in paraphrases(symptoms, rng, not args.no_drop):
+            paraphrase_queries.append((index, variant, group, False))
+        distinct_queries.append((index, symptoms, group, True))
+
+    print(f"{len(cases)} cases, {len(paraphrase_queries)} paraphrases, labels: {'bedrock' if args.bedrock else 'case identity'}")
+    print(f"{'threshold':>9} {'para hit':>9} {'para acc':>9} {'other hit':>10} {'other acc':>10}")
+    for threshold in args.thresholds:
+        hits, correct = evaluate(cases, labels, paraphrase_queries, threshold)
+        other_hits, other_correct = evaluate(cases, labels, distinct_queries, threshold)
+        print(f"{threshold:9.2f} {hits / len(paraphrase_queries):9.1%} {(correct / hits if hits else 1):9.1%} "
+              f"{other_hits / len(distinct_queries):10.1%} {(other_correct / other_hits if other_hits else 1):10.1%}")
+
+    numpy_module = classification_cache.np
+    for capacity in (128, 512, 2048):
+        timings = []
+        if numpy_module is not None:
+            timings.append(f"numpy {lookup_latency(cases, capacity, 200):.0f}us")
+        classification_cache.np = None
+        timings.append(f"python {lookup_latency(cases, capacity, 20):.0f}us")
+        classification_cache.np = numpy_module
+        print(f"lookup at {capacity} entries: {', '.join(timings)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Prompt and reply size of the coded specialty catalogue vs. the original bulleted listing.
+
+Rebuilds the classification prompt for every case in classify-281, the extraction prompt
+for every conversation in extract-92 and the chat context for every conversation in
+chat-100 twice: once as the orchestrator builds it now (coded catalogue, code answers)
+and once with the original bulleted name listing and name answers. Reply size is measured
+on the JSON the model returns for every (specialty, subspecialty) pair. Tokens are
+estimated at 4 characters per token, as in routing_eval.py.
+
+Also times decoding a reply: the O(1) code lookup vs. the original substring matching
+against every listed name, for exact names and for names the model paraphrased.
+
+Usage:
+    python benchmarks/specialty_token_report.py [--iterations 20000]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+
+import chatbot_orchestrator  # noqa: E402
+from chatbot_orchestrator import MEDICAL_SPECIALTIES, PEDIATRICIAN_CODE, SPECIALTY_CATALOGUE  # noqa: E402
+from routing_eval import CHARS_PER_TOKEN, EVAL_FILE, load_cases  # noqa: E402
+
+EVAL_DIR = os.path.dirname(EVAL_FILE)
+TURN_PATTERN = re.compile(r'^(Doctor|Assistant): (.*)$', re.MULTILINE)
+
+
+def legacy_listing(brackets):
+    lines = []
+    for specialty, subspecialties in MEDICAL_SPECIALTIES.items():
+        lines.append(f"- {specialty} [" if brackets else f"- {specialty}")
+        for subspecialty in subspecialties:
+            lines.append(f"  • {subspecialty}")
+        if brackets:
+            lines.append("]")
+    return "\n".join(lines)
+
+
+# (current text, original text) pairs that turn a current prompt back into the original one
+CODED_LISTING = 'Available Medical Specialties and Subspecialties (code, name, numbered subspecialties):\n' + SPECIALTY_CATALOGUE.coded_listing
+LEGACY = {
+    'classify': [
+        (CODED_LISTING, 'Available Medical Specialties and Subspecialties:\n' + legacy_listing(True)),
+        ('1. Identify the PRIMARY specialty code (e.g. "S05") that best matches this case',
+         '1. Identify the PRIMARY specialty that best matches this case'),
+        ('2. Provide a SPECIFIC subspecialty code (e.g. "S05.2") from the list above when applicable',
+         '2. Provide a SPECIFIC subspecialty from the list above when applicable'),
+        (f'PRIMARY="{PEDIATRICIAN_CODE}", SUBSPECIALTY=the matching "{PEDIATRICIAN_CODE}.n" pediatric area',
+         'PRIMARY="Pediatrician", SUBSPECIALTY="Pediatric [appropriate area]"'),
+        ('"specialty": "Sxx",\n    "subspecialty": "Sxx.n" or null,',
+         '"specialty": "PRIMARY Specialty Name",\n    "subspecialty": "SPECIFIC Subspecialty Name" or null,')
+    ],
+    'extract': [
+        (CODED_LISTING, 'Available Medical Specialties and Subspecialties:\n' + legacy_listing(False)),
+        ('- PRIMARY specialty code from the list above (e.g. "S05")', '- PRIMARY specialty from the list above'),
+        ('- SPECIFIC subspecialty code from the list above (e.g. "S05.2")', '- SPECIFIC subspecialty from the list above'),
+        (f'PRIMARY="{PEDIATRICIAN_CODE}", SUBSPECIALTY=the matching "{PEDIATRICIAN_CODE}.n" pediatric area',
+         'PRIMARY="Pediatrician", SUBSPECIALTY="Pediatric [appropriate area]"'),
+        ('"specialty": "Sxx",\n        "subspecialty": "Sxx.n",',
+         '"specialty": "PRIMARY Specialty Name",\n        "subspecialty": "SPECIFIC Subspecialty Name",')
+    ],
+    'chat': [
+        (SPECIALTY_CATALOGUE.named_listing, legacy_listing(True))
+    ]
+}
+
+
+def legacy_prompt(kind, prompt):
+    for current, original in LEGACY[kind]:
+        if current not in prompt:
+            raise SystemExit(f"{kind} prompt no longer contains {current[:60]!r} - update LEGACY")
+        prompt = prompt.replace(current, original)
+    return prompt
+
+
+def conversations(name):
+    with open(os.path.join(EVAL_DIR, name)) as f:
+        for line in f:
+            prompt = json.loads(line)['prompt']
+            turns = TURN_PATTERN.findall(prompt)
+            yield [{'sender': 'user' if role == 'Doctor' else 'assistant', 'text': text} for role, text in turns]
+
+
+def prompt_pairs():
+    pairs = {'classify': [], 'extract': [], 'chat': []}
+    for age_group, symptoms, urgency in load_cases(EVAL_FILE, None):
+        prompt = chatbot_orchestrator.build_classification_prompt(symptoms, age_group, urgency)
+        pairs['classify'].append((legacy_prompt('classify', prompt), prompt))
+    for history in conversations('extract-92.jsonl'):
+        prompt = chatbot_orchestrator.build_extraction_prompt(history)
+        pairs['extract'].append((legacy_prompt('extract', prompt), prompt))
+    for history in conversations('chat-100.jsonl'):
+        if history and history[-1]['sender'] == 'user':
+            prompt = chatbot_orchestrator.build_conversation_context(history[:-1], history[-1]['text'])
+            pairs['chat'].append((legacy_prompt('chat', prompt), prompt))
+    return pairs
+
+
+def reply_pairs():
+    pairs = []
+    for code, specialty in SPECIALTY_CATALOGUE.specialty_by_code.items():
+        subspecialties = [(f"{code}.{position}", name) for position, name in enumerate(MEDICAL_SPECIALTIES[specialty], start=1)]
+        for sub_code, subspecialty in subspecialties or [(None, None)]:
+            named = json.dumps({'specialty': specialty, 'subspecialty': subspecialty})
+            coded = json.dumps({'specialty': code, 'subspecialty': sub_code})
+            pairs.append((named, coded))
+    return pairs
+
+
+def legacy_validate(classification, age_group):
+    """
+    The substring matching the orchestrator ran on every reply before codes
+    """
+    if classification['specialty'] not in MEDICAL_SPECIALTIES:
+        for specialty in MEDICAL_SPECIALTIES.keys():
+            if specialty.lower() in classification['specialty'].lower():
+                classification['specialty'] = specialty
+                break
+        else:
+            classification['specialty'] = 'Pediatrician' if age_group == 'Child' else 'Internist'
+    if classification.get('subspecialty') and classification['subspecialty'] != 'null':
+        available_subspecialties = MEDICAL_SPECIALTIES[classification['specialty']]
+        subspecialty = classification['subspecialty']
+        if subspecialty not in available_subspecialties:
+            for available_sub in available_subspecialties:
+                if (subspecialty.lower() in available_sub.lower() or
+                        available_sub.lower() in subspecialty.lower()):
+                    classification['subspecialty'] = available_sub
+                    break
+    else:
+        classification['subspecialty'] = None
+    return classification
+
+
+def time_per_call(function, replies, iterations):
+    started = time.perf_counter()
+    for index in range(iterations):
+        function(dict(replies[index % len(replies)]), 'Adult')
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+    chatbot_orchestrator.log_event = lambda *a, **k: None
+
+    print(f"{'prompt':<10} {'cases':>6} {'legacy tok':>11} {'coded tok':>10} {'delta':>8}")
+    for kind, pairs in prompt_pairs().items():
+        legacy = statistics.mean(len(old) for old, _ in pairs) / CHARS_PER_TOKEN
+        coded = statistics.mean(len(new) for _, new in pairs) / CHARS_PER_TOKEN
+        print(f"{kind:<10} {len(pairs):6d} {legacy:11.0f} {coded:10.0f} {(coded - legacy) / legacy:8.1%}")
+
+    replies = reply_pairs()
+    named = statistics.mean(len(old) for old, _ in replies) / CHARS_PER_TOKEN
+    coded = statistics.mean(len(new) for _, new in replies) / CHARS_PER_TOKEN
+    print(f"{'reply':<10} {len(replies):6d} {named:11.1f} {coded:10.1f} {(coded - named) / named:8.1%}"
+          f"  (specialty/subspecialty fields only)")
+
+    exact = [json.loads(old) for old, _ in replies]
+    paraphrased = [{'specialty': r['specialty'].lower(), 'subspecialty': r['subspecialty'] and r['subspecialty'].split(' (')[0].lower()}
+                   for r in exact]
+    codes = [json.loads(new) for _, new in replies]
+    decode = lambda reply, age_group: chatbot_orchestrator.decode_classification(reply, age_group, 'classify')  # noqa: E731
+    print(f"decode per reply: codes {time_per_call(decode, codes, args.iterations):.2f}us, "
+          f"legacy exact names {time_per_call(legacy_validate, exact, args.iterations):.2f}us, "
+          f"legacy paraphrased names {time_per_call(legacy_validate, paraphrased, args.iterations):.2f}us")
+
+
+if __name__ == '__main__':
+    main()
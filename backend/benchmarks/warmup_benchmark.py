@@ -0,0 +1,153 @@
+"""
+First-request latency of a fresh container, with and without the warm action.
+
+Each trial starts a new Python process as a stand-in for a new Lambda container. The
+process imports both handlers and runs against the in-memory stand-ins in local_aws.py.
+Those stand-ins are wrapped in a connection pool that charges a handshake delay whenever
+a call finds no idle connection, the way the first TLS connection to Bedrock or DynamoDB
+does. Each client gets its own pool: Bedrock, the data handler's DynamoDB client, the
+symptom index and the roster. In "warm" trials the process first sends the warm action
+to each handler. It then sends one review request (PII check and classification) and one
+submit request, followed by a second identical pair for steady-state comparison. The
+report shows medians over the trials: module init time, warm action time, and first and
+second request latency per handler.
+
+Usage:
+    python benchmarks/warmup_benchmark.py [--trials 5] [--handshake 0.15] [--bedrock-latency 0.2]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'layers', 'runtime', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('BEDROCK_REGION', 'us-east-1')
+os.environ.setdefault('METRICS_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+SYMPTOMS = 'Adult with severe allergic reaction, anaphylaxis, hypotension, urticaria, angioedema'
+SUBMIT = {'doctorName': 'Dr. Warm', 'email': 'warm@example.org', 'ageGroup': 'Adult', 'symptoms': SYMPTOMS,
+          'urgency': 'high', 'specialty': 'Allergy and Immunology', 'subspecialty': 'Allergist-Immunologist (Internist)'}
+
+
+class ConnectionPool:
+    """
+    Idle connections shared by one client; a call with none idle pays the handshake
+    """
+
+    def __init__(self, handshake: float):
+        self.handshake = handshake
+        self.idle = 0
+        self.lock = threading.Lock()
+
+    def call(self, method, *args, **kwargs):
+        with self.lock:
+            reuse = self.idle > 0
+            if reuse:
+                self.idle -= 1
+        if not reuse:
+            time.sleep(self.handshake)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.idle += 1
+
+
+class Pooled:
+    """
+    Proxy that routes every method call of the wrapped client or table through a pool
+    """
+
+    def __init__(self, target, pool: ConnectionPool):
+        self.target = target
+        self.pool = pool
+
+    def __getattr__(self, name):
+        attribute = getattr(self.target, name)
+        if not callable(attribute):
+            return attribute
+        return lambda *args, **kwargs: self.pool.call(attribute, *args, **kwargs)
+
+
+def timed(handler, path, action, data):
+    from load_test import api_gateway_event
+    started = time.perf_counter()
+    response = handler(api_gateway_event(path, action, data), None)
+    elapsed = (time.perf_counter() - started) * 1000
+    if response['statusCode'] != 200:
+        raise RuntimeError(f"{action} returned {response['statusCode']}: {response['body']}")
+    return elapsed
+
+
+def trial(warm, handshake, bedrock_latency, dynamo_latency):
+    """
+    One fresh-process trial; prints its measurements as one JSON line
+    """
+    started = time.perf_counter()
+    import chatbot_orchestrator
+    import data_handler
+    import specialist_roster
+    import symptom_index
+    init_ms = (time.perf_counter() - started) * 1000
+
+    from local_aws import FakeBedrock, install_fake_bedrock, install_fake_dynamodb
+    install_fake_bedrock(Pooled(FakeBedrock(latency=bedrock_latency, jitter=0.0), ConnectionPool(handshake)))
+    install_fake_dynamodb(dynamo_latency)
+    data_pool = ConnectionPool(handshake)
+    data_handler.table = Pooled(data_handler.table, data_pool)
+    data_handler.stats_table = Pooled(data_handler.stats_table, data_pool)
+    symptom_index.index_table = Pooled(symptom_index.index_table, ConnectionPool(handshake))
+    specialist_roster.roster_table = Pooled(specialist_roster.roster_table, ConnectionPool(handshake))
+
+    result = {'initMs': init_ms, 'chatbotWarmMs': 0.0, 'dataWarmMs': 0.0}
+    if warm:
+        result['chatbotWarmMs'] = timed(chatbot_orchestrator.lambda_handler, '/chatbot', 'warm', {'connections': 2})
+        result['dataWarmMs'] = timed(data_handler.lambda_handler, '/data', 'warm', {'connections': symptom_index.DF_UPDATE_WORKERS})
+    review = {'symptoms': SYMPTOMS, 'ageGroup': 'Adult', 'urgency': 'high'}
+    for attempt in ('first', 'second'):
+        result[f'{attempt}ChatbotMs'] = timed(chatbot_orchestrator.lambda_handler, '/chatbot', 'review', review)
+        result[f'{attempt}DataMs'] = timed(data_handler.lambda_handler, '/data', 'submit', SUBMIT)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--handshake', type=float, default=0.15, help='seconds to open a new connection')
+    parser.add_argument('--bedrock-latency', type=float, default=0.2)
+    parser.add_argument('--dynamo-latency', type=float, default=0.005)
+    parser.add_argument('--trial', choices=['cold', 'warm'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.trial:
+        trial(args.trial == 'warm', args.handshake, args.bedrock_latency, args.dynamo_latency)
+        return
+
+    print(f"{args.trials} fresh processes per mode; handshake {args.handshake * 1000:.0f} ms, "
+          f"Bedrock {args.bedrock_latency * 1000:.0f} ms, DynamoDB {args.dynamo_latency * 1000:.0f} ms")
+    print(f"{'mode':<5} {'handler':<8} {'init ms':>8} {'warm ms':>8} {'1st req ms':>11} {'2nd req ms':>11}")
+    for mode in ('cold', 'warm'):
+        runs = []
+        for _ in range(args.trials):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--trial', mode, '--handshake', str(args.handshake),
+                 '--bedrock-latency', str(args.bedrock_latency), '--dynamo-latency', str(args.dynamo_latency)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        for handler, prefix in (('chatbot', 'Chatbot'), ('data', 'Data')):
+            print(f"{mode:<5} {handler:<8} {median['initMs']:8.0f} {median[handler + 'WarmMs']:8.0f} "
+                  f"{median['first' + prefix + 'Ms']:11.0f} {median['second' + prefix + 'Ms']:11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+# Per-model circuit breakers, local to the container. A breaker opens when, over the last
+# WINDOW_SECONDS, at least MIN_CALLS calls were made and the failure rate or the slow-call
+# rate reached its threshold. While open, calls fail immediately with CircuitOpenError.
+# After OPEN_SECONDS one probe call is let through (half-open): success closes the breaker,
+# failure opens it again for another OPEN_SECONDS.
+BREAKER_ENABLED = os.environ.get('CIRCUIT_BREAKER', 'true').lower() in ('1', 'true', 'yes')
+WINDOW_SECONDS = float(os.environ.get('BREAKER_WINDOW_SECONDS', '60'))
+MIN_CALLS = int(os.environ.get('BREAKER_MIN_CALLS', '5'))
+FAILURE_RATE = float(os.environ.get('BREAKER_FAILURE_RATE', '0.5'))
+SLOW_CALL_SECONDS = float(os.environ.get('BREAKER_SLOW_CALL_SECONDS', '10'))
+SLOW_CALL_RATE = float(os.environ.get('BREAKER_SLOW_CALL_RATE', '0.8'))
+OPEN_SECONDS = float(os.environ.get('BREAKER_OPEN_SECONDS', '30'))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Errors that say nothing about the model's health: the request itself was wrong
+CALLER_ERRORS = frozenset({'ValidationException', 'AccessDeniedException', 'ResourceNotFoundException'})
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a model whose breaker is open
+    """
+
+    def __init__(self, model_id: str, retry_after: float):
+        super().__init__(f"Circuit open for {model_id}; retry in {retry_after:.0f}s")
+        self.model_id = model_id
+        self.retry_after = retry_after
+
+
+def is_caller_error(error: Exception) -> bool:
+    """
+    Whether a failed call still shows the model answering (botocore ClientError codes)
+    """
+    response = getattr(error, 'response', None)
+    return isinstance(response, dict) and response.get('Error', {}).get('Code') in CALLER_ERRORS
+
+
+class CircuitBreaker:
+    """
+    Rolling-window failure and latency breaker with half-open probing
+    """
+
+    def __init__(self, name: str, on_transition: Optional[Callable[[str, str, str], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.on_transition = on_transition
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        # (finished at, failed, slow)
+        self.calls: Deque[Tuple[float, bool, bool]] = deque()
+
+    def transition(self, state: str) -> None:
+        previous, self.state = self.state, state
+        if state == OPEN:
+            self.opened_at = self.clock()
+        if state != HALF_OPEN:
+            self.probing = False
+        if state == CLOSED:
+            self.calls.clear()
+        if self.on_transition and previous != state:
+            self.on_transition(self.name, previous, state)
+
+    def before_call(self) -> None:
+        """
+        Raise CircuitOpenError unless a call may go through now
+        """
+        if not BREAKER_ENABLED:
+            return
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN:
+                remaining = self.opened_at + OPEN_SECONDS - self.clock()
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                self.transition(HALF_OPEN)
+            # Half-open: exactly one probe at a time
+            if self.probing:
+                raise CircuitOpenError(self.name, OPEN_SECONDS)
+            self.probing = True
+
+    def record(self, failed: bool, seconds: float) -> None:
+        if not BREAKER_ENABLED:
+            return
+        now = self.clock()
+        slow = seconds >= SLOW_CALL_SECONDS
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.transition(OPEN if failed or slow else CLOSED)
+                return
+            if self.state == OPEN:
+                return
+            self.calls.append((now, failed, slow))
+            while self.calls and self.calls[0][0] < now - WINDOW_SECONDS:
+                self.calls.popleft()
+            total = len(self.calls)
+            if total < MIN_CALLS:
+                return
+            failures = sum(1 for _, call_failed, _ in self.calls if call_failed)
+            slow_calls = sum(1 for _, _, call_slow in self.calls if call_slow)
+            if failures / total >= FAILURE_RATE or slow_calls / total >= SLOW_CALL_RATE:
+                self.transition(OPEN)
+
+    def is_open(self) -> bool:
+        """
+        Whether a call right now would be refused
+        """
+        if not BREAKER_ENABLED:
+            return False
+        with self.lock:
+            if self.state == OPEN:
+                return self.clock() < self.opened_at + OPEN_SECONDS
+            return self.state == HALF_OPEN and self.probing
+
+
+class BreakerRegistry:
+    """
+    One breaker per model ID, created on first use
+    """
+
+    def __init__(self, on_transition: Optional[Callable[[str, str, str], None]] = None):
+        self.on_transition = on_transition
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            with self.lock:
+                breaker = self.breakers.setdefault(name, CircuitBreaker(name, self.on_transition))
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        return {name: breaker.state for name, breaker in self.breakers.items()}
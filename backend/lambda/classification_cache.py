@@ -0,0 +1,172 @@
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+import model_router
+
+try:
+    import numpy as np
+except ImportError:  # Optional - bundle numpy in the deployment package for vectorised lookups
+    np = None
+
+# Container-local nearest-neighbour cache of classify results. Symptom texts are embedded as
+# signed feature-hashed word and character-trigram counts, so paraphrases ("adult with
+# anaphylaxis and urticaria" / "urticaria, anaphylaxis in an adult") land close together.
+# A hit needs the same age group, urgency, classify prompt version and model tier, and a cosine
+# similarity at or above the threshold. Off unless enabled; at 0.97 semantic_cache_eval.py
+# finds no hits on a different case (0.92 answered 15% of distinct cases from another case).
+CACHE_ENABLED = os.environ.get('SEMANTIC_CACHE', 'false').lower() in ('1', 'true', 'yes')
+SIMILARITY_THRESHOLD = float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', '0.97'))
+CAPACITY = int(os.environ.get('SEMANTIC_CACHE_SIZE', '512'))
+DIMENSIONS = 2048
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def features(text: str) -> Dict[int, float]:
+    """
+    Signed hashed counts of words and character trigrams of each word
+    """
+    counts: Dict[int, float] = {}
+    for word in WORD_PATTERN.findall((text or '').lower()):
+        grams = [f"w:{word}"]
+        padded = f" {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        for gram in grams:
+            digest = zlib.crc32(gram.encode('utf-8'))
+            index = digest % DIMENSIONS
+            counts[index] = counts.get(index, 0.0) + (1.0 if digest & 0x80000000 else -1.0)
+    norm = math.sqrt(sum(value * value for value in counts.values()))
+    if not norm:
+        return {}
+    return {index: value / norm for index, value in counts.items()}
+
+
+class SemanticCache:
+    """
+    Fixed-capacity cosine nearest-neighbour cache with least-recently-used eviction
+    """
+
+    def __init__(self, capacity: int = CAPACITY, threshold: float = SIMILARITY_THRESHOLD):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.group_codes: Dict[str, int] = {}
+        self.results: List[Optional[Dict]] = [None] * capacity
+        self.last_used = [0] * capacity
+        self.clock = 0
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        if np is not None:
+            self.matrix = np.zeros((capacity, DIMENSIONS), dtype=np.float32)
+            self.codes = np.full(capacity, -1, dtype=np.int32)
+        else:
+            self.vectors: List[Dict[int, float]] = [{} for _ in range(capacity)]
+            self.codes = [-1] * capacity
+
+    def embed(self, text: str):
+        sparse = features(text)
+        if np is None:
+            return sparse
+        vector = np.zeros(DIMENSIONS, dtype=np.float32)
+        if sparse:
+            vector[list(sparse)] = list(sparse.values())
+        return vector
+
+    def nearest(self, vector, group: str) -> Tuple[int, float]:
+        """
+        Slot and cosine similarity of the closest entry in the group; vectors are unit length
+        """
+        code = self.group_codes.get(group)
+        if code is None or not self.size:
+            return -1, -1.0
+        if np is not None:
+            similarities = self.matrix[:self.size] @ vector
+            similarities[self.codes[:self.size] != code] = -1.0
+            slot = int(similarities.argmax())
+            return slot, float(similarities[slot])
+        best, best_similarity = -1, -1.0
+        for slot in range(self.size):
+            if self.codes[slot] != code:
+                continue
+            stored = self.vectors[slot]
+            similarity = sum(value * stored.get(index, 0.0) for index, value in vector.items())
+            if similarity > best_similarity:
+                best, best_similarity = slot, similarity
+        return best, best_similarity
+
+    def lookup(self, text: str, group: str) -> Optional[Tuple[Dict, float]]:
+        """
+        (stored result, similarity) of the nearest entry in the group, if similar enough
+        """
+        vector = self.embed(text)
+        with self.lock:
+            slot, similarity = self.nearest(vector, group)
+            if slot < 0 or similarity < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.clock += 1
+            self.last_used[slot] = self.clock
+            return dict(self.results[slot]), similarity
+
+    def store(self, text: str, group: str, result: Dict) -> None:
+        vector = self.embed(text)
+        with self.lock:
+            if self.size < self.capacity:
+                slot = self.size
+                self.size += 1
+            else:
+                slot = min(range(self.capacity), key=self.last_used.__getitem__)
+            if np is not None:
+                self.matrix[slot] = vector
+            else:
+                self.vectors[slot] = vector
+            self.clock += 1
+            self.last_used[slot] = self.clock
+            self.codes[slot] = self.group_codes.setdefault(group, len(self.group_codes))
+            self.results[slot] = dict(result)
+
+
+cache = SemanticCache()
+
+
+def cache_group(age_group: str, urgency: str, prompt_version: str = '', model_tier: str = '') -> str:
+    """
+    Entries are only compared within one group: answers from another prompt version or model tier never match
+    """
+    return f"{age_group}|{urgency}|{prompt_version}|{model_tier}"
+
+
+def lookup_classification(symptoms: str, age_group: str, urgency: str,
+                          prompt_version: str, model_tier: str) -> Optional[Dict]:
+    """
+    Cached classification of a sufficiently similar earlier case, flagged as cached
+    """
+    if not CACHE_ENABLED or not symptoms:
+        return None
+    found = cache.lookup(symptoms, cache_group(age_group, urgency, prompt_version, model_tier))
+    if found is None:
+        return None
+    classification, similarity = found
+    classification['cached'] = True
+    classification['cacheSimilarity'] = round(similarity, 4)
+    return classification
+
+
+def store_classification(symptoms: str, age_group: str, urgency: str,
+                         prompt_version: str, model_tier: str, classification: Dict) -> None:
+    """
+    Remember a confident classification for future near-duplicate cases
+    """
+    if not CACHE_ENABLED or not symptoms:
+        return
+    try:
+        confidence = float(classification.get('confidence', 0))
+    except (TypeError, ValueError):
+        return
+    if confidence >= model_router.CONFIDENCE_THRESHOLD:
+        cache.store(symptoms, cache_group(age_group, urgency, prompt_version, model_tier), classification)
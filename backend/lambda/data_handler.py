@@ -1,46 +1,138 @@
-import json
+import time
+# Module import start, for the init time the warm action reports
+INIT_STARTED = time.perf_counter()
+import base64
+import binascii
 import boto3
 import logging
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
 import os
+from msm_runtime import (compress_response, create_response, dumps, finish_trace, get_header, loads, log_event,
+                         parse_body, put_metric, record_invocation, run_warmup, span, start_trace)
+import request_archive
+import symptom_index
+import specialist_roster
 
 # Configure logging
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # Initialize DynamoDB client
 dynamodb = boto3.resource('dynamodb')
 table_name = os.environ.get('REQUESTS_TABLE', 'medical-requests')
 table = dynamodb.Table(table_name)
 
+# Aggregate counters table - one item per (dimension, bucket) pair
+stats_table_name = os.environ.get('STATS_TABLE', 'medical-request-stats')
+stats_table = dynamodb.Table(stats_table_name)
+# Counter updates are retried on their own after the request is stored
+COUNTER_ATTEMPTS = 4
+COUNTER_BACKOFF_SECONDS = 0.05
+
+# Dimensions counted on every submit; value is the item attribute the bucket is taken from
+STATS_DIMENSIONS = {
+    'specialty': 'specialty',
+    'subspecialty': 'subspecialty',
+    'urgency': 'urgency',
+    'ageGroup': 'ageGroup',
+    'day': 'createdAt'
+}
+UNSPECIFIED_BUCKET = 'Unspecified'
+
+# Triage queue: TriageIndex GSI (status, triageKey) where triageKey = "<urgency rank>#<createdAt>",
+# so the head of the 'unassigned' partition is always the most urgent, oldest case
+TRIAGE_INDEX = 'TriageIndex'
+STATUS_UNASSIGNED = 'unassigned'
+STATUS_ASSIGNED = 'assigned'
+URGENCY_RANKS = {'high': 0, 'medium': 1, 'low': 2}
+TRIAGE_PAGE_SIZE = 5
+MAX_CLAIM_ATTEMPTS = 25
+
+# Key read by the warm action; no item has it, so each read returns nothing
+WARM_KEY = '#warm'
+
+# Cold tier for requests past the retention window (None when no archive is configured)
+archive_store = request_archive.store_from_env()
+archive_reader = request_archive.ArchiveReader(archive_store) if archive_store else None
+
 def lambda_handler(event, context):
     """
     Main Lambda handler for storing medical requests in DynamoDB
     """
+    start_trace(event, context)
+    cold_start = record_invocation(INIT_STARTED)
     try:
-        logger.info(f"Received request from API Gateway")
-        
-        # Get the origin from the request for CORS validation
-        request_origin = event.get('headers', {}).get('origin') or event.get('headers', {}).get('Origin')
-        
-        # Parse the request
-        body = json.loads(event.get('body', '{}'))
-        action = body.get('action')
-        data = body.get('data', {})
-
-        if action == 'submit':
-            return handle_submit_request(data, request_origin)
-        elif action == 'get':
-            return handle_get_request(data, request_origin)
-        elif action == 'list':
-            return handle_list_requests(data, request_origin)
-        else:
-            return create_response(400, {'error': 'Invalid action'}, request_origin)
+        with span('parse'):
+            # Get the origin from the request for CORS validation
+            request_origin = get_header(event, 'origin')
+            
+            # Parse the request
+            body = parse_body(event)
+            action = body.get('action')
+            data = body.get('data', {})
+        log_event('request.received', action=action, coldStart=cold_start)
+
+        response = route_request(action, data, request_origin)
+
+        # Large bodies (lists, long reasoning) are compressed when the client accepts it
+        with span('compress'):
+            response = compress_response(response, get_header(event, 'accept-encoding'))
+        return finish_trace(response)
             
     except Exception as e:
         logger.error(f"Error in lambda_handler: {str(e)}")
-        return create_response(500, {'error': 'Internal server error', 'message': str(e)}, None)
+        return finish_trace(create_response(500, {'error': 'Internal server error', 'message': str(e)}, None))
+
+def archive_handler(event, context):
+    """
+    Scheduled entry point: move requests older than the retention window to the archive and
+    drop them from the search index. Unassigned requests are never archived.
+    """
+    if archive_store is None:
+        log_event('archive.skipped', logging.WARNING, reason='ARCHIVE_BUCKET and ARCHIVE_PATH are not set')
+        return {'archived': 0}
+
+    retention_days = int((event or {}).get('retentionDays', request_archive.RETENTION_DAYS))
+    started = time.perf_counter()
+    summary = request_archive.archive_expired(
+        table,
+        request_archive.ArchiveWriter(archive_store),
+        on_archived=lambda items: [symptom_index.remove_request(item) for item in items],
+        retention_days=retention_days
+    )
+    summary['durationMs'] = round((time.perf_counter() - started) * 1000, 1)
+    log_event('archive.done', retentionDays=retention_days, **summary)
+    put_metric('RequestsArchived', summary['archived'])
+    return summary
+
+def route_request(action: str, data: dict, request_origin: str = None) -> dict:
+    """
+    Dispatch an action to its handler
+    """
+    if action == 'submit':
+        return handle_submit_request(data, request_origin)
+    elif action == 'get':
+        return handle_get_request(data, request_origin)
+    elif action == 'list':
+        return handle_list_requests(data, request_origin)
+    elif action == 'stats':
+        return handle_stats(data, request_origin)
+    elif action == 'search':
+        return handle_search_requests(data, request_origin)
+    elif action == 'register_specialist':
+        return handle_register_specialist(data, request_origin)
+    elif action == 'match':
+        return handle_match_request(data, request_origin)
+    elif action == 'next':
+        return handle_next_request(data, request_origin)
+    elif action == 'warm':
+        return handle_warm(data, request_origin)
+    else:
+        return create_response(400, {'error': 'Invalid action'}, request_origin)
 
 def handle_submit_request(data: dict, request_origin: str = None) -> dict:
     """
@@ -65,17 +157,34 @@ def handle_submit_request(data: dict, request_origin: str = None) -> dict:
             'specialty': data.get('specialty', ''),
             'subspecialty': data.get('subspecialty', ''),
             'reasoning': data.get('reasoning', ''),
+            'status': STATUS_UNASSIGNED,
             'createdAt': timestamp.isoformat()
         }
+        item['triageKey'] = triage_key(item['urgency'], item['createdAt'])
         
         # Remove empty fields
         item = {k: v for k, v in item.items() if v not in [None, '', []]}
         
-        # Store in DynamoDB
+        # Store the request on its own; a shared counter item can never make the submit fail
         logger.info(f"Storing request in DynamoDB: {request_id}")
-        table.put_item(Item=item)
+        with span('ddb', op='put'):
+            table.put_item(Item=item, ConditionExpression='attribute_not_exists(id)')
         
         logger.info(f"Successfully stored request: {request_id}")
+
+        # Aggregate counters follow; a counter that still fails after retries leaves stats one short
+        with span('ddb', op='counters'):
+            failed = update_counters(item)
+        if failed:
+            put_metric('StatsCounterFailed', failed)
+
+        # Keep the symptom search index up to date; the request itself is already stored
+        try:
+            with span('ddb', op='index'):
+                indexed_terms = symptom_index.index_request(item)
+            logger.info(f"Indexed {indexed_terms} search terms for request: {request_id}")
+        except Exception as e:
+            logger.error(f"Failed to index request {request_id} for search: {str(e)}")
         
         return create_response(200, {
             'success': True,
@@ -98,13 +207,24 @@ def handle_get_request(data: dict, request_origin: str = None) -> dict:
         if not request_id:
             return create_response(400, {'error': 'Request ID is required'}, request_origin)
         
-        response = table.get_item(Key={'id': request_id})
+        with span('ddb', op='get'):
+            response = table.get_item(Key={'id': request_id})
         
         if 'Item' not in response:
-            return create_response(404, {'error': 'Request not found'}, request_origin)
+            # Old requests live in the archive; their IDs name the month partition to look in
+            item = None
+            if archive_reader:
+                with span('archive', op='get'):
+                    item = archive_reader.get(request_id)
+            if item is None:
+                return create_response(404, {'error': 'Request not found'}, request_origin)
+            return create_response(200, {
+                'success': True,
+                'request': item,
+                'archived': True
+            }, request_origin)
         
-        # Convert Decimal to float for JSON serialization
-        item = convert_decimals(response['Item'])
+        item = response['Item']
         
         return create_response(200, {
             'success': True,
@@ -148,12 +268,10 @@ def handle_list_requests(data: dict, request_origin: str = None) -> dict:
             scan_kwargs['ExpressionAttributeValues'] = expression_attribute_values
         
         # Scan table
-        response = table.scan(**scan_kwargs)
+        with span('ddb', op='scan'):
+            response = table.scan(**scan_kwargs)
         items = response.get('Items', [])
         
-        # Convert Decimals to float for JSON serialization
-        items = [convert_decimals(item) for item in items]
-        
         # Sort by timestamp (most recent first)
         items.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
         
@@ -167,6 +285,396 @@ def handle_list_requests(data: dict, request_origin: str = None) -> dict:
         logger.error(f"Error in handle_list_requests: {str(e)}")
         raise
 
+def handle_search_requests(data: dict, request_origin: str = None) -> dict:
+    """
+    Search stored requests by symptom keywords using the inverted index.
+    Each page reads a bounded slice of the index; nextCursor carries where it stopped,
+    so requests stored between pages never shift or repeat results.
+    """
+    try:
+        query = data.get('query', '')
+        sort = data.get('sort', 'relevance')
+        try:
+            limit = min(max(int(data.get('limit', 20)), 1), 100)  # Cap at 100
+        except (TypeError, ValueError):
+            return create_response(400, {'error': 'limit must be a number'}, request_origin)
+
+        if not isinstance(query, str) or not query.strip():
+            return create_response(400, {'error': 'Search query is required'}, request_origin)
+        if sort not in ('relevance', 'recent'):
+            return create_response(400, {'error': 'Sort must be relevance or recent'}, request_origin)
+        position = None
+        if data.get('cursor'):
+            position = decode_search_cursor(data['cursor'])
+            if position is None:
+                return create_response(400, {'error': 'Invalid cursor'}, request_origin)
+
+        with span('ddb', op='search_index'):
+            matches, terms, next_position = symptom_index.search(query, sort, limit, position)
+        with span('ddb', op='batch_get'):
+            items = batch_get_requests([request_id for _, request_id, _ in matches])
+
+        return create_response(200, {
+            'success': True,
+            'requests': items,
+            'count': len(items),
+            'terms': terms,
+            'nextCursor': encode_search_cursor(next_position) if next_position else None
+        }, request_origin)
+
+    except Exception as e:
+        logger.error(f"Error in handle_search_requests: {str(e)}")
+        raise
+
+# Search cursor fields: where the rarest term's postings continue, or the relevance window
+# being paged and the last (score, requestKey) returned from it, plus the term weights
+CURSOR_KEYS = ('after', 'lo', 'hi', 'k')
+
+def encode_search_cursor(position: dict) -> str:
+    """
+    Opaque page cursor for a position returned by symptom_index.search
+    """
+    return base64.urlsafe_b64encode(dumps(position).encode('utf-8')).decode('ascii')
+
+def decode_search_cursor(cursor) -> dict:
+    """
+    Parse a cursor from encode_search_cursor; None if it is not one
+    """
+    try:
+        position = loads(base64.urlsafe_b64decode(str(cursor).encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if not isinstance(position, dict) or not set(position) <= {*CURSOR_KEYS, 's', 'w'}:
+        return None
+    if not all(isinstance(position[key], str) for key in CURSOR_KEYS if key in position):
+        return None
+    if ('lo' in position) != ('hi' in position) or ('s' in position) != ('k' in position):
+        return None
+    if 's' in position and (isinstance(position['s'], bool) or not isinstance(position['s'], (int, float))):
+        return None
+    weights = position.get('w')
+    if not isinstance(weights, dict) or not all(
+            isinstance(weight, (int, float)) and not isinstance(weight, bool) for weight in weights.values()):
+        return None
+    return position
+
+def handle_warm(data: dict, request_origin: str = None) -> dict:
+    """
+    Prepare a fresh container for real traffic: one read per table opens each DynamoDB
+    client's pooled connection and loads its operation models. The index gets `connections`
+    concurrent reads, since submits update document frequencies in parallel. Returns init timings.
+    """
+    try:
+        connections = min(max(int(data.get('connections', 1)), 1), symptom_index.DF_UPDATE_WORKERS)
+    except (TypeError, ValueError):
+        return create_response(400, {'error': 'connections must be a number'}, request_origin)
+
+    result = run_warmup([
+        ('requests', lambda: warm_table(table, {'id': WARM_KEY})),
+        ('stats', lambda: warm_table(stats_table, {'dimension': WARM_KEY, 'bucket': WARM_KEY})),
+        ('index', lambda: warm_table(symptom_index.index_table, {'term': WARM_KEY, 'requestKey': WARM_KEY}, connections)),
+        ('roster', lambda: warm_table(specialist_roster.roster_table, {'specialistId': WARM_KEY, 'coverage': WARM_KEY})),
+        ('tokenizer', lambda: symptom_index.tokenize('Warm-up'))
+    ])
+    result['connections'] = connections
+    return create_response(200, result, request_origin)
+
+def warm_table(target_table, key: dict, connections: int = 1) -> None:
+    """
+    Read a key no item has, from `connections` threads at once
+    """
+    with span('ddb', op='warm'):
+        if connections == 1:
+            target_table.get_item(Key=key)
+            return
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(lambda _: target_table.get_item(Key=key), range(connections)))
+
+def batch_get_requests(request_ids: list) -> list:
+    """
+    Fetch requests by ID in batches, preserving the order of request_ids
+    """
+    found = {}
+    for start in range(0, len(request_ids), 100):
+        request_items = {table_name: {'Keys': [{'id': request_id} for request_id in request_ids[start:start + 100]]}}
+        while request_items:
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in response.get('Responses', {}).get(table_name, []):
+                found[item['id']] = item
+            request_items = response.get('UnprocessedKeys') or None
+    return [found[request_id] for request_id in request_ids if request_id in found]
+
+def handle_register_specialist(data: dict, request_origin: str = None) -> dict:
+    """
+    Add or update a volunteer specialist in the roster
+    """
+    try:
+        if not data.get('specialistId') or not data.get('specialty'):
+            return create_response(400, {'error': 'specialistId and specialty are required'}, request_origin)
+
+        invalid_groups = [g for g in data.get('ageGroups') or [] if g not in specialist_roster.AGE_GROUPS]
+        if invalid_groups:
+            return create_response(400, {'error': f"Invalid age groups: {', '.join(invalid_groups)}"}, request_origin)
+        try:
+            specialist_roster.parse_available(data.get('available', True))
+        except ValueError:
+            return create_response(400, {'error': 'available must be true or false'}, request_origin)
+        try:
+            for field, default in (('activeCases', 0), ('maxCases', 1)):
+                specialist_roster.parse_case_count(data.get(field, default))
+        except ValueError:
+            return create_response(400, {'error': 'activeCases and maxCases must be non-negative integers'}, request_origin)
+
+        with span('ddb', op='put_roster'):
+            entries = specialist_roster.put_specialist(data)
+        logger.info(f"Stored {entries} roster entries for specialist: {data['specialistId']}")
+
+        return create_response(200, {
+            'success': True,
+            'specialistId': data['specialistId'],
+            'entries': entries
+        }, request_origin)
+
+    except Exception as e:
+        logger.error(f"Error in handle_register_specialist: {str(e)}")
+        raise
+
+def handle_match_request(data: dict, request_origin: str = None) -> dict:
+    """
+    Resolve a stored request (or an explicit specialty/subspecialty/ageGroup) to ranked candidate specialists
+    """
+    try:
+        try:
+            limit = min(max(int(data.get('limit', 10)), 1), 50)  # Cap at 50
+        except (TypeError, ValueError):
+            return create_response(400, {'error': 'limit must be a number'}, request_origin)
+        request_id = data.get('id')
+
+        if request_id:
+            with span('ddb', op='get'):
+                response = table.get_item(
+                    Key={'id': request_id},
+                    ProjectionExpression='id, specialty, subspecialty, ageGroup'
+                )
+            if 'Item' not in response:
+                return create_response(404, {'error': 'Request not found'}, request_origin)
+            case = response['Item']
+        else:
+            case = data
+
+        specialty = case.get('specialty')
+        if not specialty:
+            return create_response(400, {'error': 'Request ID or specialty is required'}, request_origin)
+
+        with span('ddb', op='query_roster'):
+            candidates = specialist_roster.find_candidates(
+                specialty,
+                case.get('subspecialty'),
+                case.get('ageGroup'),
+                limit
+            )
+
+        return create_response(200, {
+            'success': True,
+            'id': request_id,
+            'specialty': specialty,
+            'subspecialty': case.get('subspecialty'),
+            'ageGroup': case.get('ageGroup'),
+            'candidates': candidates,
+            'count': len(candidates)
+        }, request_origin)
+
+    except Exception as e:
+        logger.error(f"Error in handle_match_request: {str(e)}")
+        raise
+
+def handle_next_request(data: dict, request_origin: str = None) -> dict:
+    """
+    Claim the most urgent unassigned request for a responder.
+
+    Reads the head of the TriageIndex queue and claims with a conditional update, so two
+    responders can never take the same case; a responder who loses a race simply moves
+    on to the next item. Each attempt costs one small query page plus one write,
+    independent of how many cases are waiting.
+    """
+    try:
+        responder_id = data.get('responderId')
+        if not responder_id:
+            return create_response(400, {'error': 'Responder ID is required'}, request_origin)
+
+        query_kwargs = {
+            'IndexName': TRIAGE_INDEX,
+            'KeyConditionExpression': Key('status').eq(STATUS_UNASSIGNED),
+            'ScanIndexForward': True,
+            'Limit': TRIAGE_PAGE_SIZE
+        }
+        attempts = 0
+
+        while attempts < MAX_CLAIM_ATTEMPTS:
+            with span('ddb', op='query_triage'):
+                response = table.query(**query_kwargs)
+            for candidate in response.get('Items', []):
+                attempts += 1
+                with span('ddb', op='claim'):
+                    claimed = claim_request(candidate['id'], responder_id)
+                if claimed:
+                    logger.info(f"Responder {responder_id} claimed request {candidate['id']} after {attempts} attempt(s)")
+                    return create_response(200, {
+                        'success': True,
+                        'request': claimed,
+                        'attempts': attempts
+                    }, request_origin)
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        return create_response(200, {
+            'success': True,
+            'request': None,
+            'attempts': attempts,
+            'message': 'No unassigned requests in the queue'
+        }, request_origin)
+
+    except Exception as e:
+        logger.error(f"Error in handle_next_request: {str(e)}")
+        raise
+
+def claim_request(request_id: str, responder_id: str):
+    """
+    Atomically move a request from unassigned to assigned. Returns the updated item,
+    or None if another responder claimed it first.
+    """
+    try:
+        response = table.update_item(
+            Key={'id': request_id},
+            UpdateExpression='SET #status = :assigned, assignedTo = :responder, assignedAt = :now',
+            ConditionExpression='#status = :unassigned',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':assigned': STATUS_ASSIGNED,
+                ':unassigned': STATUS_UNASSIGNED,
+                ':responder': responder_id,
+                ':now': datetime.utcnow().isoformat()
+            },
+            ReturnValues='ALL_NEW'
+        )
+        return response['Attributes']
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return None
+        raise
+
+def triage_key(urgency: str, created_at: str) -> str:
+    """
+    Queue sort key: urgency rank first (high before low), then oldest first
+    """
+    return f"{URGENCY_RANKS.get(urgency, URGENCY_RANKS['medium'])}#{created_at}"
+
+def handle_stats(data: dict, request_origin: str = None) -> dict:
+    """
+    Return live request counts per dimension from the aggregate counter items.
+    Reads one partition per dimension, so cost is proportional to the number of
+    buckets rather than the number of stored requests.
+    """
+    try:
+        dimensions = data.get('dimensions') or list(STATS_DIMENSIONS.keys())
+        since = data.get('since')  # Optional YYYY-MM-DD lower bound for the day dimension
+
+        if not isinstance(dimensions, list) or not all(isinstance(d, str) for d in dimensions):
+            return create_response(400, {'error': 'dimensions must be a list of strings'}, request_origin)
+        if since not in (None, '') and not is_iso_date(since):
+            return create_response(400, {'error': 'since must be a YYYY-MM-DD date'}, request_origin)
+
+        unknown = [d for d in dimensions if d not in STATS_DIMENSIONS]
+        if unknown:
+            return create_response(400, {'error': f"Unknown stats dimensions: {', '.join(unknown)}"}, request_origin)
+
+        stats = {}
+        for dimension in dimensions:
+            key_condition = Key('dimension').eq(dimension)
+            if dimension == 'day' and since:
+                key_condition = key_condition & Key('bucket').gte(since)
+            stats[dimension] = query_counters(key_condition)
+
+        return create_response(200, {
+            'success': True,
+            'stats': stats
+        }, request_origin)
+
+    except Exception as e:
+        logger.error(f"Error in handle_stats: {str(e)}")
+        raise
+
+def is_iso_date(value) -> bool:
+    """
+    Whether a value is a YYYY-MM-DD date string, the format of the day dimension's buckets
+    """
+    if not isinstance(value, str) or len(value) != 10:
+        return False
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return False
+    return True
+
+def query_counters(key_condition) -> dict:
+    """
+    Read every counter bucket for one dimension, following pagination
+    """
+    counts = {}
+    query_kwargs = {'KeyConditionExpression': key_condition}
+    while True:
+        with span('ddb', op='query_stats'):
+            response = stats_table.query(**query_kwargs)
+        for counter in response.get('Items', []):
+            counts[counter['bucket']] = int(counter.get('count', 0))
+        if 'LastEvaluatedKey' not in response:
+            return counts
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def counter_buckets(item: dict) -> dict:
+    """
+    Map each stats dimension to the bucket a stored request falls into
+    """
+    buckets = {}
+    for dimension, attribute in STATS_DIMENSIONS.items():
+        value = item.get(attribute) or UNSPECIFIED_BUCKET
+        if dimension == 'day' and value != UNSPECIFIED_BUCKET:
+            value = value[:10]  # ISO timestamp -> YYYY-MM-DD
+        buckets[dimension] = value
+    return buckets
+
+def update_counters(item: dict) -> int:
+    """
+    Add one to each stats bucket of a new request item, retrying each counter with backoff.
+    Returns the number of counters that could not be updated.
+    """
+    buckets = counter_buckets(item)
+    with ThreadPoolExecutor(max_workers=len(buckets)) as executor:
+        results = executor.map(lambda entry: increment_counter(*entry), buckets.items())
+        return sum(1 for updated in results if not updated)
+
+def increment_counter(dimension: str, bucket: str) -> bool:
+    """
+    Atomically add one to a (dimension, bucket) counter; False after COUNTER_ATTEMPTS failures.
+    Any error counts as a failure, timeouts included: the request is already stored.
+    """
+    for attempt in range(COUNTER_ATTEMPTS):
+        try:
+            stats_table.update_item(
+                Key={'dimension': dimension, 'bucket': bucket},
+                UpdateExpression='ADD #count :one',
+                ExpressionAttributeNames={'#count': 'count'},
+                ExpressionAttributeValues={':one': 1}
+            )
+            return True
+        except Exception as e:
+            if attempt + 1 == COUNTER_ATTEMPTS:
+                logger.error(f"Failed to update stats counter {dimension}/{bucket}: {str(e)}")
+                return False
+            time.sleep(COUNTER_BACKOFF_SECONDS * 2 ** attempt)
+    return False
+
 def convert_to_decimal(value):
     """
     Convert float to Decimal for DynamoDB
@@ -174,60 +682,3 @@ def convert_to_decimal(value):
     if isinstance(value, float):
         return Decimal(str(value))
     return value
-
-def convert_decimals(obj):
-    """
-    Convert Decimal objects to float for JSON serialization
-    """
-    if isinstance(obj, list):
-        return [convert_decimals(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: convert_decimals(value) for key, value in obj.items()}
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    else:
-        return obj
-
-def create_response(status_code: int, body: dict, request_origin: str = None) -> dict:
-    """
-    Create standardized API response with secure CORS headers
-    
-    Args:
-        status_code: HTTP status code
-        body: Response body dictionary
-        request_origin: The Origin header from the incoming request
-    
-    Returns:
-        API Gateway response with appropriate CORS headers
-    """
-    # Get allowed origins from environment variable
-    allowed_origins_str = os.environ.get('ALLOWED_ORIGINS', 'http://localhost:3000')
-    allowed_origins = [origin.strip() for origin in allowed_origins_str.split(',')]
-    
-    # Determine which origin to return in the header
-    # CORS spec only allows a single origin in Access-Control-Allow-Origin
-    if request_origin and request_origin in allowed_origins:
-        # Request is from an allowed origin - return that specific origin
-        origin = request_origin
-        logger.info(f"CORS: Allowing origin {origin}")
-    elif len(allowed_origins) == 1:
-        # Only one allowed origin - use it
-        origin = allowed_origins[0]
-    else:
-        # Multiple allowed origins but no matching request origin
-        # Use the first one (typically production URL)
-        origin = allowed_origins[0]
-        if request_origin:
-            logger.warning(f"CORS: Request from unauthorized origin {request_origin}. Allowed: {allowed_origins}")
-    
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': origin,
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'OPTIONS,POST,GET',
-            'Vary': 'Origin'  # Important for caching with multiple allowed origins
-        },
-        'body': json.dumps(body)
-    }
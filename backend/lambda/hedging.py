@@ -0,0 +1,129 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Callable, Deque, Dict, Optional
+
+# Hedged requests: when a call has not answered by the HEDGE_PERCENTILE of its recent
+# latencies, an identical second call is sent and whichever answers first wins; the other
+# is ignored (an in-flight Bedrock call cannot be cancelled). Each call earns HEDGE_BUDGET
+# of a hedge, up to HEDGE_BURST saved, so duplicates stay below that share of calls.
+HEDGE_ENABLED = os.environ.get('HEDGE_REQUESTS', 'false').lower() in ('1', 'true', 'yes')
+PERCENTILE = float(os.environ.get('HEDGE_PERCENTILE', '0.95'))
+BUDGET = float(os.environ.get('HEDGE_BUDGET', '0.1'))
+BURST = float(os.environ.get('HEDGE_BURST', '5'))
+MIN_DELAY = float(os.environ.get('HEDGE_MIN_DELAY_MS', '50')) / 1000
+# Until MIN_SAMPLES successful calls have been timed, hedge after DEFAULT_DELAY
+DEFAULT_DELAY = float(os.environ.get('HEDGE_DEFAULT_DELAY_MS', '3000')) / 1000
+MIN_SAMPLES = 20
+WINDOW = 200
+
+
+class LatencyWindow:
+    """
+    Durations of the last WINDOW successful calls for one kind of call
+    """
+
+    def __init__(self):
+        self.samples: Deque[float] = deque(maxlen=WINDOW)
+        self.lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self.lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgeBudget:
+    """
+    Token bucket: every call adds BUDGET tokens (at most BURST saved), every hedge costs one
+    """
+
+    def __init__(self):
+        self.tokens = BURST
+        self.lock = threading.Lock()
+
+    def earn(self) -> None:
+        with self.lock:
+            self.tokens = min(BURST, self.tokens + BUDGET)
+
+    def spend(self) -> bool:
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class Hedger:
+    """
+    Runs calls with a hedge after the key's latency percentile. on_result(key, hedged, hedge_won)
+    is called once per successful call.
+    """
+
+    def __init__(self, executor: Executor, on_result: Optional[Callable[[str, bool, bool], None]] = None):
+        self.executor = executor
+        self.on_result = on_result
+        self.budget = HedgeBudget()
+        self.windows: Dict[str, LatencyWindow] = {}
+        self.lock = threading.Lock()
+
+    def window(self, key: str) -> LatencyWindow:
+        window = self.windows.get(key)
+        if window is None:
+            with self.lock:
+                window = self.windows.setdefault(key, LatencyWindow())
+        return window
+
+    def delay(self, key: str) -> float:
+        """
+        Seconds to wait for the first attempt before hedging
+        """
+        observed = self.window(key).percentile(PERCENTILE)
+        return DEFAULT_DELAY if observed is None else max(MIN_DELAY, observed)
+
+    def submit(self, window: LatencyWindow, fn: Callable, args: tuple):
+        def attempt():
+            started = time.perf_counter()
+            result = fn(*args)
+            window.add(time.perf_counter() - started)
+            return result
+        # Copy the context so the attempt's spans land in this invocation's trace
+        return self.executor.submit(contextvars.copy_context().run, attempt)
+
+    def call(self, key: str, fn: Callable, *args):
+        """
+        fn(*args), hedged when enabled. Raises the last error only if every attempt failed.
+        """
+        if not HEDGE_ENABLED:
+            return fn(*args)
+        self.budget.earn()
+        window = self.window(key)
+        primary = self.submit(window, fn, args)
+        done, _ = wait([primary], timeout=self.delay(key))
+        if done or not self.budget.spend():
+            result = primary.result()
+            if self.on_result:
+                self.on_result(key, False, False)
+            return result
+
+        hedge = self.submit(window, fn, args)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if self.on_result:
+                        self.on_result(key, True, future is hedge)
+                    return future.result()
+                error = future.exception()
+        raise error
@@ -0,0 +1,157 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Model tiers per task. The standard tier is what every request used before routing and
+# is also the escalation target; the light tier takes turns that cheap local signals mark
+# as simple. Model IDs are cross-region inference profiles.
+CHAT_MODELS = {
+    'light': os.environ.get('CHAT_LIGHT_MODEL_ID', 'us.amazon.nova-2-lite-v1:0'),
+    'standard': os.environ.get('CHAT_MODEL_ID', 'us.anthropic.claude-3-5-haiku-20241022-v1:0')
+}
+CLASSIFY_MODELS = {
+    'light': os.environ.get('CLASSIFY_LIGHT_MODEL_ID', 'us.amazon.nova-micro-v1:0'),
+    'standard': os.environ.get('CLASSIFY_MODEL_ID', 'us.amazon.nova-2-lite-v1:0')
+}
+TASK_MODELS = {
+    'chat': CHAT_MODELS,
+    'extract': CLASSIFY_MODELS,
+    'classify': CLASSIFY_MODELS
+}
+
+ROUTING_ENABLED = os.environ.get('MODEL_ROUTING', 'true').lower() in ('1', 'true', 'yes')
+# Classifications below this confidence are not accepted from the light tier
+CONFIDENCE_THRESHOLD = float(os.environ.get('CONFIDENCE_THRESHOLD', '0.70'))
+# Turns scoring at or below this complexity go to the light tier
+LIGHT_MAX_COMPLEXITY = float(os.environ.get('ROUTING_LIGHT_MAX', '0.35'))
+
+# Normalisers for the complexity signals
+LONG_TEXT_CHARS = 600
+MANY_TURNS = 8
+MANY_FINDINGS = 8
+
+FINDING_SPLIT = re.compile(r'[,;.\n]|\band\b|\bwith\b', re.IGNORECASE)
+AGE_PATTERN = re.compile(r'\b(\d{1,3}[- ]?(year|yr|month|week|day)s?[- ]?old|infant|newborn|neonate|toddler|child|adolescent|teen|adult|elderly|\d{1,3}\s?(y/?o|yo))\b', re.IGNORECASE)
+ONSET_PATTERN = re.compile(r'\b(since|for \d+|\d+\s?(hour|day|week|month|year)s?|yesterday|today|this morning|last (night|week|month)|sudden|gradual|chronic|acute|started)\b', re.IGNORECASE)
+
+
+def count_findings(text: str) -> int:
+    """
+    Rough number of distinct clinical findings in free text
+    """
+    return sum(1 for clause in FINDING_SPLIT.split(text or '') if len(clause.strip()) > 2)
+
+
+def history_completeness(doctor_text: str) -> float:
+    """
+    Fraction of the fields extraction needs (age, symptoms, onset) that the doctor's
+    messages already mention
+    """
+    present = [
+        bool(AGE_PATTERN.search(doctor_text)),
+        len(doctor_text) >= 40,
+        bool(ONSET_PATTERN.search(doctor_text))
+    ]
+    return sum(present) / len(present)
+
+
+def complexity_score(text_chars: int, turns: int, findings: int, completeness: float) -> float:
+    """
+    0 (simple) to 1 (complex) from text length, conversation depth, number of findings
+    and how much of the required information is missing
+    """
+    return round(
+        0.35 * min(text_chars / LONG_TEXT_CHARS, 1.0)
+        + 0.15 * min(turns / MANY_TURNS, 1.0)
+        + 0.25 * min(findings / MANY_FINDINGS, 1.0)
+        + 0.25 * (1.0 - completeness),
+        3
+    )
+
+
+def choose_tier(score: float, urgency: Optional[str] = None) -> str:
+    if not ROUTING_ENABLED or urgency == 'high' or score > LIGHT_MAX_COMPLEXITY:
+        return 'standard'
+    return 'light'
+
+
+def doctor_text(conversation_history: List[Dict]) -> str:
+    return '\n'.join(msg.get('text', '') for msg in conversation_history if msg.get('sender') == 'user')
+
+
+def route_chat(conversation_history: List[Dict], message: str) -> Tuple[str, float]:
+    """
+    Tier for the conversational reply, from message length, turn count and completeness
+    """
+    text = doctor_text(conversation_history) + '\n' + (message or '')
+    score = complexity_score(len(message or ''), len(conversation_history) + 1, count_findings(message), history_completeness(text))
+    return choose_tier(score), score
+
+
+def route_extraction(conversation_history: List[Dict]) -> Tuple[str, float]:
+    """
+    Tier for the combined extraction + classification call
+    """
+    text = doctor_text(conversation_history)
+    score = complexity_score(len(text), len(conversation_history), count_findings(text), history_completeness(text))
+    return choose_tier(score), score
+
+
+def route_classification(symptoms: str, age_group: Optional[str], urgency: Optional[str]) -> Tuple[str, float]:
+    """
+    Tier for direct classification of a reviewed case
+    """
+    completeness = sum([bool(symptoms), age_group in ('Adult', 'Child'), urgency in ('low', 'medium', 'high')]) / 3
+    score = complexity_score(len(symptoms or ''), 0, count_findings(symptoms), completeness)
+    return choose_tier(score, urgency), score
+
+
+def should_escalate(tier: str, confidence) -> bool:
+    """
+    Whether a light-tier answer must be redone on the standard tier
+    """
+    if tier != 'light':
+        return False
+    try:
+        return float(confidence) < CONFIDENCE_THRESHOLD
+    except (TypeError, ValueError):
+        return True
+
+
+def model_id(task: str, tier: str) -> str:
+    return TASK_MODELS[task][tier]
+
+
+def model_family(model_id: str) -> str:
+    return 'claude' if 'anthropic' in model_id else 'nova'
+
+
+def build_payload(model_id: str, prompt: str, max_tokens: int, temperature: float, top_p: float) -> Dict:
+    """
+    invoke_model request body in the format of the model's family
+    """
+    if model_family(model_id) == 'claude':
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "top_p": top_p
+        }
+    return {
+        "messages": [{"role": "user", "content": [{"text": prompt}]}],
+        "inferenceConfig": {
+            "max_new_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p
+        }
+    }
+
+
+def response_text(response_body: Dict) -> str:
+    """
+    Reply text from a Nova or Claude invoke_model response body
+    """
+    if 'output' in response_body:
+        return response_body['output']['message']['content'][0]['text']
+    return response_body['content'][0]['text']
@@ -0,0 +1,144 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Long free text is checked for PII in sentence-aligned chunks that overlap by a sentence or
+# two, so an identifier split across a boundary is still seen whole by one chunk. Chunk
+# results are merged into one answer whose spans are offsets into the original text.
+CHUNK_CHARS = int(os.environ.get('PII_CHUNK_CHARS', '2000'))
+CHUNK_OVERLAP = int(os.environ.get('PII_CHUNK_OVERLAP', '200'))
+MAX_CONCURRENCY = int(os.environ.get('PII_MAX_CONCURRENCY', '8'))
+
+SENTENCE_BREAK = re.compile(r'(?<=[.!?;])\s+|\s*\n\s*')
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2}
+
+
+def sentence_spans(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """
+    (start, end) of each sentence or line, with sentences longer than max_chars cut at whitespace
+    """
+    spans = []
+    start = 0
+    for match in SENTENCE_BREAK.finditer(text):
+        if match.start() > start:
+            spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+
+    bounded = []
+    for start, end in spans:
+        while end - start > max_chars:
+            cut = text.rfind(' ', start + 1, start + max_chars)
+            if cut <= start:
+                cut = start + max_chars
+            bounded.append((start, cut))
+            start = cut
+        bounded.append((start, end))
+    return bounded
+
+
+def split_chunks(text: str, max_chars: Optional[int] = None, overlap: Optional[int] = None) -> List[Tuple[int, str]]:
+    """
+    (offset, chunk) pairs of whole sentences up to max_chars each; each chunk after the first
+    repeats the previous chunk's trailing sentences that fit in `overlap` characters
+    """
+    max_chars = max_chars or CHUNK_CHARS
+    overlap = CHUNK_OVERLAP if overlap is None else overlap
+    if len(text) <= max_chars:
+        return [(0, text)]
+    spans = sentence_spans(text, max_chars)
+    chunks = []
+    first = 0
+    while first < len(spans):
+        last = first
+        while last + 1 < len(spans) and spans[last + 1][1] - spans[first][0] <= max_chars:
+            last += 1
+        start, end = spans[first][0], spans[last][1]
+        chunks.append((start, text[start:end]))
+        if last + 1 >= len(spans):
+            break
+        # Step back over trailing sentences for the overlap, always advancing by at least one
+        following = last + 1
+        while following - 1 > first and end - spans[following - 1][0] <= overlap:
+            following -= 1
+        first = following
+    return chunks
+
+
+def locate(value: str, chunk: str, offset: int) -> List[Tuple[int, int]]:
+    """
+    Offsets in the original text of every occurrence of a reported PII value within its chunk
+    """
+    value = (value or '').strip()
+    if len(value) < 2:
+        return []
+    haystack, needle = chunk, value
+    if chunk.find(value) < 0:
+        haystack, needle = chunk.lower(), value.lower()
+    found = []
+    position = haystack.find(needle)
+    while position >= 0:
+        found.append((offset + position, offset + position + len(needle)))
+        position = haystack.find(needle, position + len(needle))
+    return found
+
+
+def merge_results(text: str, chunks: List[Tuple[int, str]], results: List[Dict]) -> Dict:
+    """
+    One PII answer for the whole text from per-chunk answers, with piiSpans offsets into `text`
+    """
+    pii_found: List[str] = []
+    details: Dict[Tuple[str, str], Dict] = {}
+    spans: List[Dict] = []
+    recommendations: List[str] = []
+    errors: List[str] = []
+    severity: Optional[str] = None
+
+    for (offset, chunk), result in zip(chunks, results):
+        for kind in result.get('piiFound') or []:
+            if kind not in pii_found:
+                pii_found.append(kind)
+        for detail in result.get('piiDetails') or []:
+            if not isinstance(detail, dict):
+                continue
+            value = str(detail.get('value') or '')
+            kind = str(detail.get('type') or 'Unknown')
+            details.setdefault((kind, value.strip().lower()), detail)
+            for start, end in locate(value, chunk, offset):
+                spans.append({'type': kind, 'start': start, 'end': end})
+        recommendation = result.get('recommendation')
+        if recommendation and recommendation not in recommendations:
+            recommendations.append(recommendation)
+        if result.get('error'):
+            errors.append(result['error'])
+        if result.get('severity') in SEVERITY_RANK and (
+                severity is None or SEVERITY_RANK[result['severity']] > SEVERITY_RANK[severity]):
+            severity = result['severity']
+
+    # Overlapping chunks report the same identifier twice; merge overlapping spans per type
+    merged: List[Dict] = []
+    for span in sorted(spans, key=lambda item: (item['type'], item['start'], item['end'])):
+        previous = merged[-1] if merged else None
+        if previous and previous['type'] == span['type'] and span['start'] <= previous['end']:
+            previous['end'] = max(previous['end'], span['end'])
+        else:
+            merged.append(dict(span))
+    merged.sort(key=lambda item: (item['start'], item['end']))
+    for span in merged:
+        span['value'] = text[span['start']:span['end']]
+
+    merged_result = {
+        'containsPII': any(result.get('containsPII') for result in results),
+        'piiFound': pii_found,
+        'piiDetails': list(details.values()),
+        'piiSpans': merged,
+        'recommendation': ' '.join(recommendations) or 'No PII detected',
+        'severity': severity or 'low',
+        'chunks': len(chunks)
+    }
+    if errors:
+        merged_result['error'] = '; '.join(errors)
+    if any(result.get('degraded') for result in results):
+        merged_result['degraded'] = True
+    return merged_result
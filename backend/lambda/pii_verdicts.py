@@ -0,0 +1,159 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pii_chunking
+
+# Container-local memory of PII verdicts per review session, so re-checking an edited text
+# only sends new or changed sentences to the model. Sentences are keyed by a hash of their
+# whitespace-collapsed text. A verdict is either clear or the PII details the model located
+# inside that sentence. Sentences from a check whose answer cannot be pinned to sentences
+# (an error, a degraded default, a reported value not found in the text) get no verdict and
+# are checked again next time. A session expires SESSION_TTL seconds after its last check.
+INCREMENTAL_ENABLED = os.environ.get('PII_INCREMENTAL', 'true').lower() in ('1', 'true', 'yes')
+SESSION_TTL = float(os.environ.get('PII_SESSION_TTL_SECONDS', '1800'))
+MAX_SESSIONS = int(os.environ.get('PII_SESSION_CACHE_SIZE', '512'))
+# Verdicts kept per session; the oldest are dropped first
+MAX_SENTENCES = 500
+
+WHITESPACE = re.compile(r'\s+')
+CLEAR = {'containsPII': False}
+
+
+def sentence_key(sentence: str) -> str:
+    return hashlib.blake2b(WHITESPACE.sub(' ', sentence.strip()).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) of each sentence, as used for PII chunking
+    """
+    return pii_chunking.sentence_spans(text, pii_chunking.CHUNK_CHARS)
+
+
+def changed_runs(sentences: List[Tuple[int, int]], known: List[Optional[Dict]]) -> List[Tuple[int, int]]:
+    """
+    (start, end) of each run of consecutive sentences without a verdict, so an edit spanning
+    several sentences is checked as one piece of text
+    """
+    runs: List[Tuple[int, int]] = []
+    run_start: Optional[int] = None
+    for index, (start, end) in enumerate(sentences):
+        if known[index] is not None:
+            if run_start is not None:
+                runs.append((run_start, sentences[index - 1][1]))
+                run_start = None
+        elif run_start is None:
+            run_start = start
+    if run_start is not None:
+        runs.append((run_start, sentences[-1][1]))
+    return runs
+
+
+def attributable(result: Dict, located: List[Tuple[int, int, Dict]]) -> bool:
+    """
+    Whether a piece's answer can be split into per-sentence verdicts
+    """
+    if result.get('error') or result.get('degraded'):
+        return False
+    details = [detail for detail in result.get('piiDetails') or [] if isinstance(detail, dict)]
+    if result.get('containsPII') and not details:
+        return False
+    found_values = {id(detail) for _, _, detail in located}
+    if any(id(detail) not in found_values for detail in details):
+        return False
+    detail_types = {str(detail.get('type') or 'Unknown') for detail in details}
+    return all(kind in detail_types for kind in result.get('piiFound') or [])
+
+
+def sentence_verdicts(text: str, sentences: List[Tuple[int, int]], pieces: List[Tuple[int, str]],
+                      results: List[Dict]) -> Dict[int, Dict]:
+    """
+    {sentence index: verdict} for the sentences the checked pieces covered
+    """
+    details_by_sentence: Dict[int, Dict[Tuple[str, str], Dict]] = {}
+    results_by_sentence: Dict[int, Dict] = {}
+    unknown = set()
+    for (offset, piece), result in zip(pieces, results):
+        located = [
+            (start, end, detail)
+            for detail in result.get('piiDetails') or [] if isinstance(detail, dict)
+            for start, end in pii_chunking.locate(str(detail.get('value') or ''), piece, offset)
+        ]
+        covered = [index for index, (start, end) in enumerate(sentences)
+                   if start >= offset and end <= offset + len(piece)]
+        if not attributable(result, located):
+            unknown.update(covered)
+            continue
+        for index in covered:
+            details_by_sentence.setdefault(index, {})
+        for start, end, detail in located:
+            inside = [index for index in covered if sentences[index][0] <= start and end <= sentences[index][1]]
+            if not inside:
+                # A value crossing a sentence break belongs to neither sentence alone
+                unknown.update(index for index in covered
+                               if start < sentences[index][1] and end > sentences[index][0])
+                continue
+            details_by_sentence[inside[0]].setdefault(
+                (str(detail.get('type') or 'Unknown'), text[start:end].lower()), detail)
+            results_by_sentence[inside[0]] = result
+
+    verdicts = {}
+    for index, details in details_by_sentence.items():
+        if index in unknown:
+            continue
+        if not details:
+            verdicts[index] = CLEAR
+            continue
+        result = results_by_sentence[index]
+        verdicts[index] = {
+            'containsPII': True,
+            'piiFound': list(dict.fromkeys(str(detail.get('type') or 'Unknown') for detail in details.values())),
+            'piiDetails': list(details.values()),
+            'recommendation': result.get('recommendation') or '',
+            'severity': result.get('severity') or 'medium'
+        }
+    return verdicts
+
+
+class VerdictStore:
+    """
+    Sentence verdicts per session with a sliding expiry and least-recently-used eviction
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, capacity: int = MAX_SESSIONS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.clock = clock
+        self.sessions: 'OrderedDict[str, Tuple[float, Dict[str, Dict]]]' = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup(self, session: str, keys: List[str]) -> List[Optional[Dict]]:
+        with self.lock:
+            entry = self.sessions.get(session)
+            if entry is None or entry[0] < self.clock():
+                self.sessions.pop(session, None)
+                return [None] * len(keys)
+            self.sessions.move_to_end(session)
+            return [entry[1].get(key) for key in keys]
+
+    def remember(self, session: str, verdicts: Dict[str, Dict]) -> None:
+        with self.lock:
+            entry = self.sessions.pop(session, None)
+            known = entry[1] if entry and entry[0] >= self.clock() else {}
+            for key, verdict in verdicts.items():
+                known.pop(key, None)
+                known[key] = verdict
+            while len(known) > MAX_SENTENCES:
+                del known[next(iter(known))]
+            self.sessions[session] = (self.clock() + self.ttl, known)
+            while len(self.sessions) > self.capacity:
+                self.sessions.popitem(last=False)
+
+
+store = VerdictStore()
@@ -0,0 +1,118 @@
+import os
+import re
+import string
+from typing import Dict, List, Optional
+
+# Prompt templates live in prompts/<name>/v<n>.txt as str.format templates. Fields known when
+# the container starts (specialty listings, confidence target) are filled in at import; the
+# per-request fields (conversation, symptoms, ...) are filled by joining precompiled segments.
+# PROMPT_VERSIONS pins versions ("chat=v1,classify=v2"); otherwise the highest version is active.
+PROMPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prompts')
+VERSION_PATTERN = re.compile(r'^v(\d+)\.txt$')
+CHARS_PER_TOKEN = 4
+
+
+def parse_versions(value: str) -> Dict[str, str]:
+    """
+    "chat=v1,classify=v2" -> {'chat': 'v1', 'classify': 'v2'}
+    """
+    pinned = {}
+    for entry in (value or '').split(','):
+        name, _, version = entry.partition('=')
+        if name.strip() and version.strip():
+            pinned[name.strip()] = version.strip()
+    return pinned
+
+
+PINNED_VERSIONS = parse_versions(os.environ.get('PROMPT_VERSIONS', ''))
+
+
+class PromptTemplate:
+    """
+    One prompt version with its static fields resolved and the request fields precompiled
+    """
+
+    def __init__(self, name: str, version: str, text: str, static_fields: Dict):
+        self.name = name
+        self.version = version
+        formatter = string.Formatter()
+        # Alternating literal / field segments: literals[i] + fields[i] + literals[i + 1] ...
+        self.literals: List[str] = ['']
+        self.fields: List[str] = []
+        for literal, field, spec, conversion in formatter.parse(text):
+            self.literals[-1] += literal
+            if field is None:
+                continue
+            if field in static_fields:
+                value = formatter.convert_field(static_fields[field], conversion)
+                self.literals[-1] += formatter.format_field(value, spec)
+            else:
+                if spec or conversion:
+                    raise ValueError(f"Prompt {name}/{version}: request field {field!r} cannot have a format spec")
+                self.fields.append(field)
+                self.literals.append('')
+        # Approximate tokens in the fixed part of the prompt, before request fields
+        self.static_chars = sum(len(literal) for literal in self.literals)
+        self.tokens = round(self.static_chars / CHARS_PER_TOKEN)
+
+    def render(self, **values) -> str:
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return ''.join(parts)
+
+
+class PromptRegistry:
+    """
+    Every version of every prompt in a directory, compiled once, plus the active version of each
+    """
+
+    def __init__(self, directory: str = PROMPT_DIR, pinned: Optional[Dict[str, str]] = None, **static_fields):
+        self.templates: Dict[str, Dict[str, PromptTemplate]] = {}
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not os.path.isdir(path):
+                continue
+            files = sorted(
+                (int(match.group(1)), filename)
+                for filename in os.listdir(path)
+                for match in [VERSION_PATTERN.match(filename)] if match
+            )
+            versions = {}
+            for _, filename in files:
+                with open(os.path.join(path, filename), encoding='utf-8') as f:
+                    text = f.read()
+                # Files end with a newline for editors; prompts do not
+                if text.endswith('\n'):
+                    text = text[:-1]
+                version = filename[:-len('.txt')]
+                versions[version] = PromptTemplate(name, version, text, static_fields)
+            if versions:
+                self.templates[name] = versions
+
+        self.active: Dict[str, str] = {name: list(versions)[-1] for name, versions in self.templates.items()}
+        for name, version in (PINNED_VERSIONS if pinned is None else pinned).items():
+            if version not in self.templates.get(name, {}):
+                raise ValueError(f"Unknown prompt version {name}={version}")
+            self.active[name] = version
+
+    def get(self, name: str, version: Optional[str] = None) -> PromptTemplate:
+        return self.templates[name][version or self.active[name]]
+
+    def render(self, name: str, version: Optional[str] = None, **values) -> str:
+        return self.get(name, version).render(**values)
+
+    def versions(self, *names: str) -> Dict[str, str]:
+        """
+        Active versions of the given prompts, for stamping on responses
+        """
+        return {name: self.active[name] for name in names}
+
+    def summary(self) -> List[Dict]:
+        return [
+            {'prompt': name, 'version': version, 'tokens': template.tokens,
+             'fields': template.fields, 'active': self.active[name] == version}
+            for name, versions in self.templates.items()
+            for version, template in versions.items()
+        ]
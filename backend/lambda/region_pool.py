@@ -0,0 +1,136 @@
+import math
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import circuit_breaker
+
+# Bedrock runtime clients for several regions behind one invoke_model. The cross-region
+# `us.` inference profiles can be called from any US region, so each call goes to the
+# region with the best recent latency for that model, weighted by its recent error rate.
+# Latency and error rate are exponentially weighted moving averages per (region, model), so
+# a slow model's calls never make a region look slow for a fast one; warm-up calls are not
+# sampled. An estimate also fades with age, so a rarely called region's next sample counts for more. A small share of calls
+# explores another region so a recovered region is noticed, and a failed call is retried
+# once in the next best region.
+REGIONS = [
+    region.strip()
+    for region in (os.environ.get('BEDROCK_REGIONS') or os.environ.get('BEDROCK_REGION') or '').split(',')
+    if region.strip()
+]
+EWMA_ALPHA = float(os.environ.get('REGION_EWMA_ALPHA', '0.2'))
+# Seconds for an estimate's weight to fall to 1/e without new samples
+DECAY_SECONDS = float(os.environ.get('REGION_DECAY_SECONDS', '10'))
+EXPLORE_RATE = float(os.environ.get('REGION_EXPLORE_RATE', '0.05'))
+# Score = latency x (1 + ERROR_WEIGHT x error rate): a region failing every call scores 5x its latency
+ERROR_WEIGHT = float(os.environ.get('REGION_ERROR_WEIGHT', '4'))
+FAILOVER = os.environ.get('REGION_FAILOVER', 'true').lower() in ('1', 'true', 'yes')
+
+
+class RegionStats:
+    """
+    Moving averages of one model's call latency (successful calls) and error rate in one region
+    """
+    __slots__ = ('region', 'model_id', 'client', 'latency', 'error_rate', 'calls', 'sampled_at')
+
+    def __init__(self, region: str, model_id: str, client):
+        self.region = region
+        self.model_id = model_id
+        self.client = client
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.sampled_at = 0.0
+
+    def score(self, penalty: float) -> float:
+        """
+        Error-weighted latency; a region with no successful call yet is charged `penalty`
+        """
+        latency = self.latency if self.latency is not None else penalty
+        return latency * (1 + ERROR_WEIGHT * self.error_rate)
+
+    def record(self, seconds: float, failed: bool, now: float) -> None:
+        alpha = EWMA_ALPHA
+        if self.calls:
+            alpha = max(alpha, 1 - math.exp(-(now - self.sampled_at) / DECAY_SECONDS))
+        self.calls += 1
+        self.sampled_at = now
+        self.error_rate += alpha * ((1.0 if failed else 0.0) - self.error_rate)
+        if not failed:
+            self.latency = seconds if self.latency is None else self.latency + alpha * (seconds - self.latency)
+
+
+class RegionPool:
+    """
+    Drop-in for a bedrock-runtime client that spreads invoke_model over several regions
+    """
+
+    def __init__(self, regions: List[str], client_factory: Callable[[Optional[str]], object],
+                 rng: Optional[random.Random] = None, clock: Callable[[], float] = time.perf_counter):
+        self.clients = {region: client_factory(region) for region in regions or [None]}
+        self.stats: Dict[Tuple[Optional[str], str], RegionStats] = {}
+        self.random = rng or random.Random()
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def ranked(self, model_id: str) -> List[RegionStats]:
+        """
+        Regions in the order to try them for a model: regions never called first, then by
+        score. A region whose calls have only failed is scored at the slowest measured latency
+        (one second if none is measured), so its error rate ranks it behind every healthy one.
+        With probability EXPLORE_RATE a random other region is moved to the front.
+        """
+        with self.lock:
+            candidates = []
+            for region, client in self.clients.items():
+                key = (region, model_id)
+                if key not in self.stats:
+                    self.stats[key] = RegionStats(region, model_id, client)
+                candidates.append(self.stats[key])
+            penalty = max((stats.latency for stats in candidates if stats.latency is not None), default=1.0)
+            ranked = sorted(candidates, key=lambda stats: (stats.calls > 0, stats.score(penalty)))
+            if len(ranked) > 1 and ranked[0].calls and self.random.random() < EXPLORE_RATE:
+                ranked.insert(0, ranked.pop(self.random.randrange(1, len(ranked))))
+        return ranked
+
+    def invoke_model(self, sample: bool = True, **kwargs) -> Dict:
+        """
+        invoke_model in the best region for kwargs['modelId']. With sample=False the call
+        is routed the same way but left out of the estimates, for warm-up calls whose
+        latency says nothing about real requests.
+        """
+        ranked = self.ranked(kwargs.get('modelId', ''))
+        attempts = ranked[:2] if FAILOVER else ranked[:1]
+        for attempt, stats in enumerate(attempts):
+            started = self.clock()
+            try:
+                response = stats.client.invoke_model(**kwargs)
+            except Exception as e:
+                caller_error = circuit_breaker.is_caller_error(e)
+                if sample and not caller_error:
+                    finished = self.clock()
+                    with self.lock:
+                        stats.record(finished - started, True, finished)
+                # A bad request fails the same way everywhere
+                if caller_error or attempt == len(attempts) - 1:
+                    raise
+                continue
+            if sample:
+                finished = self.clock()
+                with self.lock:
+                    stats.record(finished - started, False, finished)
+            return response
+
+    def snapshot(self) -> List[Dict]:
+        """
+        Current estimates per region and model, for logs and benchmarks
+        """
+        with self.lock:
+            return [
+                {'region': stats.region, 'modelId': stats.model_id,
+                 'latencyMs': round((stats.latency or 0.0) * 1000, 1),
+                 'errorRate': round(stats.error_rate, 3), 'calls': stats.calls}
+                for stats in self.stats.values()
+            ]
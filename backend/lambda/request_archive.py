@@ -0,0 +1,286 @@
+import gzip
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import Attr
+from msm_runtime import dumps, loads
+
+# Cold tier for old requests. A scheduled job moves requests whose createdAt is older than
+# RETENTION_DAYS out of the requests table into gzip JSON-lines files partitioned by month
+# ("requests/year=2024/month=03/part-<run>.jsonl.gz", readable by zcat or Athena). Each file
+# is a series of gzip members of BLOCK_RECORDS records; a per-partition index maps request
+# ID -> (part, byte offset, length) of its block, so a lookup by ID is one small index read
+# (cached) plus one ranged read. Request IDs carry their creation time, so the partition of
+# an ID is known without any lookup. Unassigned requests stay in the hot table.
+ARCHIVE_BUCKET = os.environ.get('ARCHIVE_BUCKET', '')
+ARCHIVE_PATH = os.environ.get('ARCHIVE_PATH', '')
+ARCHIVE_PREFIX = os.environ.get('ARCHIVE_PREFIX', 'requests')
+RETENTION_DAYS = int(os.environ.get('ARCHIVE_RETENTION_DAYS', '365'))
+BLOCK_RECORDS = int(os.environ.get('ARCHIVE_BLOCK_RECORDS', '64'))
+# Requests archived per flush; bounds memory and the work lost if the job times out
+FLUSH_RECORDS = int(os.environ.get('ARCHIVE_FLUSH_RECORDS', '2000'))
+INDEX_CACHE_PARTITIONS = 32
+# A cached partition index older than this is re-read when it does not list an ID
+INDEX_REFRESH_SECONDS = 60
+INDEX_NAME = '_index.json.gz'
+KEEP_STATUS = 'unassigned'
+
+REQUEST_ID_PATTERN = re.compile(r'^REQ-(\d{4})(\d{2})\d{8}-\d+$')
+
+
+class LocalStore:
+    """
+    Archive files under a local directory (development and benchmarks)
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get_range(self, key: str, start: int, length: int) -> bytes:
+        with open(self.path(key), 'rb') as f:
+            f.seek(start)
+            return f.read(length)
+
+
+class S3Store:
+    """
+    Archive files in an S3 bucket
+    """
+
+    def __init__(self, bucket: str, client=None):
+        self.bucket = bucket
+        self.client = client or boto3.client('s3')
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+
+    def get_range(self, key: str, start: int, length: int) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{start + length - 1}")
+        return response['Body'].read()
+
+
+def store_from_env():
+    """
+    The configured archive store, or None when tiering is not configured
+    """
+    if ARCHIVE_BUCKET:
+        return S3Store(ARCHIVE_BUCKET)
+    if ARCHIVE_PATH:
+        return LocalStore(ARCHIVE_PATH)
+    return None
+
+
+def partition_of(created_at: str) -> str:
+    return f"year={created_at[:4]}/month={created_at[5:7]}"
+
+
+def partition_of_id(request_id: str) -> Optional[str]:
+    match = REQUEST_ID_PATTERN.match(request_id or '')
+    return f"year={match.group(1)}/month={match.group(2)}" if match else None
+
+
+def encode_blocks(items: List[Dict]) -> Tuple[bytes, Dict[str, List[int]]]:
+    """
+    gzip members of BLOCK_RECORDS JSON lines each, and {id: [offset, length]} of each record's block
+    """
+    data = bytearray()
+    locations: Dict[str, List[int]] = {}
+    for start in range(0, len(items), BLOCK_RECORDS):
+        block = items[start:start + BLOCK_RECORDS]
+        member = gzip.compress(('\n'.join(dumps(item) for item in block) + '\n').encode('utf-8'), mtime=0)
+        for item in block:
+            locations[item['id']] = [len(data), len(member)]
+        data.extend(member)
+    return bytes(data), locations
+
+
+class ArchiveWriter:
+    """
+    Appends archived requests to month partitions: one new part file per partition and flush,
+    then the partition index is rewritten to include it
+    """
+
+    def __init__(self, store, run_id: Optional[str] = None):
+        self.store = store
+        self.run_id = run_id or datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        self.flushes = 0
+        self.bytes_written = 0
+
+    def write(self, items: List[Dict]) -> Dict[str, int]:
+        """
+        Archive items; returns {partition: records}. Safe to repeat for the same items: the index
+        then points at the newest copy.
+        """
+        by_partition: Dict[str, List[Dict]] = {}
+        for item in items:
+            by_partition.setdefault(partition_of(item['createdAt']), []).append(item)
+
+        self.flushes += 1
+        part = f"part-{self.run_id}-{self.flushes:04d}.jsonl.gz"
+        written = {}
+        for partition, records in sorted(by_partition.items()):
+            records.sort(key=lambda record: record['id'])
+            data, locations = encode_blocks(records)
+            self.store.put(f"{ARCHIVE_PREFIX}/{partition}/{part}", data)
+            self.bytes_written += len(data)
+
+            index_key = f"{ARCHIVE_PREFIX}/{partition}/{INDEX_NAME}"
+            existing = self.store.get(index_key)
+            index = loads(gzip.decompress(existing)) if existing else {'parts': [], 'ids': {}}
+            index['parts'].append(part)
+            part_number = len(index['parts']) - 1
+            for request_id, (offset, length) in locations.items():
+                index['ids'][request_id] = [part_number, offset, length]
+            self.store.put(index_key, gzip.compress(dumps(index).encode('utf-8'), mtime=0))
+            written[partition] = len(records)
+        return written
+
+
+class ArchiveReader:
+    """
+    Looks archived requests up by ID, keeping recently used partition indexes in memory
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.indexes: 'OrderedDict[str, Tuple[float, Dict]]' = OrderedDict()
+        self.lock = threading.Lock()
+
+    def index(self, partition: str, refresh: bool = False) -> Optional[Dict]:
+        with self.lock:
+            cached = self.indexes.get(partition)
+            if cached and not (refresh and time.monotonic() - cached[0] > INDEX_REFRESH_SECONDS):
+                self.indexes.move_to_end(partition)
+                return cached[1]
+        data = self.store.get(f"{ARCHIVE_PREFIX}/{partition}/{INDEX_NAME}")
+        if data is None:
+            return None
+        index = loads(gzip.decompress(data))
+        with self.lock:
+            self.indexes[partition] = (time.monotonic(), index)
+            self.indexes.move_to_end(partition)
+            while len(self.indexes) > INDEX_CACHE_PARTITIONS:
+                self.indexes.popitem(last=False)
+        return index
+
+    def get(self, request_id: str) -> Optional[Dict]:
+        partition = partition_of_id(request_id)
+        if partition is None:
+            return None
+        index = self.index(partition)
+        if index is not None and request_id not in index['ids']:
+            # Archived since the index was cached?
+            index = self.index(partition, refresh=True)
+        if index is None or request_id not in index['ids']:
+            return None
+
+        return read_record(self.store, partition, index, request_id)
+
+
+def read_record(store, partition: str, index: Dict, request_id: str) -> Optional[Dict]:
+    """
+    Decompress the one block holding request_id and pick its record out
+    """
+    part_number, offset, length = index['ids'][request_id]
+    block = gzip.decompress(store.get_range(f"{ARCHIVE_PREFIX}/{partition}/{index['parts'][part_number]}", offset, length))
+    for line in block.decode('utf-8').splitlines():
+        record = loads(line)
+        if record.get('id') == request_id:
+            return record
+    return None
+
+
+def expired_filter(now: Optional[datetime] = None, retention_days: Optional[int] = None):
+    """
+    Scan filter for requests past the retention window that are no longer waiting for a responder
+    """
+    days = RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = ((now or datetime.utcnow()) - timedelta(days=days)).isoformat()
+    return Attr('createdAt').lt(cutoff) & Attr('status').ne(KEEP_STATUS)
+
+
+def archive_expired(table, writer: ArchiveWriter, on_archived: Optional[Callable[[List[Dict]], None]] = None,
+                    now: Optional[datetime] = None, retention_days: Optional[int] = None) -> Dict:
+    """
+    Move expired requests from the hot table to the archive. Items are deleted from the table
+    only after their part file and partition index are written.
+    """
+    summary = {'scanned': 0, 'archived': 0, 'partitions': {}}
+    scan_kwargs = {'FilterExpression': expired_filter(now, retention_days)}
+    pending: List[Dict] = []
+
+    def flush():
+        for partition, count in writer.write(pending).items():
+            summary['partitions'][partition] = summary['partitions'].get(partition, 0) + count
+        with table.batch_writer() as batch:
+            for item in pending:
+                batch.delete_item(Key={'id': item['id']})
+        if on_archived:
+            on_archived(pending)
+        summary['archived'] += len(pending)
+        pending.clear()
+
+    while True:
+        response = table.scan(**scan_kwargs)
+        summary['scanned'] += response.get('ScannedCount', 0)
+        pending.extend(response.get('Items', []))
+        if len(pending) >= FLUSH_RECORDS:
+            flush()
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    if pending:
+        flush()
+    summary['bytesWritten'] = writer.bytes_written
+    return summary
+
+
+def iter_partition(store, partition: str) -> Iterable[Dict]:
+    """
+    Every archived record of a partition, newest copy only (for exports and checks)
+    """
+    index = ArchiveReader(store).index(partition)
+    if index is None:
+        return
+    blocks: Dict[Tuple[int, int, int], List[str]] = {}
+    for request_id, location in index['ids'].items():
+        blocks.setdefault(tuple(location), []).append(request_id)
+    for (part_number, offset, length), request_ids in sorted(blocks.items()):
+        wanted = set(request_ids)
+        block = gzip.decompress(store.get_range(f"{ARCHIVE_PREFIX}/{partition}/{index['parts'][part_number]}", offset, length))
+        for line in block.decode('utf-8').splitlines():
+            record = loads(line)
+            if record.get('id') in wanted:
+                yield record
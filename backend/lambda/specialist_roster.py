@@ -0,0 +1,173 @@
+import boto3
+import os
+from decimal import Decimal
+from typing import Dict, List, Optional
+from boto3.dynamodb.conditions import Key
+
+# Volunteer specialist roster: one entry per (specialistId, coverage) where coverage is
+# "<specialty>#<subspecialty or *>#<Adult|Child|Any>". Every subspecialty entry also gets a
+# parent "<specialty>#*#<ageGroup>" entry so matching can fall back to the specialty.
+dynamodb = boto3.resource('dynamodb')
+roster_table_name = os.environ.get('ROSTER_TABLE', 'volunteer-specialists')
+roster_table = dynamodb.Table(roster_table_name)
+
+# Sparse GSI: matchKey is only set while a specialist is available and under capacity,
+# so a query returns takeable specialists ordered by current load without any filtering.
+MATCH_INDEX = 'MatchIndex'
+ANY_SUBSPECIALTY = '*'
+ANY_AGE_GROUP = 'Any'
+AGE_GROUPS = ('Adult', 'Child', ANY_AGE_GROUP)
+
+def coverage_key(specialty: str, subspecialty: Optional[str], age_group: str) -> str:
+    """
+    Build the coverage/match key for a specialty, subspecialty and age group
+    """
+    return f"{specialty}#{subspecialty or ANY_SUBSPECIALTY}#{age_group}"
+
+def parse_available(value) -> bool:
+    """
+    Read an `available` flag: a boolean, or the string "true" or "false" in any case.
+    Anything else raises ValueError rather than guessing.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    raise ValueError(f"available must be true or false, got {value!r}")
+
+def parse_case_count(value) -> int:
+    """
+    Read an `activeCases` or `maxCases` count: a non-negative integer, or a string of digits.
+    Anything else raises ValueError rather than guessing.
+    """
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, (int, Decimal)) and not isinstance(value, bool) and value == int(value) and value >= 0:
+        return int(value)
+    raise ValueError(f"case counts must be non-negative integers, got {value!r}")
+
+def is_takeable(specialist: Dict) -> bool:
+    """
+    Whether a specialist should currently appear in match results
+    """
+    return (parse_available(specialist.get('available', True))
+            and parse_case_count(specialist.get('activeCases', 0)) < parse_case_count(specialist.get('maxCases', 1)))
+
+def build_roster_entries(specialist: Dict) -> List[Dict]:
+    """
+    Expand a specialist profile into one roster entry per coverage key
+    """
+    specialty = specialist['specialty']
+    subspecialties = specialist.get('subspecialties') or []
+    age_groups = specialist.get('ageGroups') or [ANY_AGE_GROUP]
+    takeable = is_takeable(specialist)
+
+    coverages = []
+    for age_group in age_groups:
+        for subspecialty in subspecialties:
+            coverages.append((subspecialty, age_group))
+        coverages.append((None, age_group))
+
+    entries = []
+    for subspecialty, age_group in coverages:
+        key = coverage_key(specialty, subspecialty, age_group)
+        entry = {
+            'specialistId': specialist['specialistId'],
+            'coverage': key,
+            'name': specialist.get('name', ''),
+            'email': specialist.get('email', ''),
+            'specialty': specialty,
+            'subspecialty': subspecialty or '',
+            'ageGroup': age_group,
+            'available': parse_available(specialist.get('available', True)),
+            'activeCases': parse_case_count(specialist.get('activeCases', 0)),
+            'maxCases': parse_case_count(specialist.get('maxCases', 1))
+        }
+        if takeable:
+            entry['matchKey'] = key
+        entries.append({k: v for k, v in entry.items() if v not in [None, '']})
+    return entries
+
+def put_specialist(specialist: Dict) -> int:
+    """
+    Replace all roster entries for a specialist. Returns the number of entries written.
+    """
+    existing = roster_table.query(
+        KeyConditionExpression=Key('specialistId').eq(specialist['specialistId']),
+        ProjectionExpression='specialistId, coverage'
+    ).get('Items', [])
+
+    entries = build_roster_entries(specialist)
+    new_keys = {entry['coverage'] for entry in entries}
+
+    with roster_table.batch_writer() as batch:
+        for stale in existing:
+            if stale['coverage'] not in new_keys:
+                batch.delete_item(Key={'specialistId': stale['specialistId'], 'coverage': stale['coverage']})
+        for entry in entries:
+            batch.put_item(Item=entry)
+
+    return len(entries)
+
+def match_levels(specialty: str, subspecialty: Optional[str], age_group: Optional[str]) -> List[tuple]:
+    """
+    Ordered (match level, coverage keys) pairs to query, most specific level first
+    """
+    age_groups = [age_group, ANY_AGE_GROUP] if age_group in ('Adult', 'Child') else [ANY_AGE_GROUP]
+    levels = []
+    if subspecialty:
+        levels.append(('subspecialty', [coverage_key(specialty, subspecialty, group) for group in age_groups]))
+    levels.append(('specialty', [coverage_key(specialty, None, group) for group in age_groups]))
+    return levels
+
+def query_match_index(key: str, limit: int) -> List[Dict]:
+    """
+    Takeable specialists for one coverage key, lowest load first
+    """
+    response = roster_table.query(
+        IndexName=MATCH_INDEX,
+        KeyConditionExpression=Key('matchKey').eq(key),
+        ScanIndexForward=True,
+        Limit=limit
+    )
+    return response.get('Items', [])
+
+def find_candidates(specialty: str, subspecialty: Optional[str], age_group: Optional[str], limit: int = 10) -> List[Dict]:
+    """
+    Resolve a case to ranked specialists using indexed queries on the sparse match index.
+
+    Each coverage key is a single Query returning at most `limit` specialists ordered by
+    load, so cost depends on `limit` and not on roster size. Subspecialty matches rank
+    above parent-specialty fallbacks; within a level, lower load ranks first.
+    """
+    candidates = []
+    seen = set()
+
+    for level, keys in match_levels(specialty, subspecialty, age_group):
+        if len(candidates) >= limit:
+            break
+        # Over-fetch by the number already chosen so duplicates cannot starve the page
+        entries = []
+        for key in keys:
+            entries.extend(query_match_index(key, limit + len(seen)))
+        entries.sort(key=lambda entry: int(entry.get('activeCases', 0)))
+
+        for entry in entries:
+            if entry['specialistId'] in seen:
+                continue
+            seen.add(entry['specialistId'])
+            candidates.append({
+                'specialistId': entry['specialistId'],
+                'name': entry.get('name'),
+                'email': entry.get('email'),
+                'specialty': entry.get('specialty'),
+                'subspecialty': entry.get('subspecialty') or None,
+                'ageGroup': entry.get('ageGroup'),
+                'activeCases': int(entry.get('activeCases', 0)),
+                'maxCases': int(entry.get('maxCases', 1)),
+                'matchLevel': level
+            })
+            if len(candidates) >= limit:
+                break
+
+    return candidates
@@ -0,0 +1,81 @@
+import re
+from typing import Dict, List, Optional
+
+# Specialties are coded S01..Snn in catalogue order and subspecialties by their position
+# within the specialty (S05.2). Prompts list every name once next to its code and the
+# model answers with codes, which decode back to canonical names with a dict lookup.
+CODE_PATTERN = re.compile(r'^\s*(S\d{2})(?:\.(\d{1,2}))?\s*$', re.IGNORECASE)
+
+
+class SpecialtyCatalogue:
+    """
+    Code tables and precomputed prompt listings for a specialty -> subspecialties mapping
+    """
+
+    def __init__(self, specialties: Dict[str, List[str]]):
+        self.specialty_by_code: Dict[str, str] = {}
+        self.code_by_specialty: Dict[str, str] = {}
+        self.subspecialty_by_code: Dict[str, str] = {}
+        self.subspecialties: Dict[str, frozenset] = {}
+        coded_lines = []
+        named_lines = []
+
+        for index, (specialty, subspecialties) in enumerate(specialties.items(), start=1):
+            code = f"S{index:02d}"
+            name = specialty.strip()
+            self.specialty_by_code[code] = specialty
+            self.code_by_specialty[name] = code
+            self.subspecialties[specialty] = frozenset(subspecialties)
+            entries = []
+            for position, subspecialty in enumerate(subspecialties, start=1):
+                self.subspecialty_by_code[f"{code}.{position}"] = subspecialty
+                entries.append(f"{position} {subspecialty}")
+            coded_lines.append(f"{code} {name}" + (f": {'; '.join(entries)}" if entries else ''))
+            named_lines.append(name + (f": {'; '.join(subspecialties)}" if subspecialties else ''))
+
+        # "S05 Emergency Medicine Physician: 1 Anesthesiology Critical Care Medicine; 2 ..."
+        self.coded_listing = '\n'.join(coded_lines)
+        # Same listing without codes, for prompts whose output is free text
+        self.named_listing = '\n'.join(named_lines)
+
+    def decode_specialty(self, value) -> Optional[str]:
+        """
+        Canonical specialty for a code (or an exact canonical name), else None
+        """
+        if not isinstance(value, str):
+            return None
+        specialty = self.specialty_by_code.get(value)
+        if specialty is not None:
+            return specialty
+        code = self.code_by_specialty.get(value.strip())
+        if code is not None:
+            return self.specialty_by_code[code]
+        # Tolerate case and padding differences such as "s05 "
+        match = CODE_PATTERN.match(value)
+        return self.specialty_by_code.get(match.group(1).upper()) if match else None
+
+    def decode_subspecialty(self, value, specialty: Optional[str] = None) -> Optional[str]:
+        """
+        Canonical subspecialty for a full code, a bare position within `specialty`, or an
+        exact canonical name. Unknown non-code text is returned unchanged.
+        """
+        if value is None:
+            return None
+        subspecialty = self.subspecialty_by_code.get(value) if isinstance(value, str) else None
+        if subspecialty is not None:
+            return subspecialty
+        text = str(value).strip()
+        if text.lower() in ('', 'null', 'none'):
+            return None
+        match = CODE_PATTERN.match(text)
+        if match and match.group(2):
+            return self.subspecialty_by_code.get(f"{match.group(1).upper()}.{int(match.group(2))}")
+        if text.isdigit():
+            code = self.code_by_specialty.get((specialty or '').strip())
+            return self.subspecialty_by_code.get(f"{code}.{int(text)}") if code else None
+        if match:
+            return None
+        return text
+
+    def is_listed(self, specialty: str, subspecialty: Optional[str]) -> bool:
+        return subspecialty in self.subspecialties.get(specialty, ())
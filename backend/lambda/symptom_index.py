@@ -0,0 +1,305 @@
+import boto3
+import math
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from boto3.dynamodb.conditions import Key
+
+# Inverted index table: one posting per (term, request) plus one document-frequency item per term
+dynamodb = boto3.resource('dynamodb')
+index_table_name = os.environ.get('INDEX_TABLE', 'medical-request-index')
+index_table = dynamodb.Table(index_table_name)
+
+# Posting sort keys are "<createdAt>#<id>" so a term's postings come back newest first.
+# The document-frequency item sorts before every posting ('#' < '0').
+DF_KEY = '#df'
+ALL_DOCS_TERM = '#all'
+
+INDEXED_FIELDS = ('symptoms', 'additionalInfo')
+MAX_INDEX_TERMS = 64          # Most frequent terms kept per request
+MAX_QUERY_TERMS = 8           # Extra query terms are ignored
+BATCH_GET_KEYS = 100          # BatchGetItem key limit
+SCAN_BATCH = 200              # Rarest-term postings read per query
+RELEVANCE_WINDOW = 1000       # Recent postings of the rarest term ranked together by relevance
+MAX_SCAN_POSTINGS = 2000      # Postings one page may read before returning what it has
+DF_UPDATE_WORKERS = 8
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been before but by can could did do does for from had has
+have he her him his how i if in into is it its may me my no not of on or our patient patients she so some
+than that the their them then there these they this those to up was we were what when which who with would
+year years old you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase text and split into searchable terms, dropping stopwords and very short tokens
+    """
+    if not text:
+        return []
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 2 and token not in STOPWORDS
+    ]
+
+def posting_key(item: Dict) -> str:
+    """
+    Recency-ordered sort key for a request's postings
+    """
+    return f"{item.get('createdAt', '')}#{item['id']}"
+
+def index_request(item: Dict) -> int:
+    """
+    Write postings and bump document frequencies for a newly stored request.
+    Returns the number of indexed terms.
+    """
+    term_counts = Counter()
+    for field in INDEXED_FIELDS:
+        term_counts.update(tokenize(item.get(field, '')))
+
+    terms = term_counts.most_common(MAX_INDEX_TERMS)
+    if not terms:
+        return 0
+
+    request_key = posting_key(item)
+    with index_table.batch_writer() as batch:
+        for term, tf in terms:
+            batch.put_item(Item={
+                'term': term,
+                'requestKey': request_key,
+                'id': item['id'],
+                'tf': tf
+            })
+
+    # Document frequencies are independent counters - update them concurrently
+    df_terms = [term for term, _ in terms] + [ALL_DOCS_TERM]
+    with ThreadPoolExecutor(max_workers=DF_UPDATE_WORKERS) as executor:
+        list(executor.map(increment_document_frequency, df_terms))
+
+    return len(terms)
+
+def remove_request(item: Dict) -> int:
+    """
+    Delete a request's postings and lower the document frequencies they counted toward,
+    for requests leaving the hot table. Returns the number of removed terms.
+    """
+    term_counts = Counter()
+    for field in INDEXED_FIELDS:
+        term_counts.update(tokenize(item.get(field, '')))
+
+    terms = [term for term, _ in term_counts.most_common(MAX_INDEX_TERMS)]
+    if not terms:
+        return 0
+
+    request_key = posting_key(item)
+    with index_table.batch_writer() as batch:
+        for term in terms:
+            batch.delete_item(Key={'term': term, 'requestKey': request_key})
+
+    with ThreadPoolExecutor(max_workers=DF_UPDATE_WORKERS) as executor:
+        list(executor.map(lambda term: increment_document_frequency(term, -1), terms + [ALL_DOCS_TERM]))
+
+    return len(terms)
+
+def increment_document_frequency(term: str, amount: int = 1) -> None:
+    """
+    Atomically add `amount` (one by default) to a term's document frequency
+    """
+    index_table.update_item(
+        Key={'term': term, 'requestKey': DF_KEY},
+        UpdateExpression='ADD df :amount',
+        ExpressionAttributeValues={':amount': amount}
+    )
+
+def get_document_frequencies(terms: List[str]) -> Dict[str, int]:
+    """
+    Fetch document frequencies for the query terms (and the corpus size) in one batch read
+    """
+    keys = [{'term': term, 'requestKey': DF_KEY} for term in terms + [ALL_DOCS_TERM]]
+    frequencies = {term: 0 for term in terms + [ALL_DOCS_TERM]}
+
+    request_items = {index_table_name: {'Keys': keys}}
+    while request_items:
+        response = dynamodb.batch_get_item(RequestItems=request_items)
+        for entry in response.get('Responses', {}).get(index_table_name, []):
+            frequencies[entry['term']] = int(entry.get('df', 0))
+        request_items = response.get('UnprocessedKeys') or None
+
+    return frequencies
+
+def read_postings(term: str, limit: int, after: Optional[str] = None,
+                  bounds: Optional[Tuple[str, str]] = None) -> Tuple[List[Tuple[str, str, int]], bool]:
+    """
+    Up to `limit` of a term's postings, newest first, starting after the requestKey `after`
+    and, with `bounds`, only keys within (lowest, highest). Returns ([(requestKey, id, tf)], more).
+    """
+    key_range = Key('requestKey').between(*bounds) if bounds else Key('requestKey').gt(DF_KEY)
+    query_kwargs = {
+        'KeyConditionExpression': Key('term').eq(term) & key_range,
+        'ScanIndexForward': False,
+        'ProjectionExpression': 'requestKey, id, tf',
+        'Limit': limit
+    }
+    if after:
+        query_kwargs['ExclusiveStartKey'] = {'term': term, 'requestKey': after}
+    response = index_table.query(**query_kwargs)
+    postings = [
+        (posting['requestKey'], posting['id'], int(posting.get('tf', 1)))
+        for posting in response.get('Items', [])
+    ]
+    return postings, 'LastEvaluatedKey' in response
+
+def lookup_postings(term: str, request_keys: List[str]) -> Dict[str, int]:
+    """
+    Point-read the term's postings for the given requests, as {requestKey: tf} for those that have one
+    """
+    found = {}
+    for start in range(0, len(request_keys), BATCH_GET_KEYS):
+        request_items = {index_table_name: {
+            'Keys': [{'term': term, 'requestKey': key} for key in request_keys[start:start + BATCH_GET_KEYS]],
+            'ProjectionExpression': 'requestKey, tf'
+        }}
+        while request_items:
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for posting in response.get('Responses', {}).get(index_table_name, []):
+                found[posting['requestKey']] = int(posting.get('tf', 1))
+            request_items = response.get('UnprocessedKeys') or None
+    return found
+
+def term_weights(terms: List[str], frequencies: Dict[str, int]) -> Dict[str, float]:
+    """
+    Inverse document frequency of each query term
+    """
+    total_docs = max(frequencies[ALL_DOCS_TERM], 1)
+    return {term: math.log(1 + total_docs / max(frequencies[term], 1)) for term in terms}
+
+Match = Tuple[str, str, float]
+
+def match_postings(postings: List[Tuple[str, str, int]], terms: List[str], by_rarity: List[str],
+                   weights: Dict[str, float]) -> List[Match]:
+    """
+    The rarest term's postings that every other term also has, as (requestKey, id, score)
+    in posting order. Other terms are checked with point reads, rarest first.
+    """
+    tfs = {key: {by_rarity[0]: tf} for key, _, tf in postings}
+    for term in by_rarity[1:]:
+        if not tfs:
+            break
+        found = lookup_postings(term, list(tfs))
+        tfs = {key: {**term_tfs, term: found[key]} for key, term_tfs in tfs.items() if key in found}
+    # Summed in query order, so the same request always gets the same score for the same weights
+    return [
+        (key, request_id, sum(tfs[key][term] * weights[term] for term in terms))
+        for key, request_id, _ in postings if key in tfs
+    ]
+
+def search(query: str, sort: str = 'relevance', limit: int = 20,
+           position: Optional[Dict] = None) -> Tuple[List[Match], List[str], Optional[Dict]]:
+    """
+    Return (matches, query terms used, position of the next page or None) for requests
+    matching every query term. Matches are (requestKey, id, score) in result order.
+
+    Only the rarest term's posting list is read, newest first and a batch at a time; each
+    posting is checked against the other terms with point reads. A page stops reading once
+    it is full or has read MAX_SCAN_POSTINGS postings, so its cost follows the page size
+    rather than how common the terms are. `recent` pages continue after the last request
+    returned. `relevance` ranks RELEVANCE_WINDOW postings at a time, newest window first;
+    the position pins the window, the last (score, requestKey) and the term weights, so
+    requests stored between pages never shift results.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return [], [], None
+
+    frequencies = get_document_frequencies(terms)
+    if any(frequencies[term] == 0 for term in terms):
+        return [], terms, None
+    position = position or {}
+    weights = position.get('w')
+    if not isinstance(weights, dict) or set(weights) != set(terms):
+        weights = term_weights(terms, frequencies)
+
+    by_rarity = sorted(terms, key=lambda t: frequencies[t])
+    if sort == 'recent':
+        matches, next_position = search_recent(terms, by_rarity, weights, limit, position.get('after'))
+    else:
+        matches, next_position = search_relevance(terms, by_rarity, weights, limit, position)
+    if next_position is not None:
+        next_position['w'] = weights
+    return matches, terms, next_position
+
+def search_recent(terms: List[str], by_rarity: List[str], weights: Dict[str, float], limit: int,
+                  after: Optional[str]) -> Tuple[List[Match], Optional[Dict]]:
+    """
+    Newest matches after the requestKey `after`, reading the rarest term's postings in
+    batches that start at the page size and double up to SCAN_BATCH
+    """
+    matches: List[Match] = []
+    scanned = 0
+    batch = min(limit, SCAN_BATCH)
+    while True:
+        postings, more = read_postings(by_rarity[0], batch, after)
+        batch = min(batch * 2, SCAN_BATCH)
+        scanned += len(postings)
+        for match in match_postings(postings, terms, by_rarity, weights):
+            matches.append(match)
+            if len(matches) == limit:
+                unread = match[0] != postings[-1][0] or more
+                return matches, {'after': match[0]} if unread else None
+        if not more or not postings:
+            return matches, None
+        after = postings[-1][0]
+        if scanned >= MAX_SCAN_POSTINGS:
+            # A partial page; the next one continues where this one stopped reading
+            return matches, {'after': after}
+
+def search_relevance(terms: List[str], by_rarity: List[str], weights: Dict[str, float], limit: int,
+                     position: Dict) -> Tuple[List[Match], Optional[Dict]]:
+    """
+    Best matches by score within windows of RELEVANCE_WINDOW postings of the rarest term
+    """
+    matches: List[Match] = []
+    scanned = 0
+    bounds = (position['lo'], position['hi']) if 'lo' in position else None
+    after = position.get('after')
+    last = (position['s'], position['k']) if 'k' in position else None
+    while True:
+        # Read one window: the one the position pins, or the next RELEVANCE_WINDOW postings
+        window: List[Tuple[str, str, int]] = []
+        more = True
+        window_after = None if bounds else after
+        while more and len(window) < RELEVANCE_WINDOW:
+            postings, more = read_postings(by_rarity[0], min(SCAN_BATCH, RELEVANCE_WINDOW - len(window)),
+                                           window_after, bounds)
+            if not postings:
+                more = False
+                break
+            window.extend(postings)
+            window_after = postings[-1][0]
+        scanned += len(window)
+        if not window:
+            return matches, None
+        if bounds is None:
+            bounds = (window[-1][0], window[0][0])
+            more_after_window = more
+        else:
+            more_after_window = True  # A re-read window only knows its own bounds
+
+        ranked = sorted(match_postings(window, terms, by_rarity, weights),
+                        key=lambda match: (match[2], match[0]), reverse=True)
+        if last is not None:
+            ranked = [match for match in ranked if (match[2], match[0]) < last]
+        taken = ranked[:limit - len(matches)]
+        matches.extend(taken)
+        if len(matches) == limit and len(ranked) > len(taken):
+            final = taken[-1]
+            return matches, {'lo': bounds[0], 'hi': bounds[1], 's': final[2], 'k': final[0]}
+        if not more_after_window:
+            return matches, None
+        next_position = {'after': bounds[0]}
+        if len(matches) == limit or scanned >= MAX_SCAN_POSTINGS:
+            return matches, next_position
+        bounds, after, last = None, bounds[0], None
@@ -0,0 +1,43 @@
+"""
+Shared runtime for the Medical Specialty Matchmaker Lambdas, shipped as a Lambda layer.
+
+Configuration is parsed once at import (cold start) so per-invocation work is limited
+to building the response itself.
+"""
+from .admission import RequestRejected, check_body_size, check_text, check_turns, rejection_response
+from .compression import compress_response, negotiate_encoding
+from .cors import CorsPolicy, cors_policy
+from .events import get_header, parse_body
+from .json_codec import JSON_BACKEND, dumps, loads
+from .logs import log_error, log_event
+from .metrics import put_metric
+from .responses import create_response
+from .tracing import current_trace_id, finish_trace, span, start_trace
+from .warmup import record_invocation, run_warmup
+
+__all__ = [
+    'RequestRejected',
+    'check_body_size',
+    'check_text',
+    'check_turns',
+    'rejection_response',
+    'compress_response',
+    'negotiate_encoding',
+    'CorsPolicy',
+    'cors_policy',
+    'get_header',
+    'parse_body',
+    'JSON_BACKEND',
+    'dumps',
+    'loads',
+    'log_error',
+    'log_event',
+    'put_metric',
+    'create_response',
+    'current_trace_id',
+    'finish_trace',
+    'span',
+    'start_trace',
+    'record_invocation',
+    'run_warmup'
+]
@@ -0,0 +1,95 @@
+import logging
+import os
+from typing import Dict, Optional
+
+from .logs import log_event
+from .metrics import put_metric
+from .responses import create_response
+
+# Admission control: cheap checks that run before the body is parsed and before any prompt is
+# built, so an oversized or runaway request costs microseconds instead of model quota. The raw
+# body size is checked before parsing and field sizes right after. Request rates are limited
+# by API Gateway throttling in front of the Lambda, not here: a container serves one request
+# at a time, so an in-process cap would never see two.
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', '262144'))
+
+
+class RequestRejected(Exception):
+    """
+    A request turned away by admission control; status is 400 or 413
+    """
+
+    def __init__(self, status: int, reason: str, message: str, field: Optional[str] = None,
+                 limit: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.field = field
+        self.limit = limit
+
+    def body(self) -> Dict:
+        body = {'error': str(self), 'reason': self.reason}
+        if self.field:
+            body['field'] = self.field
+        if self.limit is not None:
+            body['limit'] = self.limit
+        return body
+
+
+def body_size(event: Dict) -> int:
+    """
+    Size of the raw request body; base64 bodies count as their decoded size
+    """
+    body = event.get('body') or ''
+    size = len(body)
+    return size * 3 // 4 if event.get('isBase64Encoded') else size
+
+
+def check_body_size(event: Dict, max_bytes: Optional[int] = None) -> None:
+    limit = MAX_BODY_BYTES if max_bytes is None else max_bytes
+    if limit and body_size(event) > limit:
+        raise RequestRejected(413, 'body_too_large', 'Request body too large', 'body', limit)
+
+
+def check_text(data: Dict, field: str, max_chars: int) -> None:
+    """
+    An optional string field of at most max_chars characters
+    """
+    value = data.get(field)
+    if value is None:
+        return
+    if not isinstance(value, str):
+        raise RequestRejected(400, 'invalid_field', f"{field} must be a string", field)
+    if len(value) > max_chars:
+        raise RequestRejected(413, 'field_too_large', f"{field} is too long", field, max_chars)
+
+
+def check_turns(data: Dict, field: str, max_turns: int, max_chars: int) -> None:
+    """
+    An optional list of {'sender', 'text'} messages: at most max_turns of them and max_chars of text in total
+    """
+    turns = data.get(field)
+    if turns is None:
+        return
+    if not isinstance(turns, list):
+        raise RequestRejected(400, 'invalid_field', f"{field} must be a list", field)
+    if len(turns) > max_turns:
+        raise RequestRejected(413, 'too_many_turns', f"{field} has too many messages", field, max_turns)
+    total = 0
+    for turn in turns:
+        if not isinstance(turn, dict) or not isinstance(turn.get('text'), str) or not isinstance(turn.get('sender'), str):
+            raise RequestRejected(400, 'invalid_field', f"{field} entries need sender and text strings", field)
+        total += len(turn['text'])
+    if total > max_chars:
+        raise RequestRejected(413, 'field_too_large', f"{field} is too long", field, max_chars)
+
+
+def rejection_response(error: RequestRejected, request_origin: Optional[str] = None,
+                       action: Optional[str] = None) -> Dict:
+    """
+    Log and count a rejection, and build its response
+    """
+    log_event('admission.rejected', logging.WARNING, action=action, status=error.status, reason=error.reason,
+              field=error.field, limit=error.limit)
+    put_metric('RequestRejected', 1, Reason=error.reason, Action=action or 'unknown')
+    return create_response(error.status, error.body(), request_origin)
@@ -0,0 +1,86 @@
+import base64
+import gzip
+import os
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional - bundle it in the layer to enable br
+    brotli = None
+
+# Bodies below this many bytes are sent as-is; compressing them costs more CPU than it saves
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '4'))
+
+# Server preference when the client weights several codings equally
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into {coding: q-value}
+    """
+    weights = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def negotiate_encoding(header: Optional[str]) -> Optional[str]:
+    """
+    Pick the best supported content coding the client accepts, or None for identity
+    """
+    weights = parse_accept_encoding(header)
+    wildcard = weights.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response: Dict, accept_encoding: Optional[str]) -> Dict:
+    """
+    Compress an API Gateway proxy response body when it is large enough and the client
+    accepts a supported coding. The body is returned base64-encoded with isBase64Encoded.
+    """
+    body = response.get('body')
+    if not body or response.get('isBase64Encoded'):
+        return response
+
+    raw = body.encode('utf-8')
+    if len(raw) < COMPRESSION_MIN_BYTES:
+        return response
+
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return response
+
+    headers = dict(response.get('headers') or {})
+    headers['Content-Encoding'] = encoding
+    headers['Vary'] = 'Origin, Accept-Encoding'
+
+    compressed = dict(response)
+    compressed['headers'] = headers
+    compressed['body'] = base64.b64encode(compress(raw, encoding)).decode('ascii')
+    compressed['isBase64Encoded'] = True
+    return compressed
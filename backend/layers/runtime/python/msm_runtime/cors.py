@@ -0,0 +1,57 @@
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger()
+
+ALLOWED_HEADERS = 'Content-Type,X-Trace-Id'
+EXPOSED_HEADERS = 'Server-Timing,X-Trace-Id,Retry-After'
+ALLOWED_METHODS = 'OPTIONS,POST,GET'
+
+
+class CorsPolicy:
+    """
+    CORS decision precomputed from ALLOWED_ORIGINS.
+
+    The origin list is split once, and the header block for every allowed origin is
+    built up front, so resolving a request is a set lookup plus a dict copy.
+    """
+
+    def __init__(self, allowed_origins: str):
+        self.allowed_origins: Tuple[str, ...] = tuple(
+            origin.strip() for origin in allowed_origins.split(',') if origin.strip()
+        ) or ('http://localhost:3000',)
+        self.allowed_set = frozenset(self.allowed_origins)
+        # CORS spec only allows a single origin in Access-Control-Allow-Origin;
+        # unmatched requests get the first one (typically the production URL)
+        self.default_origin = self.allowed_origins[0]
+        self.headers_by_origin: Dict[str, Dict[str, str]] = {
+            origin: {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': origin,
+                'Access-Control-Allow-Headers': ALLOWED_HEADERS,
+                'Access-Control-Allow-Methods': ALLOWED_METHODS,
+                'Access-Control-Expose-Headers': EXPOSED_HEADERS,
+                'Vary': 'Origin'  # Important for caching with multiple allowed origins
+            }
+            for origin in self.allowed_origins
+        }
+
+    def resolve(self, request_origin: Optional[str]) -> str:
+        """
+        Origin to return in Access-Control-Allow-Origin for this request
+        """
+        if request_origin in self.allowed_set:
+            return request_origin
+        if request_origin and len(self.allowed_origins) > 1:
+            logger.warning(f"CORS: Request from unauthorized origin {request_origin}. Allowed: {list(self.allowed_origins)}")
+        return self.default_origin
+
+    def headers(self, request_origin: Optional[str]) -> Dict[str, str]:
+        """
+        Fresh copy of the precomputed response headers for this request
+        """
+        return dict(self.headers_by_origin[self.resolve(request_origin)])
+
+
+cors_policy = CorsPolicy(os.environ.get('ALLOWED_ORIGINS', 'http://localhost:3000'))
@@ -0,0 +1,28 @@
+import base64
+from typing import Dict, Optional
+
+from .json_codec import loads
+
+
+def get_header(event: Dict, name: str) -> Optional[str]:
+    """
+    Case-insensitive header lookup on an API Gateway proxy event
+    """
+    headers = event.get('headers') or {}
+    value = headers.get(name)
+    if value is None:
+        lowered = name.lower()
+        for key, candidate in headers.items():
+            if key.lower() == lowered:
+                return candidate
+    return value
+
+
+def parse_body(event: Dict) -> Dict:
+    """
+    Decode the JSON request body, including base64 bodies (binary media types enabled on the API)
+    """
+    body = event.get('body') or '{}'
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    return loads(body)
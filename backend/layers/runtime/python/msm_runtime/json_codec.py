@@ -0,0 +1,38 @@
+import json
+from decimal import Decimal
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional faster backend - bundle it in the layer to enable
+    orjson = None
+
+
+def encode_default(obj: Any) -> Any:
+    """
+    Serialize DynamoDB Decimals in place instead of copying whole items first
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=encode_default).decode('utf-8')
+
+    def loads(data):
+        return orjson.loads(data)
+else:
+    JSON_BACKEND = 'json'
+    _encoder = json.JSONEncoder(default=encode_default)
+
+    def dumps(obj: Any) -> str:
+        return _encoder.encode(obj)
+
+    def loads(data):
+        return json.loads(data)
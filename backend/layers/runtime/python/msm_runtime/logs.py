@@ -0,0 +1,146 @@
+import logging
+import os
+import random
+import traceback
+from typing import Any, Dict
+
+from .json_codec import dumps
+from .tracing import current_trace_id
+
+logger = logging.getLogger()
+
+
+def parse_rates(value: str) -> Dict[str, float]:
+    """
+    Parse "event=rate,event=rate" into {event: rate}
+    """
+    rates = {}
+    for part in (value or '').split(','):
+        event, _, rate = part.strip().partition('=')
+        if event and rate:
+            try:
+                rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+            except ValueError:
+                pass
+    return rates
+
+
+# High-volume events that carry model output are sampled by default; everything else
+# (warnings, errors) is always logged. LOG_SAMPLE_RATES overrides per event.
+DEFAULT_SAMPLE_RATES = {
+    'request.received': 0.05,
+    'classification.request': 0.05,
+    'pii.request': 0.05,
+    'review.request': 0.05,
+    'bedrock.call': 0.05,
+    'bedrock.raw_response': 0.01,
+    'bedrock.reply': 0.01,
+    'extraction.result': 0.05,
+    'classification.result': 0.05,
+    'pii.result': 0.05
+}
+SAMPLE_RATES = {**DEFAULT_SAMPLE_RATES, **parse_rates(os.environ.get('LOG_SAMPLE_RATES', ''))}
+DEFAULT_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_DEFAULT', '1.0'))
+
+# Clinical free text and model output are replaced by their length unless LOG_REDACT=false
+REDACT = os.environ.get('LOG_REDACT', 'true').lower() in ('1', 'true', 'yes')
+REDACTED_FIELDS = frozenset(
+    field.strip() for field in os.environ.get(
+        'LOG_REDACT_FIELDS',
+        'symptoms,text,message,reply,raw,reasoning,additionalInfo,conversationHistory,piiDetails,value,recommendation'
+    ).split(',') if field.strip()
+)
+MAX_FIELD_CHARS = int(os.environ.get('LOG_MAX_FIELD_CHARS', '200'))
+MAX_ITEMS = int(os.environ.get('LOG_MAX_ITEMS', '10'))
+LOG_TRACEBACKS = os.environ.get('LOG_TRACEBACKS', 'false').lower() in ('1', 'true', 'yes')
+MAX_TRACEBACK_CHARS = 2000
+
+
+def redact(value: Any) -> str:
+    if isinstance(value, (str, bytes)):
+        return f"[redacted {len(value)} chars]"
+    if isinstance(value, (list, tuple, dict)):
+        return f"[redacted {len(value)} items]"
+    return '[redacted]'
+
+
+def clean(value: Any, depth: int = 0) -> Any:
+    """
+    Cap string lengths, list sizes and nesting, and redact sensitive keys, before encoding
+    """
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', errors='replace')
+    if isinstance(value, str):
+        if len(value) > MAX_FIELD_CHARS:
+            return f"{value[:MAX_FIELD_CHARS]}...(+{len(value) - MAX_FIELD_CHARS} chars)"
+        return value
+    if depth >= 3:
+        return f"[{type(value).__name__}]"
+    if isinstance(value, dict):
+        return {
+            key: redact(item) if REDACT and key in REDACTED_FIELDS else clean(item, depth + 1)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple, set)):
+        items = [clean(item, depth + 1) for item in list(value)[:MAX_ITEMS]]
+        if len(value) > MAX_ITEMS:
+            items.append(f"...(+{len(value) - MAX_ITEMS} items)")
+        return items
+    return value
+
+
+def should_log(event: str, level: int) -> bool:
+    """
+    Level and sampling check, done before any field is formatted
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    rate = SAMPLE_RATES.get(event, DEFAULT_SAMPLE_RATE)
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def emit(event: str, level: int, fields: Dict[str, Any], raw_keys: tuple = ()) -> None:
+    record = {'level': logging.getLevelName(level), 'event': event}
+    trace_id = current_trace_id()
+    if trace_id:
+        record['traceId'] = trace_id
+    for key, value in fields.items():
+        if callable(value):
+            value = value()
+        if key in raw_keys:
+            record[key] = value
+        elif REDACT and key in REDACTED_FIELDS:
+            record[key] = redact(value)
+        else:
+            record[key] = clean(value)
+    logger.log(level, dumps(record))
+
+
+def log_event(event: str, level: int = logging.INFO, **fields) -> bool:
+    """
+    Emit one structured JSON log line if the event passes the level and sampling checks.
+
+    Field values may be callables; they are only evaluated when the line is emitted,
+    so expensive or large values cost nothing for sampled-out events.
+    Returns whether the line was emitted.
+    """
+    if not should_log(event, level):
+        return False
+    emit(event, level, fields)
+    return True
+
+
+def log_error(event: str, error: BaseException, level: int = logging.ERROR, **fields) -> bool:
+    """
+    Log an exception as its type and capped message. The traceback is only
+    included when LOG_TRACEBACKS is enabled.
+    """
+    if not should_log(event, level):
+        return False
+    details: Dict[str, Any] = {'errorType': type(error).__name__, 'error': str(error)}
+    if LOG_TRACEBACKS:
+        details['traceback'] = ''.join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )[-MAX_TRACEBACK_CHARS:]
+    emit(event, level, {**details, **fields}, raw_keys=('traceback',))
+    return True
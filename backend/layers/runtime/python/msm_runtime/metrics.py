@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+from typing import Dict
+
+from .json_codec import dumps
+from .tracing import current_trace_id
+
+# Metrics are written to stdout in CloudWatch Embedded Metric Format; CloudWatch extracts
+# them from the log stream, so emitting one costs no API call and no request latency
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'MedicalSpecialtyMatchmaker')
+FUNCTION_NAME = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
+
+
+def put_metric(name: str, value: float = 1, unit: str = 'Count', **dimensions) -> None:
+    """
+    Emit one metric value, e.g. put_metric('ChatEarlyExit', 1, Mode='sequential')
+    """
+    if not METRICS_ENABLED:
+        return
+    dims: Dict[str, str] = {key: str(val) for key, val in dimensions.items()}
+    if FUNCTION_NAME:
+        dims['Function'] = FUNCTION_NAME
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [list(dims)],
+                'Metrics': [{'Name': name, 'Unit': unit}]
+            }]
+        },
+        name: value,
+        **dims
+    }
+    trace_id = current_trace_id()
+    if trace_id:
+        record['traceId'] = trace_id
+    # Bypasses the logging module: EMF lines must not carry the runtime's log prefix
+    sys.stdout.write(dumps(record) + '\n')
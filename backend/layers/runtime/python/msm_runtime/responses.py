@@ -0,0 +1,28 @@
+from typing import Dict, Optional
+
+from .cors import cors_policy
+from .json_codec import dumps
+
+
+def create_response(status_code: int, body: Dict, request_origin: Optional[str] = None,
+                    headers: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Create standardized API response with secure CORS headers
+
+    Args:
+        status_code: HTTP status code
+        body: Response body dictionary (may contain DynamoDB Decimals)
+        request_origin: The Origin header from the incoming request
+        headers: Extra response headers, e.g. Retry-After
+
+    Returns:
+        API Gateway response with appropriate CORS headers
+    """
+    response_headers = cors_policy.headers(request_origin)
+    if headers:
+        response_headers = {**response_headers, **headers}
+    return {
+        'statusCode': status_code,
+        'headers': response_headers,
+        'body': dumps(body)
+    }
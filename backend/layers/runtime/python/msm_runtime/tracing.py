@@ -0,0 +1,139 @@
+import logging
+import os
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from .events import get_header
+from .json_codec import dumps
+
+logger = logging.getLogger()
+
+# Spans cost one perf_counter pair and a list append; when disabled, span() returns a shared no-op
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+TRACE_HEADER = 'X-Trace-Id'
+
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('msm_current_trace', default=None)
+
+
+class Trace:
+    """
+    Spans recorded for one invocation
+    """
+    __slots__ = ('trace_id', 'spans', 'started')
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[tuple] = []
+        self.started = time.perf_counter()
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value, one metric per span plus the invocation total
+        """
+        entries = []
+        for name, duration, attributes in self.spans:
+            desc = attributes.get('stage') or attributes.get('op')
+            entries.append(f'{name};desc="{desc}";dur={duration:.1f}' if desc else f"{name};dur={duration:.1f}")
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ', '.join(entries)
+
+
+class Span:
+    __slots__ = ('trace', 'name', 'attributes', 'started')
+
+    def __init__(self, trace: Trace, name: str, attributes: Dict):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.trace.spans.append((self.name, (time.perf_counter() - self.started) * 1000, self.attributes))
+        return False
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+
+class NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, key: str, value) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def span(name: str, **attributes):
+    """
+    Time a stage of the current invocation: `with span('claude'): ...`
+    """
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    trace = _current_trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    return Span(trace, name, attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def start_trace(event: Dict, context=None) -> Optional[Trace]:
+    """
+    Begin a trace for this invocation, propagating the caller's X-Trace-Id when present
+    """
+    if not TRACING_ENABLED:
+        return None
+    trace_id = (
+        get_header(event, TRACE_HEADER)
+        or (event.get('requestContext') or {}).get('requestId')
+        or getattr(context, 'aws_request_id', None)
+        or uuid.uuid4().hex
+    )
+    trace = Trace(trace_id)
+    _current_trace.set(trace)
+    return trace
+
+
+def finish_trace(response: Dict) -> Dict:
+    """
+    Emit the invocation's spans as one structured log line and attach
+    Server-Timing / X-Trace-Id headers to the response
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return response
+    _current_trace.set(None)
+
+    headers = response.setdefault('headers', {})
+    headers['Server-Timing'] = trace.server_timing()
+    headers[TRACE_HEADER] = trace.trace_id
+
+    logger.info(dumps({
+        'event': 'trace',
+        'traceId': trace.trace_id,
+        'statusCode': response.get('statusCode'),
+        'totalMs': round((time.perf_counter() - trace.started) * 1000, 2),
+        'spans': [
+            {'name': name, 'ms': round(duration, 2), **attributes}
+            for name, duration, attributes in trace.spans
+        ]
+    }))
+    return response
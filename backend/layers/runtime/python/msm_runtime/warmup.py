@@ -0,0 +1,53 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .logs import log_error, log_event
+
+# Per-container bookkeeping for the warm action. Handlers call record_invocation() once per
+# invocation; the first call fixes the init time as module import to first request.
+_invocations = 0
+_init_ms: Optional[float] = None
+
+
+def record_invocation(init_started: float) -> bool:
+    """
+    Count an invocation of this container; True for the first (cold) one
+
+    Args:
+        init_started: perf_counter() taken at the top of the handler module
+    """
+    global _invocations, _init_ms
+    _invocations += 1
+    if _init_ms is None:
+        _init_ms = (time.perf_counter() - init_started) * 1000
+    return _invocations == 1
+
+
+def run_warmup(steps: List[Tuple[str, Callable[[], None]]]) -> Dict:
+    """
+    Run warm-up steps in order and time each one. A failing step is logged and reported
+    in `errors`; the remaining steps still run.
+    """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    errors: Dict[str, str] = {}
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            log_error('warmup.error', e, step=name)
+            errors[name] = str(e)
+        timings[name] = round((time.perf_counter() - step_started) * 1000, 1)
+
+    result = {
+        'warm': not errors,
+        'coldStart': _invocations <= 1,
+        'initMs': round(_init_ms or 0.0, 1),
+        'timings': timings,
+        'totalMs': round((time.perf_counter() - started) * 1000, 1)
+    }
+    if errors:
+        result['errors'] = errors
+    log_event('warmup.done', **result)
+    return result
@@ -3,6 +3,9 @@ import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as apigateway from 'aws-cdk-lib/aws-apigateway';
 import * as iam from 'aws-cdk-lib/aws-iam';
+import * as s3 from 'aws-cdk-lib/aws-s3';
+import * as events from 'aws-cdk-lib/aws-events';
+import * as targets from 'aws-cdk-lib/aws-events-targets';
 import * as amplify from 'aws-cdk-lib/aws-amplify';
 import * as secretsmanager from 'aws-cdk-lib/aws-secretsmanager';
 import { Construct } from 'constructs';
@@ -24,18 +27,142 @@ export class MSMBackendStack extends cdk.Stack {
       removalPolicy: cdk.RemovalPolicy.DESTROY
     });
 
+    // Triage queue: unassigned requests ordered by urgency rank then createdAt
+    medicalRequestsTable.addGlobalSecondaryIndex({
+      indexName: 'TriageIndex',
+      partitionKey: { name: 'status', type: dynamodb.AttributeType.STRING },
+      sortKey: { name: 'triageKey', type: dynamodb.AttributeType.STRING },
+      projectionType: dynamodb.ProjectionType.KEYS_ONLY
+    });
+
+    // Aggregate counters maintained on submit (dimension = specialty/urgency/day/..., bucket = value)
+    const requestStatsTable = new dynamodb.Table(this, 'RequestStatsTable', {
+      tableName: 'medical-request-stats',
+      partitionKey: { name: 'dimension', type: dynamodb.AttributeType.STRING },
+      sortKey: { name: 'bucket', type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      removalPolicy: cdk.RemovalPolicy.DESTROY
+    });
+
+    // Inverted index for symptom search (term -> postings ordered by createdAt#id)
+    const requestIndexTable = new dynamodb.Table(this, 'RequestIndexTable', {
+      tableName: 'medical-request-index',
+      partitionKey: { name: 'term', type: dynamodb.AttributeType.STRING },
+      sortKey: { name: 'requestKey', type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      removalPolicy: cdk.RemovalPolicy.DESTROY
+    });
+
+    // Volunteer specialist roster (one entry per specialist + coverage key)
+    const specialistRosterTable = new dynamodb.Table(this, 'SpecialistRosterTable', {
+      tableName: 'volunteer-specialists',
+      partitionKey: { name: 'specialistId', type: dynamodb.AttributeType.STRING },
+      sortKey: { name: 'coverage', type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      removalPolicy: cdk.RemovalPolicy.DESTROY
+    });
+
+    // Sparse index: matchKey is only set while a specialist is available and under capacity
+    specialistRosterTable.addGlobalSecondaryIndex({
+      indexName: 'MatchIndex',
+      partitionKey: { name: 'matchKey', type: dynamodb.AttributeType.STRING },
+      sortKey: { name: 'activeCases', type: dynamodb.AttributeType.NUMBER },
+      projectionType: dynamodb.ProjectionType.ALL
+    });
+
+    // Cold tier: requests past the retention window, as gzip JSON lines partitioned by month
+    // (see lambda/request_archive.py). Archived files are read rarely, so they move to Infrequent Access.
+    const requestArchiveBucket = new s3.Bucket(this, 'RequestArchiveBucket', {
+      encryption: s3.BucketEncryption.S3_MANAGED,
+      blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+      enforceSSL: true,
+      lifecycleRules: [{
+        transitions: [{
+          storageClass: s3.StorageClass.INFREQUENT_ACCESS,
+          transitionAfter: cdk.Duration.days(30),
+        }],
+      }],
+      removalPolicy: cdk.RemovalPolicy.RETAIN,
+    });
+
+    // Shared runtime layer (CORS policy, response builder, JSON codec) used by both Lambdas
+    const runtimeLayer = new lambda.LayerVersion(this, 'RuntimeLayer', {
+      code: lambda.Code.fromAsset('layers/runtime'),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_11],
+      description: 'msm_runtime: precomputed CORS policy, response builder and JSON codec',
+    });
+
+    // Response compression settings shared by both Lambdas (see msm_runtime/compression.py)
+    const compressionEnv = {
+      COMPRESSION_MIN_BYTES: process.env.COMPRESSION_MIN_BYTES || '1024',
+      GZIP_LEVEL: process.env.GZIP_LEVEL || '5',
+      BROTLI_QUALITY: process.env.BROTLI_QUALITY || '4',
+      // Per-stage spans and the Server-Timing header (see msm_runtime/tracing.py)
+      TRACING_ENABLED: process.env.TRACING_ENABLED || 'true',
+    };
+
+    // Structured log sampling and redaction (see msm_runtime/logs.py)
+    const loggingEnv = {
+      LOG_LEVEL: process.env.LOG_LEVEL || 'INFO',
+      LOG_SAMPLE_RATES: process.env.LOG_SAMPLE_RATES || '',
+      LOG_REDACT: process.env.LOG_REDACT || 'true',
+    };
+
     // Chatbot Orchestrator Lambda (Python)
     const chatbotOrchestratorFn = new lambda.Function(this, 'ChatbotOrchestratorFn', {
       runtime: lambda.Runtime.PYTHON_3_11,
       handler: 'chatbot_orchestrator.lambda_handler',
       code: lambda.Code.fromAsset('lambda'),
+      layers: [runtimeLayer],
       environment: {
         REQUESTS_TABLE: medicalRequestsTable.tableName,
         BEDROCK_REGION: this.region,
-        ALLOWED_ORIGINS: allowedOrigins.join(',')
+        // Regions to spread Bedrock calls over (see lambda/region_pool.py)
+        BEDROCK_REGIONS: process.env.BEDROCK_REGIONS || this.region,
+        ALLOWED_ORIGINS: allowedOrigins.join(','),
+        // Complexity-based model routing (see lambda/model_router.py)
+        MODEL_ROUTING: process.env.MODEL_ROUTING || 'true',
+        CONFIDENCE_THRESHOLD: process.env.CONFIDENCE_THRESHOLD || '0.70',
+        ROUTING_LIGHT_MAX: process.env.ROUTING_LIGHT_MAX || '0.35',
+        // off | sequential | parallel - templated reply once extraction is confident
+        CHAT_EARLY_EXIT: process.env.CHAT_EARLY_EXIT || 'sequential',
+        // Nearest-neighbour cache of classifications (see lambda/classification_cache.py).
+        // Opt-in; 0.97 is the lowest threshold with no cross-case hits in semantic_cache_eval.py
+        SEMANTIC_CACHE: process.env.SEMANTIC_CACHE || 'false',
+        SEMANTIC_CACHE_THRESHOLD: process.env.SEMANTIC_CACHE_THRESHOLD || '0.97',
+        SEMANTIC_CACHE_SIZE: process.env.SEMANTIC_CACHE_SIZE || '512',
+        // Pin prompt versions, e.g. 'chat=v1,classify=v2' (see lambda/prompt_registry.py)
+        PROMPT_VERSIONS: process.env.PROMPT_VERSIONS || '',
+        // Long PII checks run as parallel overlapping chunks (see lambda/pii_chunking.py)
+        PII_CHUNK_CHARS: process.env.PII_CHUNK_CHARS || '2000',
+        PII_MAX_CONCURRENCY: process.env.PII_MAX_CONCURRENCY || '8',
+        // Re-check only edited sentences for a sessionId (see lambda/pii_verdicts.py)
+        PII_INCREMENTAL: process.env.PII_INCREMENTAL || 'true',
+        PII_SESSION_TTL_SECONDS: process.env.PII_SESSION_TTL_SECONDS || '1800',
+        // Fail fast while a model is failing or slow (see lambda/circuit_breaker.py)
+        CIRCUIT_BREAKER: process.env.CIRCUIT_BREAKER || 'true',
+        BREAKER_FAILURE_RATE: process.env.BREAKER_FAILURE_RATE || '0.5',
+        BREAKER_SLOW_CALL_SECONDS: process.env.BREAKER_SLOW_CALL_SECONDS || '10',
+        BREAKER_OPEN_SECONDS: process.env.BREAKER_OPEN_SECONDS || '30',
+        BEDROCK_READ_TIMEOUT: process.env.BEDROCK_READ_TIMEOUT || '30',
+        // Duplicate slow classify/PII calls, capped at HEDGE_BUDGET extra calls (see lambda/hedging.py)
+        HEDGE_REQUESTS: process.env.HEDGE_REQUESTS || 'false',
+        HEDGE_PERCENTILE: process.env.HEDGE_PERCENTILE || '0.95',
+        HEDGE_BUDGET: process.env.HEDGE_BUDGET || '0.1',
+        // Size limits checked before any prompt is built (see msm_runtime/admission.py)
+        MAX_BODY_BYTES: process.env.MAX_BODY_BYTES || '262144',
+        MAX_MESSAGE_CHARS: process.env.MAX_MESSAGE_CHARS || '4000',
+        MAX_HISTORY_TURNS: process.env.MAX_HISTORY_TURNS || '50',
+        MAX_HISTORY_CHARS: process.env.MAX_HISTORY_CHARS || '30000',
+        MAX_SYMPTOMS_CHARS: process.env.MAX_SYMPTOMS_CHARS || '10000',
+        MAX_PII_TEXT_CHARS: process.env.MAX_PII_TEXT_CHARS || '64000',
+        ...compressionEnv,
+        ...loggingEnv
       },
       timeout: cdk.Duration.seconds(60),  // Increased from 30 to 60 seconds
-      memorySize: 1024,  // Increased from 512 to 1024 MB for better performance
+      // Warm requests spend ~2 ms of CPU and the rest waiting on Bedrock, so memory mainly sets
+      // cold-start import time; 768 MB keeps it under a second (benchmarks/memory_sweep_benchmark.py)
+      memorySize: 768,
     });
 
     // Data Handler Lambda (Python)
@@ -43,17 +170,62 @@ export class MSMBackendStack extends cdk.Stack {
       runtime: lambda.Runtime.PYTHON_3_11,
       handler: 'data_handler.lambda_handler',
       code: lambda.Code.fromAsset('lambda'),
+      layers: [runtimeLayer],
       environment: {
         REQUESTS_TABLE: medicalRequestsTable.tableName,
-        ALLOWED_ORIGINS: allowedOrigins.join(',')
+        STATS_TABLE: requestStatsTable.tableName,
+        INDEX_TABLE: requestIndexTable.tableName,
+        ROSTER_TABLE: specialistRosterTable.tableName,
+        ALLOWED_ORIGINS: allowedOrigins.join(','),
+        // Archived requests, read by `get` when an ID is not in the table
+        ARCHIVE_BUCKET: requestArchiveBucket.bucketName,
+        ...compressionEnv,
+        ...loggingEnv
       },
       timeout: cdk.Duration.seconds(30),
-      memorySize: 256,
+      // ~10 ms of CPU per request: below 512 MB requests stall on the CPU quota, and below 768 MB
+      // cold-start imports take over a second (benchmarks/memory_sweep_benchmark.py recommends 768)
+      memorySize: 768,
+    });
+
+    // Daily job moving old, no longer unassigned requests from the table to the archive bucket.
+    // One run at a time: each run rewrites the partition indexes it touches.
+    const requestArchiverFn = new lambda.Function(this, 'RequestArchiverFn', {
+      runtime: lambda.Runtime.PYTHON_3_11,
+      handler: 'data_handler.archive_handler',
+      code: lambda.Code.fromAsset('lambda'),
+      layers: [runtimeLayer],
+      environment: {
+        REQUESTS_TABLE: medicalRequestsTable.tableName,
+        STATS_TABLE: requestStatsTable.tableName,
+        INDEX_TABLE: requestIndexTable.tableName,
+        ROSTER_TABLE: specialistRosterTable.tableName,
+        ARCHIVE_BUCKET: requestArchiveBucket.bucketName,
+        ARCHIVE_RETENTION_DAYS: process.env.ARCHIVE_RETENTION_DAYS || '365',
+        ...loggingEnv
+      },
+      timeout: cdk.Duration.minutes(15),
+      memorySize: 512,
+      reservedConcurrentExecutions: 1,
+    });
+
+    new events.Rule(this, 'RequestArchiveSchedule', {
+      schedule: events.Schedule.cron({ minute: '30', hour: '3' }),
+      targets: [new targets.LambdaFunction(requestArchiverFn)],
     });
 
     // Grant DynamoDB permissions
     medicalRequestsTable.grantReadWriteData(chatbotOrchestratorFn);
     medicalRequestsTable.grantReadWriteData(dataHandlerFn);
+    requestStatsTable.grantReadWriteData(dataHandlerFn);
+    requestIndexTable.grantReadWriteData(dataHandlerFn);
+    specialistRosterTable.grantReadWriteData(dataHandlerFn);
+    medicalRequestsTable.grantReadWriteData(requestArchiverFn);
+    requestIndexTable.grantReadWriteData(requestArchiverFn);
+
+    // Archive access: the data handler only reads, the archiver writes parts and indexes
+    requestArchiveBucket.grantRead(dataHandlerFn);
+    requestArchiveBucket.grantReadWrite(requestArchiverFn);
 
     // Grant Bedrock permissions to orchestrator
     chatbotOrchestratorFn.addToRolePolicy(
@@ -87,10 +259,25 @@ export class MSMBackendStack extends cdk.Stack {
     const chatbotApi = new apigateway.RestApi(this, 'ChatbotAPI', {
       restApiName: 'Medical Specialty Matchmaker API',
       description: 'API for medical specialty matching chatbot',
+      // Lets Lambdas return gzip/br bodies (isBase64Encoded); request bodies then arrive base64-encoded
+      binaryMediaTypes: ['*/*'],
+      // Request rates are capped here, before a Lambda or model is involved. A Lambda container
+      // serves one request at a time, so the handlers cannot count concurrent requests themselves.
+      // The chatbot route triggers model calls and gets a tighter cap than the stage default.
+      deployOptions: {
+        throttlingRateLimit: Number(process.env.API_RATE_LIMIT || '50'),
+        throttlingBurstLimit: Number(process.env.API_BURST_LIMIT || '100'),
+        methodOptions: {
+          '/chatbot/POST': {
+            throttlingRateLimit: Number(process.env.CHATBOT_RATE_LIMIT || '10'),
+            throttlingBurstLimit: Number(process.env.CHATBOT_BURST_LIMIT || '20'),
+          },
+        },
+      },
       defaultCorsPreflightOptions: {
         allowOrigins: allowedOrigins,
         allowMethods: ['GET', 'POST', 'OPTIONS'],
-        allowHeaders: ['Content-Type', 'Authorization'],
+        allowHeaders: ['Content-Type', 'Authorization', 'X-Trace-Id'],
         allowCredentials: false,
         maxAge: cdk.Duration.hours(1),
       },
@@ -19,6 +19,8 @@ export async function POST(request: NextRequest) {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        // Reuse the caller's trace ID so backend spans can be correlated with the browser
+        ...(request.headers.get('x-trace-id') ? { 'X-Trace-Id': request.headers.get('x-trace-id') as string } : {}),
       },
       body: JSON.stringify({ action, data }),
     });
@@ -33,7 +35,14 @@ export async function POST(request: NextRequest) {
     }
 
     const result = await response.json();
-    return NextResponse.json(result);
+
+    // Forward the Lambda's per-stage timing breakdown to the browser
+    const timingHeaders: Record<string, string> = {};
+    for (const name of ['Server-Timing', 'X-Trace-Id']) {
+      const value = response.headers.get(name);
+      if (value) timingHeaders[name] = value;
+    }
+    return NextResponse.json(result, { headers: timingHeaders });
   } catch (error) {
     console.error('❌ API Error:', error);
     return NextResponse.json({ 'error': 'Internal server error', 'message': error }, { status: 500 });
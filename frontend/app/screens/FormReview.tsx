@@ -23,6 +23,8 @@ export function FormReview({ onBack, onSubmit, clinicianData, chatData }: FormRe
   const [originalSymptoms] = useState(chatData.extractedData?.symptoms || '');
   const [piiCheckResult, setPiiCheckResult] = useState<any>(null);
   const [showPiiWarning, setShowPiiWarning] = useState(false);
+  // Lets the backend re-check only the sentences edited since the last re-evaluation
+  const [reviewSessionId] = useState(() => crypto.randomUUID());
   
   const MAX_SYMPTOMS_LENGTH = 5000;
 
@@ -158,63 +160,43 @@ export function FormReview({ onBack, onSubmit, clinicianData, chatData }: FormRe
     setShowPiiWarning(false);
     
     try {
-      // First, check for PII
-      console.log('🔍 Checking for PII in symptoms...');
+      // PII check and classification run together server-side; the classification
+      // is only returned when the text is free of PII
+      console.log('🔍 Checking for PII and re-evaluating specialty...');
       
-      const piiResponse = await fetch('/api/chatbot', {
+      const reviewResponse = await fetch('/api/chatbot', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
-          action: 'check_pii',
+          action: 'review',
           data: {
-            text: symptoms
+            symptoms: symptoms,
+            ageGroup: chatData.extractedData?.ageGroup || 'Adult',
+            urgency: chatData.extractedData?.urgency || 'medium',
+            sessionId: reviewSessionId
           },
         }),
       });
       
-      if (!piiResponse.ok) {
-        const errorText = await piiResponse.text();
-        console.error('PII check response error:', errorText);
-        throw new Error(`PII check failed: ${piiResponse.status} ${errorText}`);
+      if (!reviewResponse.ok) {
+        const errorText = await reviewResponse.text();
+        console.error('Review response error:', errorText);
+        throw new Error(`Re-evaluation failed: ${reviewResponse.status} ${errorText}`);
       }
       
-      const piiResult = await piiResponse.json();
-      console.log('✅ PII check result:', piiResult);
+      const reviewResult = await reviewResponse.json();
+      console.log('✅ Review result:', reviewResult);
       
-      setPiiCheckResult(piiResult);
+      setPiiCheckResult(reviewResult.pii);
       
       // If PII is detected, block re-evaluation and show warning
-      if (piiResult.containsPII) {
+      if (reviewResult.pii.containsPII) {
         setShowPiiWarning(true);
         setSymptomsError('Personally identifiable information detected. Please remove it before proceeding.');
         return;
       }
       
-      // No PII detected, proceed with re-evaluation
-      console.log('🔄 Re-evaluating specialty with updated symptoms...');
-      
-      const classifyResponse = await fetch('/api/chatbot', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          action: 'classify',
-          data: {
-            symptoms: symptoms,
-            ageGroup: chatData.extractedData?.ageGroup || 'Adult',
-            urgency: chatData.extractedData?.urgency || 'medium',
-            requireSubspecialty: true
-          },
-        }),
-      });
-      
-      if (!classifyResponse.ok) {
-        const errorText = await classifyResponse.text();
-        console.error('Re-evaluation response error:', errorText);
-        throw new Error(`Re-evaluation failed: ${classifyResponse.status} ${errorText}`);
-      }
-      
-      const newClassification = await classifyResponse.json();
-      console.log('✅ Re-evaluation result:', newClassification);
+      const newClassification = reviewResult.classification;
       
       // Update the classification
       setClassification(newClassification);